@@ -1,27 +1,58 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-from dash import Dash, html, dcc, callback_context
+from dash import Dash, html, dcc, callback_context, Patch, no_update
 from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import plotly.io as pio
+import plot_theme  # sets the app's default plotly template
 from dash_player import DashPlayer
-from dash.dependencies import Input, Output, State, MATCH
-from view_point_in_time.pit_synch import make_coherence_figure, half_donut_segments
+from dash.dependencies import Input, Output, State, MATCH, ClientsideFunction
+from view_point_in_time.pit_synch import make_coherence_figure, half_donut_segments, segments_for_count
+from view_point_in_time.pit_frames import (
+    make_playback_frames,
+    playback_frames_store,
+    glyph_counts_at,
+    frame_index_at,
+    BEHAVIOR_IMAGES,
+    BEHAVIOR_TITLES,
+    LEADER_IMAGES,
+)
 from view_point_in_time.pit_dyad_lead import make_leading_panel
 from view_point_in_time.pit_behavior import make_behavior_panel
 
-from view_summary.sum_behaviors_pie import make_pie
+from view_summary.sum_behaviors_pie import make_pie, make_pie_from_counts
 from view_summary.sum_synch_bar import make_synch_bar
-from view_summary.sum_synch_violin import make_violin
+from view_summary.sum_synch_violin import VIOLIN_MAX_POINTS, make_violin, make_violin_from_histograms
 from view_summary.sum_table import make_summary_table
+from view_summary.sum_cohort import (
+    make_cohort_overview,
+    make_cohort_tables,
+    make_duration_histogram,
+    make_dyad_distributions,
+)
 
-from vid_heatmaps import make_stacked_heatmaps
+from vid_heatmaps import get_timeline_figure, timeline_trace_updates, timeline_view, TIMELINE_COLUMNS
 
 from legend import make_combined_legend
 
-#Load Data
-from load_data import df, VIDEO
+from prepared_session import LEAD_CHILD, LEAD_PARENT
+
+#Load Data (one dyad at a time, on demand)
+from session_registry import REGISTRY, get_session, session_by_id
+from artifacts import load_events, load_summary
+from run_length import extract_events
+from cohort_sketch import Cohort
+from window_stats import HIST_EDGES
+from callback_metrics import METRICS, METRICS_PATH, record_session
+from metrics_panel import make_latency_histogram, make_metrics_table
+from figure_json import pack_figure, pack_trace
 
 
 # Color Scheme for the App
@@ -69,57 +100,131 @@ ICON_BASE_STYLE = {
     "height": "18px",
 }
 
-FIG_SYNCH_GLYPH        = make_coherence_figure(df)
-
-FIG_LEADING_PANEL      = make_leading_panel(df, row_index=1)
-FIG_BEHAVIOR_PANEL     = make_behavior_panel(df, row_index=1)
-
-FIG_SYNCH_BAR          = make_synch_bar(df)
-FIG_SYNCH_BAR.update_layout(clickmode="event+select")
-FIG_VIOLIN             = make_violin(df)
-TABLE_SUMMARY          = make_summary_table(df)
-FIG_PIE                = make_pie(df)
-BASE_PLAY_HEATMAP = make_stacked_heatmaps(minimal=False).update_layout(margin=dict(l=90, r=20, t=10, b=30))
+# Figures, playback frames etc. are built per session (i.e. per version of a
+# dyad's data) the first time it is shown and kept for the DYAD_CACHE_SIZE
+# most recent ones (the prepared sessions themselves live in
+# session_registry's LRU). Keyed by session id, so a reloaded dyad gets fresh
+# figures while callbacks still holding the old session see the old ones.
+DYAD_CACHE_SIZE = 8
+
+# watch the data files and swap in changed dyads without a restart
+HOT_RELOAD = True
+
+# per-callback timing / payload sizes (callback_metrics.py), served at
+# /_metrics and shown on a Metrics tab that is hidden unless this is on.
+# Off by default; CALLBACK_METRICS=1 in the environment turns it on.
+CALLBACK_METRICS = os.environ.get("CALLBACK_METRICS") == "1"
+# CALLBACK_RECORD=file.jsonl records what each browser changes, for
+# replaying the session with loadtest.py --replay
+CALLBACK_RECORD = os.environ.get("CALLBACK_RECORD")
+METRICS_REFRESH_MS = 2000
 
 LEAD_COL = "leading"
 TS_COL = "timestamp"
 LF_COL = "lf_coh"
 HF_COL = "hf_coh"
 
-DEFAULT_FONT = "Lato, sans-serif"
 SYNCH_COLORS = px.colors.sequential.BuPu 
 
-lato_template = pio.templates["plotly_white"]
-lato_template.layout.font.family = DEFAULT_FONT
+# Play view cursor and PIT cards: updated in the browser by assets/playback.js
+# (no server round trip while the video plays). Set to False to fall back to
+# the server-side update_heatmaps_cursor / update_glyph_from_video /
+# update_dyad_from_video callbacks.
+CLIENTSIDE_PLAYBACK = True
+
+# summary figures for (leader filter, time window) are memoized; window edges
+# are snapped to 1 / WINDOW_QUANTUM_STEPS of the window's length (at least
+# WINDOW_QUANTUM_S) before lookup, so hovers a few seconds apart share an entry
+FILTER_CACHE_SIZE = 256
+WINDOW_QUANTUM_S = 1
+WINDOW_QUANTUM_STEPS = 12
+
+# timeline graphs that swap in finer / coarser LOD tiles when zoomed
+TIMELINE_LOD_GRAPHS = ["timeline-heatmap", "play-heatmap-stack"]
+
+
+# Home / Play page bodies as plain JSON (see page_tree), for the
+# PAGE_CACHE_SIZE most recent (page, show_pit, session) combinations
+PAGE_CACHE_SIZE = 16
+
+# Home and Play stay mounted in the browser once opened and are hidden rather
+# than removed, so switching back costs no request body at all. Zero height
+# instead of display: none keeps the page's width, so its graphs are laid out
+# at the right size while hidden.
+KEPT_PAGES = ("home", "play")
+HIDDEN_PAGE_STYLE = {"height": 0, "overflow": "hidden", "visibility": "hidden"}
+
+
+# merged per-dyad summary sketches; refreshed (one merge per new / changed
+# dyad) whenever the Cohort tab is opened
+COHORT = Cohort()
+
+
+@lru_cache(maxsize=DYAD_CACHE_SIZE)
+def session_events(session_id):
+    # lf / hf / joint event tables (run_length.extract_events)
+    events = load_events(session_id)
+    return events if events is not None else extract_events(session_by_id(session_id))
+
+
+@lru_cache(maxsize=DYAD_CACHE_SIZE)
+def session_figures(session_id):
+    # the dyad's full-session figures for the Home / Play pages
+    # event tables / metrics come from the precompute artifacts when present
+    session = session_by_id(session_id)
+    events = session_events(session_id)
+    synch_bar = make_synch_bar(session, events=events)
+    synch_bar.update_layout(clickmode="event+select")
+    return {
+        "synch_glyph": pack_figure(make_coherence_figure(session)),
+        "leading_panel": make_leading_panel(session, row_index=1),
+        "behavior_panel": make_behavior_panel(session, row_index=1),
+        "synch_bar": synch_bar,
+        "violin": pack_figure(make_violin(session)),
+        "summary_table": make_summary_table(
+            session, metrics=load_summary(session.session_id)
+        ),
+        "pie": make_pie(session),
+    }
 
-pio.templates["lato"] = lato_template
-pio.templates.default = "lato"
 
-TS_SERIES = pd.to_datetime(df[TS_COL]) 
-VIDEO_START = TS_SERIES.iloc[0]
+@lru_cache(maxsize=DYAD_CACHE_SIZE)
+def session_playback_frames(session_id):
+    # per-sample LF/HF slice counts + behavior / leader codes for playback
+    return make_playback_frames(session_by_id(session_id))
 
-sample_fig = make_stacked_heatmaps(minimal=False)
-heatmap_tickvals = sample_fig.layout.xaxis.tickvals
-heatmap_ticktext = sample_fig.layout.xaxis.ticktext
 
-# Convert heatmap ticks to slider marks for the range slider
-if heatmap_tickvals is not None and heatmap_ticktext is not None:
-    SLIDER_MARKS = {
-        int((pd.to_datetime(tick) - TS_SERIES.min()).total_seconds()): {
-            "label": text,
-            "style": {"fontSize": "9px", "whiteSpace": "nowrap"}
-        }
-        for tick, text in zip(heatmap_tickvals, heatmap_ticktext)
-    }
-else:
-    # Fallback if ticks aren't set
-    SLIDER_MARKS = {
-        int((t - TS_SERIES.min()).total_seconds()): {
-            "label": t.strftime("%Y-%m-%d %H:%M:%S"),
-            "style": {"fontSize": "12px", "whiteSpace": "nowrap"}
-        }
-        for t in pd.date_range(TS_SERIES.min(), TS_SERIES.max(), freq='2min')
-    }
+def warm_session(dyad_id, session):
+    # reload hook: build a changed dyad's figures before it is swapped in
+    session_figures(session.session_id)
+    session_playback_frames(session.session_id)
+    get_timeline_figure(session)    # every layout variant shares this base
+
+
+REGISTRY.on_reload(warm_session)
+
+
+def session_start_ms(session):
+    # plotly date axes take unix ms, so the browser can place the cursor itself
+    return int((session.start - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+
+
+def play_heatmap_figure(session):
+    # cursor line starts at the first sample; shapes[0] is what gets moved
+    fig = get_timeline_figure(session, "play")
+    fig["layout"]["shapes"] = [
+        dict(
+            type="line",
+            x0=session.start.isoformat(),
+            x1=session.start.isoformat(),
+            y0=0,
+            y1=1,
+            xref="x",
+            yref="paper",
+            line=dict(color="black", width=3),
+        )
+    ]
+    return fig
 
 def chart_header(title: str, index: str, body: str):
     # index: string per chart (“summary”, “pie”, “timeline”)
@@ -285,56 +390,88 @@ def make_synchrony_gradient_legend():
     return fig
 
 
-def make_timeline_fig_with_default_window(idx: int = 0):
+def highlight_shapes(window_start, window_end, cursor_time):
+    # [0] = one-minute highlight band, [1] = black cursor line
+    return [
+        dict(
+            type="rect",
+            x0=window_start.isoformat(),
+            x1=window_end.isoformat(),
+            y0=0,
+            y1=1,
+            xref="x",
+            yref="paper",
+            fillcolor="rgba(255, 230, 128, 0.35)",
+            line=dict(color="rgba(255, 196, 0, 0.9)", width=1),
+            layer="above",
+        ),
+        dict(
+            type="line",
+            x0=cursor_time.isoformat(),
+            x1=cursor_time.isoformat(),
+            y0=0,
+            y1=1,
+            xref="x",
+            yref="paper",
+            line=dict(color="black", width=3),
+        ),
+    ]
+
+
+def glyph_colors_patch(lf, hf):
+    # partial glyph update: only the slice colors of the two gradient arcs
+    # change (traces 2 = LF, 3 = HF); values and layout stay as rendered
+    _, lf_cols = half_donut_segments(lf)
+    _, hf_cols = half_donut_segments(hf)
+
+    patch = Patch()
+    patch["data"][2]["marker"]["colors"] = lf_cols
+    patch["data"][3]["marker"]["colors"] = hf_cols
+    patch["layout"]["transition"] = dict(duration=80, easing="cubic-in-out")
+    return patch
+
+
+def timeline_lod_key(session, i0, i1, columns):
+    # (level, first bin, end bin) of the tile drawn for samples [i0, i1)
+    pyramid = session.timeline_pyramid
+    level = pyramid.level_for(i1 - i0, columns)
+    return [level, *pyramid.bin_range(level, i0, i1)]
+
+
+def timeline_lod_stores(graph_id, session):
+    # <graph>-view: visible x range + plot width, written by assets/timeline.js
+    # <graph>-lod: key of the tile currently drawn (starts at the overview)
+    return [
+        dcc.Store(id=f"{graph_id}-view"),
+        dcc.Store(
+            id=f"{graph_id}-lod",
+            data=timeline_lod_key(session, 0, session.n, TIMELINE_COLUMNS),
+        ),
+    ]
+
+
+def make_timeline_fig_with_default_window(session, idx: int = 0):
     # Base stacked heatmap with an initial highlight band + cursor line
     # centered on the row at idx (default = first sample)
-    base = (
-        make_stacked_heatmaps(minimal=False)
-        .update_xaxes(domain=[0.05, 1.0])
-        .update_layout(margin=dict(l=90, r=20, t=0, b=0))
-    )
+    base = get_timeline_figure(session, "home")
 
-    cursor_time = TS_SERIES.iloc[idx]
+    cursor_time = session.time_index[idx]
     half_window = pd.Timedelta(seconds=30)
 
-    window_start = max(TS_SERIES.iloc[0], cursor_time - half_window)
-    window_end   = min(TS_SERIES.iloc[-1], cursor_time + half_window)
-
-    base.update_layout(
-        shapes=[
-            dict(
-                type="rect",
-                x0=window_start,
-                x1=window_end,
-                y0=0,
-                y1=1,
-                xref="x",
-                yref="paper",
-                fillcolor="rgba(255, 230, 128, 0.35)",
-                line=dict(color="rgba(255, 196, 0, 0.9)", width=1),
-                layer="above",
-            ),
-            dict(
-                type="line",
-                x0=cursor_time,
-                x1=cursor_time,
-                y0=0,
-                y1=1,
-                xref="x",
-                yref="paper",
-                line=dict(color="black", width=3),
-            ),
-        ]
-    )
+    window_start = max(session.start, cursor_time - half_window)
+    window_end   = min(session.end, cursor_time + half_window)
+
+    base["layout"]["shapes"] = highlight_shapes(window_start, window_end, cursor_time)
 
     return base
 
 
-def home_layout(show_pit: bool = False):
+def home_layout(session, show_pit: bool = False):
     # When show_pit is False:
         # Layout like mockup 1 (no visible PIT cards).
     # When show_pit is True:
         # Layout like mockup 2 (PIT cards on the left).
+    figs = session_figures(session.session_id)
 
     if not show_pit:
         return html.Div(
@@ -350,16 +487,19 @@ def home_layout(show_pit: bool = False):
                 "alignItems": "stretch",
             },
             children=[
+                # no highlight band by default when PIT is off
+                dcc.Store(id="highlight-mode-store", data=False),
+
                 # Hidden PIT so callbacks have targets
                 html.Div(
                     style={"display": "none"},
                     children=[
                         dcc.Graph(
                             id="synch-glyph",
-                            figure=FIG_SYNCH_GLYPH,
+                            figure=figs["synch_glyph"],
                         ),
-                        html.Div(id="dyad-leading-panel", children=FIG_LEADING_PANEL),
-                        html.Div(id="dyad-behavior-panel", children=FIG_BEHAVIOR_PANEL),
+                        html.Div(id="dyad-leading-panel", children=figs["leading_panel"]),
+                        html.Div(id="dyad-behavior-panel", children=figs["behavior_panel"]),
                     ],
                 ),
 
@@ -382,13 +522,13 @@ def home_layout(show_pit: bool = False):
 
                         dcc.Graph(
                             id="leading-behaviors",
-                            figure=FIG_SYNCH_BAR,
+                            figure=figs["synch_bar"],
                             style={"height": "260px", "marginTop": "4px"},
                             config={"displayModeBar": False},
                         ),
                         dcc.Graph(
                             id="synchrony-violin",
-                            figure=FIG_VIOLIN,
+                            figure=figs["violin"],
                             style={
                                 "height": "260px",
                                 "marginTop": "4px",
@@ -424,7 +564,7 @@ def home_layout(show_pit: bool = False):
                                 ),
                                 html.Div(
                                     id="summary-table",
-                                    children=TABLE_SUMMARY,
+                                    children=figs["summary_table"],
                                 ),
                             ],
                         ),
@@ -447,7 +587,7 @@ def home_layout(show_pit: bool = False):
                                 ),
                                 dcc.Graph(
                                     id="engagement-pie-chart",
-                                    figure=FIG_PIE,
+                                    figure=figs["pie"],
                                     style={"width": "100%", 
                                            "height": "100%"},
                                     config={"responsive": True, 
@@ -514,13 +654,7 @@ def home_layout(show_pit: bool = False):
                             children=[
                                 dcc.Graph(
                                     id="timeline-heatmap",
-                                    figure=(
-                                        make_stacked_heatmaps(minimal=False)
-                                        .update_xaxes(domain=[0.05, 1.0])
-                                        .update_layout(
-                                            margin=dict(l=90, r=20, t=0, b=0)
-                                        )
-                                    ),
+                                    figure=get_timeline_figure(session, "home"),
                                     style={
                                         "height": "220px",
                                         "margin": "0",
@@ -528,6 +662,7 @@ def home_layout(show_pit: bool = False):
                                     },
                                     config={"displayModeBar": False},
                                 ),
+                                *timeline_lod_stores("timeline-heatmap", session),
                             ],
                         ),
                     ],
@@ -550,6 +685,9 @@ def home_layout(show_pit: bool = False):
             "alignItems": "stretch",
         },
         children=[
+            # the PIT-on timeline starts with the band + cursor drawn
+            dcc.Store(id="highlight-mode-store", data=True),
+
             # PIT synch (top-left)
             html.Div(
                 style={**CARD_STYLE, "gridArea": "pit"},
@@ -603,7 +741,7 @@ def home_layout(show_pit: bool = False):
                                 },
                                 children=dcc.Graph(
                                     id="synch-glyph",  
-                                    figure=FIG_SYNCH_GLYPH,
+                                    figure=figs["synch_glyph"],
                                     style={
                                         "width": "100%",
                                         "minHeight" : "270px",
@@ -656,7 +794,7 @@ def home_layout(show_pit: bool = False):
                         children=[
                             html.Div(
                                 id="dyad-behavior-panel",
-                                children=FIG_BEHAVIOR_PANEL,
+                                children=figs["behavior_panel"],
                                 style={
                                     "width": "90%",
                                     "maxWidth": "220px",
@@ -665,7 +803,7 @@ def home_layout(show_pit: bool = False):
                             ),
                             html.Div(
                                 id="dyad-leading-panel",
-                                children=FIG_LEADING_PANEL,
+                                children=figs["leading_panel"],
                                 style={
                                     "width": "90%",
                                     "maxWidth": "220px",
@@ -695,13 +833,13 @@ def home_layout(show_pit: bool = False):
                     ),
                     dcc.Graph(
                         id="leading-behaviors",
-                        figure=FIG_SYNCH_BAR,
+                        figure=figs["synch_bar"],
                         style={"height": "260px", "marginTop": "4px"},
                         config={"displayModeBar": False},
                     ),
                     dcc.Graph(
                         id="synchrony-violin",
-                        figure=FIG_VIOLIN,
+                        figure=figs["violin"],
                         style={
                             "height": "260px",
                             "marginTop": "4px",
@@ -738,7 +876,7 @@ def home_layout(show_pit: bool = False):
                                 ),
                             html.Div(
                                 id="summary-table",
-                                children=TABLE_SUMMARY,
+                                children=figs["summary_table"],
                             ),
                         ],
                     ),
@@ -761,7 +899,7 @@ def home_layout(show_pit: bool = False):
                             ),
                             dcc.Graph(
                                 id="engagement-pie-chart",
-                                figure=FIG_PIE,
+                                figure=figs["pie"],
                                 style={
                                     "width": "100%",
                                     "height": "100%",
@@ -833,7 +971,7 @@ def home_layout(show_pit: bool = False):
                         children=[
                             dcc.Graph(
                                 id="timeline-heatmap",
-                                figure=make_timeline_fig_with_default_window(idx=0),
+                                figure=make_timeline_fig_with_default_window(session, idx=0),
                                 style={
                                     "height": "220px",
                                     "margin": "0",
@@ -841,6 +979,7 @@ def home_layout(show_pit: bool = False):
                                 },
                                 config={"displayModeBar": False},
                             ),
+                            *timeline_lod_stores("timeline-heatmap", session),
                         ],
                     ),
                 ],
@@ -849,7 +988,9 @@ def home_layout(show_pit: bool = False):
     )
 
 # method for the play tab
-def play_layout():
+def play_layout(dyad_id, session):
+    figs = session_figures(session.session_id)
+    frames = session_playback_frames(session.session_id)
     return html.Div(
         style={
             "display": "grid",
@@ -871,7 +1012,7 @@ def play_layout():
                 children=[
                     chart_header(
                             title="Point-in-Time Physiologic Synchrony",
-                            index="pit-synch",
+                            index="pit-synch-play",
                             body=(
                                 "The dual radial bar charts depict the magnitude of low frequency synchrony and high ",
                                 "frequency synchrony at each second in the video. The time at which the data is displayed is updated by navigating or playing the video.  ",
@@ -891,7 +1032,7 @@ def play_layout():
                             # gradient legend
                             html.Div(
                                 children=dcc.Graph(
-                                    id="pit-synch-legend",
+                                    id="pit-synch-legend-play",
                                     figure=make_synchrony_gradient_legend(),
                                     config={"displayModeBar": False, "staticPlot": True},
                                     style={
@@ -916,7 +1057,7 @@ def play_layout():
                                 },
                                 children=dcc.Graph(
                                     id="synch-glyph-play",
-                                    figure=FIG_SYNCH_GLYPH,
+                                    figure=figs["synch_glyph"],
                                     style={
                                         "width": "100%",
                                         "minHeight" : "270px",
@@ -943,7 +1084,7 @@ def play_layout():
                 children=[
                     chart_header(
                             title="Parent-Child Interactions",
-                            index="pit-interactions",
+                            index="pit-interactions-play",
                             body=(
                                 "This card displays the behavioral data collected from the recording session,"
                                 " including the parent-child engagement and who is leading the synchrony (parent or child).",
@@ -1019,6 +1160,11 @@ def play_layout():
                 ],
             ),
 
+            # cursor bookkeeping for the clientside playback callback
+            dcc.Store(id="play-cursor-origin", data=session_start_ms(session)),
+            dcc.Store(id="play-cursor-sec", data=None),
+            dcc.Store(id="playback-frames", data=playback_frames_store(frames)),
+
             # Main Play area 
             html.Div(
                 style={**CARD_STYLE, "gridArea": "playmain", "padding": "8px"},
@@ -1044,7 +1190,7 @@ def play_layout():
                                 style={"flex": "0 0 auto"},
                                 children=DashPlayer(
                                     id="video-player",
-                                    url=VIDEO,
+                                    url=REGISTRY.dyad(dyad_id).video,
                                     controls=True,
                                     playing=False,
                                     width="100%",
@@ -1058,16 +1204,19 @@ def play_layout():
                                     "borderRadius": "0",
                                     "overflow": "hidden",
                                 },
-                                children=dcc.Graph(
-                                    id="play-heatmap-stack",
-                                    figure=BASE_PLAY_HEATMAP,
-                                    style={
-                                        "height": "100%",
-                                        "width": "100%",
-                                        "margin": "0",
-                                    },
-                                    config={"displayModeBar": False},
-                                ),
+                                children=[
+                                    dcc.Graph(
+                                        id="play-heatmap-stack",
+                                        figure=play_heatmap_figure(session),
+                                        style={
+                                            "height": "100%",
+                                            "width": "100%",
+                                            "margin": "0",
+                                        },
+                                        config={"displayModeBar": False},
+                                    ),
+                                    *timeline_lod_stores("play-heatmap-stack", session),
+                                ],
                             ),
                         ],
                     ),
@@ -1076,163 +1225,416 @@ def play_layout():
         ],
     )
 
-# Prebuild layouts once
-HOME_LAYOUT = home_layout()
-PLAY_LAYOUT = play_layout()
-
-# Main app layout
-app.layout = html.Div(
-    style={
-        "minHeight": "100vh",       
-        "padding": "16px",
-        "backgroundColor": "#f5f5f5",
-        "fontFamily": "Lato, sans-serif",
-        "boxSizing": "border-box",
-        "overflowY": "auto",       
-    },
-    children=[
-        dcc.Store(id="leader-filter-store", data=None),
-        dcc.Store(id="time-window-store", data=None),
-        dcc.Store(id="highlight-mode-store", data=False),
-        # Nav bar
-        html.Div(
-            style={
-                "display": "flex",
-                "alignItems": "center",
-                "justifyContent": "space-between",
-                "marginBottom": "12px",
-                "gap": "12px",
-                "flexWrap": "wrap",  
-            },
-            children=[
-                # Top left controls (tabs + chips)
-                html.Div(
-                    style={
-                        "display": "flex",
-                        "alignItems": "center",
-                        "gap": "8px",
-                        "flexWrap": "wrap",
-                    },
-                    children=[
-                        # home tab button
-                        html.Div(
-                            id="tab-home",
-                            style={
-                                **TAB_BASE_STYLE,
-                                "backgroundColor": "#333",   # active by default
-                                "color": "#ffffff",          
-                            },
-                            children=[
-                                html.Img(
-                                    id="tab-home-icon",
-                                    src="/assets/home-highlight.svg",
-                                    style={**ICON_BASE_STYLE},
-                                    alt="Home",
-                                ),
-                                html.Span(
-                                    "Home Summary",
-                                    id="tab-home-label",
-                                    style={
-                                        "fontSize": "16px",
-                                        "fontWeight": "500",
-                                        "whiteSpace": "nowrap",
-                                    },
-                                ),
-                            ],
+
+def cohort_layout():
+    total = COHORT.refresh(REGISTRY)
+    pending = COHORT.pending()
+    if int(total["n_dyads"]) == 0:
+        if pending:
+            return html.Div(f"Summarizing {len(pending)} dyads, open the Cohort tab again in a moment.")
+        return html.Div(f"No dyad workbooks found in {REGISTRY.data_dir}/")
+    figs = make_cohort_tables(total)
+
+    # dyads without a precomputed sketch are summarized in the background
+    # (cohort_sketch.Cohort.refresh) rather than loaded in this request
+    labels = [f"Dyad {REGISTRY.dyad(d).label}" for d in pending if d in REGISTRY.dyads()]
+    pending_note = html.Div(
+        f"Not included yet (still being summarized): {', '.join(labels)}. "
+        "Open the Cohort tab again to include them, or run precompute.py.",
+        style={"fontSize": "13px", "color": "gray", "fontFamily": "Lato, sans-serif"},
+    ) if labels else None
+
+    return html.Div(
+        style={
+            "display": "grid",
+            "gridTemplateColumns": "1.2fr 1fr",
+            "gap": "16px",
+            "alignItems": "stretch",
+        },
+        children=[
+            html.Div(
+                style={**CARD_STYLE, "gridColumn": "1 / span 2"},
+                children=[
+                    chart_header(
+                        title="Cohort Summary",
+                        index="cohort-summary",
+                        body=(
+                            "Totals across every dyad in the data folder. Each dyad contributes a small summary "
+                            "(counts, sums and histograms) that is combined with the others, so adding a dyad only "
+                            "adds its own summary. Quartiles in the synchrony distributions are read from 1% bins."
                         ),
+                    ),
+                    make_cohort_overview(total),
+                    pending_note,
+                    figs["summary_table"],
+                ],
+            ),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    dcc.Graph(
+                        id="cohort-synch-bar",
+                        figure=figs["synch_bar"],
+                        style={"height": "260px"},
+                        config={"displayModeBar": False},
+                    ),
+                    dcc.Graph(
+                        id="cohort-violin",
+                        figure=figs["violin"],
+                        style={"height": "260px"},
+                        config={"displayModeBar": False},
+                    ),
+                ],
+            ),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    chart_header(
+                        title="Percent of Time in Joint Engagement",
+                        index="cohort-pie",
+                        body="Engagement states over all samples of all dyads.",
+                    ),
+                    dcc.Graph(
+                        id="cohort-pie",
+                        figure=figs["pie"],
+                        style={"height": "480px"},
+                        config={"displayModeBar": False},
+                    ),
+                ],
+            ),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    chart_header(
+                        title="Event Durations",
+                        index="cohort-durations",
+                        body="How long synchronous moments and joint engagement episodes last, across all dyads.",
+                    ),
+                    dcc.Graph(
+                        id="cohort-durations",
+                        figure=make_duration_histogram(total),
+                        style={"height": "340px"},
+                        config={"displayModeBar": False},
+                    ),
+                ],
+            ),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    chart_header(
+                        title="Differences Between Dyads",
+                        index="cohort-dyads",
+                        body="One point per dyad: time in joint engagement and how often each kind of event occurs.",
+                    ),
+                    dcc.Graph(
+                        id="cohort-dyads",
+                        figure=make_dyad_distributions(COHORT.per_dyad()),
+                        style={"height": "340px"},
+                        config={"displayModeBar": False},
+                    ),
+                ],
+            ),
+        ],
+    )
 
-                        # play tab button
-                        html.Div(
-                            id="tab-play",
-                            style={
-                                **TAB_BASE_STYLE,
-                                "backgroundColor": "white",
-                                "color": "#333333",         
-                            },
-                            children=[
-                                html.Img(
-                                    id="tab-play-icon",
-                                    src="/assets/play.svg",
-                                    style={**ICON_BASE_STYLE},
-                                    alt="Play",
-                                ),
-                                html.Span(
-                                    "Play Video",
-                                    id="tab-play-label",
-                                    style={
-                                        "fontSize": "16px",
-                                        "fontWeight": "500",
-                                        "whiteSpace": "nowrap",
-                                    },
-                                ),
-                            ],
+
+def metrics_layout():
+    if not CALLBACK_METRICS:
+        return html.Div("Callback metrics are off (start the app with CALLBACK_METRICS=1).")
+
+    return html.Div(
+        style={"display": "flex", "flexDirection": "column", "gap": "16px"},
+        children=[
+            dcc.Interval(id="metrics-interval", interval=METRICS_REFRESH_MS),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    chart_header(
+                        title="Callback Metrics",
+                        index="metrics-table",
+                        body=(
+                            "Server time per callback (from request to serialized response), response and request sizes "
+                            "(State inputs separately), and calls per second over the last minute. Percentiles cover the "
+                            f"most recent calls of each callback. The raw numbers are at {METRICS_PATH}."
                         ),
+                    ),
+                    html.Div(id="metrics-table", children=make_metrics_table(METRICS.snapshot())),
+                ],
+            ),
+            html.Div(
+                style={**CARD_STYLE},
+                children=[
+                    dcc.Graph(
+                        id="metrics-latency",
+                        figure=make_latency_histogram(METRICS.snapshot()),
+                        config={"displayModeBar": False},
+                    ),
+                ],
+            ),
+        ],
+    )
 
-                        # PIT checkbox chip
-                        html.Div(
-                            id="pit-chip-container",
-                            style={
-                                "display": "flex",
-                                "alignItems": "center",
-                            },
-                            children=dcc.Checklist(
-                                id="pit-toggle",
-                                options=[{"label": "Point-in-time views", "value": "pit"}],
-                                value=[],  # default OFF
+
+@lru_cache(maxsize=PAGE_CACHE_SIZE)
+def page_tree(page, dyad_id, show_pit, session_id):
+    # The page's component tree, serialized once: Dash sends plain dicts as
+    # they are, so a hit skips building the components and re-encoding the
+    # figures embedded in them (~100 ms). The page is built from exactly the
+    # session named by session_id (the one the caller resolved), never from a
+    # second lookup of the dyad that a reload could have swapped in between.
+    session = session_by_id(session_id)
+    layout = play_layout(dyad_id, session) if page == "play" else home_layout(session, show_pit=show_pit)
+    return json.loads(pio.json.to_json_plotly(layout))
+
+
+def page_key(page, session, show_pit):
+    # what a kept page was built from, as remembered in the mounted-pages store
+    return [session.session_id, show_pit] if page == "home" else [session.session_id]
+
+
+# Main app layout, built per page load: importing the app reads no dyad
+# data, and the picker lists whatever is in the data directory right now
+def serve_layout():
+    dyad_id = REGISTRY.default_dyad_id()
+    session = get_session(dyad_id) if dyad_id else None
+    return html.Div(
+        style={
+            "minHeight": "100vh",       
+            "padding": "16px",
+            "backgroundColor": "#f5f5f5",
+            "fontFamily": "Lato, sans-serif",
+            "boxSizing": "border-box",
+            "overflowY": "auto",       
+        },
+        children=[
+            dcc.Store(id="leader-filter-store", data=None),
+            dcc.Store(id="time-window-store", data=None),
+            dcc.Store(id="active-tab", data="home"),
+            # page -> page_key of the kept pages this browser has mounted
+            dcc.Store(
+                id="mounted-pages",
+                data={"home": page_key("home", session, False)} if session else {},
+            ),
+            # Nav bar
+            html.Div(
+                style={
+                    "display": "flex",
+                    "alignItems": "center",
+                    "justifyContent": "space-between",
+                    "marginBottom": "12px",
+                    "gap": "12px",
+                    "flexWrap": "wrap",  
+                },
+                children=[
+                    # Top left controls (tabs + chips)
+                    html.Div(
+                        style={
+                            "display": "flex",
+                            "alignItems": "center",
+                            "gap": "8px",
+                            "flexWrap": "wrap",
+                        },
+                        children=[
+                            # home tab button
+                            html.Div(
+                                id="tab-home",
                                 style={
-                                    "display": "flex",
-                                    "alignItems": "center",
+                                    **TAB_BASE_STYLE,
+                                    "backgroundColor": "#333",   # active by default
+                                    "color": "#ffffff",          
+                                },
+                                children=[
+                                    html.Img(
+                                        id="tab-home-icon",
+                                        src="/assets/home-highlight.svg",
+                                        style={**ICON_BASE_STYLE},
+                                        alt="Home",
+                                    ),
+                                    html.Span(
+                                        "Home Summary",
+                                        id="tab-home-label",
+                                        style={
+                                            "fontSize": "16px",
+                                            "fontWeight": "500",
+                                            "whiteSpace": "nowrap",
+                                        },
+                                    ),
+                                ],
+                            ),
+
+                            # play tab button
+                            html.Div(
+                                id="tab-play",
+                                style={
+                                    **TAB_BASE_STYLE,
+                                    "backgroundColor": "white",
+                                    "color": "#333333",         
                                 },
-                                inputStyle={"marginRight": "6px",
-                                            "alignSelf": "center"},
-                                labelStyle={
-                                    "display": "flex",     
+                                children=[
+                                    html.Img(
+                                        id="tab-play-icon",
+                                        src="/assets/play.svg",
+                                        style={**ICON_BASE_STYLE},
+                                        alt="Play",
+                                    ),
+                                    html.Span(
+                                        "Play Video",
+                                        id="tab-play-label",
+                                        style={
+                                            "fontSize": "16px",
+                                            "fontWeight": "500",
+                                            "whiteSpace": "nowrap",
+                                        },
+                                    ),
+                                ],
+                            ),
+
+                            # cohort tab button
+                            html.Div(
+                                id="tab-cohort",
+                                style={
+                                    **TAB_BASE_STYLE,
+                                    "backgroundColor": "white",
+                                    "color": "#333333",
+                                },
+                                children=[
+                                    html.Span(
+                                        "Cohort",
+                                        id="tab-cohort-label",
+                                        style={
+                                            "fontSize": "16px",
+                                            "fontWeight": "500",
+                                            "whiteSpace": "nowrap",
+                                        },
+                                    ),
+                                ],
+                            ),
+
+                            # metrics tab button (only shown with CALLBACK_METRICS)
+                            html.Div(
+                                id="tab-metrics",
+                                style={
+                                    **TAB_BASE_STYLE,
+                                    "backgroundColor": "white",
+                                    "color": "#333333",
+                                    **({} if CALLBACK_METRICS else {"display": "none"}),
+                                },
+                                children=[
+                                    html.Span(
+                                        "Metrics",
+                                        id="tab-metrics-label",
+                                        style={
+                                            "fontSize": "16px",
+                                            "fontWeight": "500",
+                                            "whiteSpace": "nowrap",
+                                        },
+                                    ),
+                                ],
+                            ),
+
+                            # PIT checkbox chip
+                            html.Div(
+                                id="pit-chip-container",
+                                style={
+                                    "display": "flex",
                                     "alignItems": "center",
-                                    "padding": "6px 10px",
-                                    "border": "1px solid #ccc",
-                                    "borderRadius": "16px",
-                                    "fontSize": "14px",
-                                    "cursor": "pointer",
                                 },
+                                children=dcc.Checklist(
+                                    id="pit-toggle",
+                                    options=[{"label": "Point-in-time views", "value": "pit"}],
+                                    value=[],  # default OFF
+                                    style={
+                                        "display": "flex",
+                                        "alignItems": "center",
+                                    },
+                                    inputStyle={"marginRight": "6px",
+                                                "alignSelf": "center"},
+                                    labelStyle={
+                                        "display": "flex",     
+                                        "alignItems": "center",
+                                        "padding": "6px 10px",
+                                        "border": "1px solid #ccc",
+                                        "borderRadius": "16px",
+                                        "fontSize": "14px",
+                                        "cursor": "pointer",
+                                    },
+                                ),
                             ),
-                        ),
 
-                    ],
-                ),
-                # Right aligned file name
-                html.Div(
-                    "Dyad T123",
-                    style={
-                        "fontWeight": "bold",
-                        "fontSize": "14px",
-                        "marginRight": "4px",
-                        "flexShrink": 0,
-                    },
-                ),
-            ],
-        ),
+                        ],
+                    ),
+                    # Right aligned dyad picker
+                    dcc.Dropdown(
+                        id="dyad-picker",
+                        options=REGISTRY.options(),
+                        value=dyad_id,
+                        clearable=False,
+                        style={
+                            "fontWeight": "bold",
+                            "fontSize": "14px",
+                            "marginRight": "4px",
+                            "minWidth": "160px",
+                            "flexShrink": 0,
+                        },
+                    ),
+                ],
+            ),
 
-        html.Div(
-            id="page-content",
-            children=home_layout(show_pit=False),   # default view is Home
-        ),
-    ],
-)
+            html.Div(
+                id="page-content",
+                children=[
+                    # default view is Home
+                    html.Div(
+                        id="page-home",
+                        children=page_tree("home", dyad_id, False, session.session_id) if session else html.Div(
+                            f"No dyad workbooks found in {REGISTRY.data_dir}/"
+                        ),
+                    ),
+                    html.Div(id="page-play", style=HIDDEN_PAGE_STYLE),
+                    # Cohort / Metrics: rebuilt on every visit, emptied on leaving
+                    html.Div(id="page-other"),
+                ],
+            ),
+        ],
+    )
+
+app.layout = serve_layout
 
 @app.callback(
-    Output("page-content", "children"),
+    Output("page-home", "children"),
+    Output("page-home", "style"),
+    Output("page-play", "children"),
+    Output("page-play", "style"),
+    Output("page-other", "children"),
     Output("tab-home", "style"),
     Output("tab-play", "style"),
+    Output("tab-cohort", "style"),
+    Output("tab-metrics", "style"),
     Output("tab-home-icon", "src"),
     Output("tab-play-icon", "src"),
-    Output("pit-chip-container", "style"),  
+    Output("pit-chip-container", "style"),
+    Output("active-tab", "data"),
+    Output("mounted-pages", "data"),
     Input("tab-home", "n_clicks"),
     Input("tab-play", "n_clicks"),
+    Input("tab-cohort", "n_clicks"),
+    Input("tab-metrics", "n_clicks"),
     Input("pit-toggle", "value"),
+    Input("dyad-picker", "value"),
+    State("active-tab", "data"),
+    State("mounted-pages", "data"),
 )
-def switch_tab(home_clicks, play_clicks, pit_value):
-    home_clicks = home_clicks or 0
-    play_clicks = play_clicks or 0
+def switch_tab(home_clicks, play_clicks, cohort_clicks, metrics_clicks, pit_value, dyad_id, active_tab, mounted_pages):
+    if not dyad_id:
+        raise PreventUpdate
+
+    # the clicked tab, else stay on the current one (PIT / dyad changes)
+    tab = {
+        "tab-home": "home",
+        "tab-play": "play",
+        "tab-cohort": "cohort",
+        "tab-metrics": "metrics",
+    }.get(callback_context.triggered_id, active_tab or "home")
 
     show_pit = "pit" in (pit_value or [])
 
@@ -1245,36 +1647,64 @@ def switch_tab(home_clicks, play_clicks, pit_value):
         "color": "#333333",     
     }
 
+    def tab_style(name):
+        return {**TAB_BASE_STYLE, **(active_tab_extra if tab == name else inactive_tab_extra)}
+
     pit_style = {
         "display": "flex",
         "alignItems": "center",
     }
-    if play_clicks > home_clicks:
-        # play active
-        home_style = {**TAB_BASE_STYLE, **inactive_tab_extra}
-        play_style = {**TAB_BASE_STYLE, **active_tab_extra}
-        home_icon_src = "/assets/home.svg"
-        play_icon_src = "/assets/play-highlight.svg"
-        content = play_layout()
-
-        # hide PIT chip on Play page
-        pit_style = {**pit_style, "display": "none"}
+    home_icon_src = "/assets/home-highlight.svg" if tab == "home" else "/assets/home.svg"
+    play_icon_src = "/assets/play-highlight.svg" if tab == "play" else "/assets/play.svg"
+
+    # Home / Play: send the page only if this browser doesn't already hold it
+    # for the current session (and PIT setting); hidden pages of another
+    # session are emptied
+    session = get_session(dyad_id)
+    mounted = dict(mounted_pages or {})
+    kept = {}
+    for page in KEPT_PAGES:
+        key = page_key(page, session, show_pit)
+        children = no_update
+        if page == tab and mounted.get(page) != key:
+            children = page_tree(page, dyad_id, show_pit, session.session_id)
+            mounted[page] = key
+        elif page != tab and page in mounted and mounted[page][0] != session.session_id:
+            children = None
+            del mounted[page]
+        kept[page] = (children, {} if page == tab else HIDDEN_PAGE_STYLE)
+
+    # Cohort / Metrics: built when opened (or re-clicked), emptied on leaving
+    # so the Metrics page stops polling
+    if tab in ("cohort", "metrics"):
+        refresh = active_tab != tab or callback_context.triggered_id == f"tab-{tab}"
+        other = (cohort_layout() if tab == "cohort" else metrics_layout()) if refresh else no_update
     else:
-        # home active (default)
-        home_style = {**TAB_BASE_STYLE, **active_tab_extra}
-        play_style = {**TAB_BASE_STYLE, **inactive_tab_extra}
-        home_icon_src = "/assets/home-highlight.svg"
-        play_icon_src = "/assets/play.svg"
-        content = home_layout(show_pit=show_pit)
-        # pit_style stays visible on Home
+        other = None if active_tab in ("cohort", "metrics") else no_update
 
-    return content, home_style, play_style, home_icon_src, play_icon_src, pit_style
+    if tab != "home":
+        # PIT views are per dyad and only on Home
+        pit_style = {**pit_style, "display": "none"}
 
-@app.callback(
-    Output("play-heatmap-stack", "figure"),
-    Input("video-player", "currentTime"),
-)
-def update_heatmaps_cursor(current_time):
+    return (
+        *kept["home"],
+        *kept["play"],
+        other,
+        tab_style("home"),
+        tab_style("play"),
+        tab_style("cohort"),
+        {**tab_style("metrics"), **({} if CALLBACK_METRICS else {"display": "none"})},
+        home_icon_src,
+        play_icon_src,
+        pit_style,
+        tab,
+        mounted,
+    )
+
+def update_heatmaps_cursor(current_time, last_sec, origin_ms):
+    # Server-side fallback for the Play cursor. The last drawn second comes
+    # from this browser's own play-cursor-sec store, so viewers (and workers)
+    # never suppress or trigger each other's updates.
     if current_time is None:
         raise PreventUpdate
 
@@ -1282,35 +1712,44 @@ def update_heatmaps_cursor(current_time):
     rounded_sec = int(round(current_time))
 
     # only update when the second actually changes
-    last_sec = getattr(update_heatmaps_cursor, "last_sec", None)
     if rounded_sec == last_sec:
         # skip doing any work
         raise PreventUpdate
 
-    # remember this second for next time
-    update_heatmaps_cursor.last_sec = rounded_sec
-
     # map rounded_sec to absolute timestamp
-    cursor_time = VIDEO_START + pd.to_timedelta(rounded_sec, unit="s")
-
-    # start from base figure and add cursor line
-    fig = go.Figure(BASE_PLAY_HEATMAP)
-    fig.update_layout(
-        shapes=[
-            dict(
-                type="line",
-                x0=cursor_time,
-                x1=cursor_time,
-                y0=0,
-                y1=1,
-                xref="x",
-                yref="paper",
-                line=dict(color="black", width=3),
-            )
-        ]
+    cursor_time = (pd.Timestamp(origin_ms, unit="ms") + pd.to_timedelta(rounded_sec, unit="s")).isoformat()
+
+    # move the cursor line (shapes[0]) of the rendered figure
+    fig = Patch()
+    fig["layout"]["shapes"][0]["x0"] = cursor_time
+    fig["layout"]["shapes"][0]["x1"] = cursor_time
+
+    # remember this second for next time (per client)
+    return fig, rounded_sec
+
+if CLIENTSIDE_PLAYBACK:
+    # moves shapes[0] with Plotly.relayout in the browser; the store output only
+    # remembers the last whole second so repeated ticks are skipped
+    app.clientside_callback(
+        ClientsideFunction(namespace="playback", function_name="move_cursor"),
+        Output("play-cursor-sec", "data"),
+        Input("video-player", "currentTime"),
+        State("play-cursor-origin", "data"),
     )
-
-    return fig
+else:
+    app.callback(
+        Output("play-heatmap-stack", "figure"),
+        Output("play-cursor-sec", "data"),
+        Input("video-player", "currentTime"),
+        State("play-cursor-sec", "data"),
+        State("play-cursor-origin", "data"),
+    )(update_heatmaps_cursor)
+
+app.clientside_callback(
+    ClientsideFunction(namespace="playback", function_name="pause_hidden"),
+    Output("video-player", "playing"),
+    Input("active-tab", "data"),
+)
 
 @app.callback(
     Output("leading-behaviors", "figure"),
@@ -1320,13 +1759,9 @@ def update_heatmaps_cursor(current_time):
     Input("leading-behaviors", "selectedData"),
     Input("time-window-store", "data"),
     State("leader-filter-store", "data"),
+    State("dyad-picker", "value"),
 )
-def filter_by_leader(selected_data, time_window, current_filter): 
-    base_df = df.copy()
-
-    full_bar_fig = make_synch_bar(base_df.copy())
-    full_bar_fig.update_layout(clickmode="event+select")
-
+def filter_by_leader(selected_data, time_window, current_filter, dyad_id): 
     new_filter = None
 
     # leader selection from bar chart
@@ -1339,31 +1774,47 @@ def filter_by_leader(selected_data, time_window, current_filter):
             new_filter = "Parent"
     # else stays none
 
-    filtered_df = base_df
-
-    # leader filter
-    if new_filter in ["Child", "Parent"]:
-        code = "C" if new_filter == "Child" else "P"
-        lead_col_norm = filtered_df[LEAD_COL].astype(str).str.strip()
-        filtered_df = filtered_df[lead_col_norm.str.startswith(code)]
-
-    # time-window filter
-    if time_window and isinstance(time_window, dict):
+    # time-window filter -> sample range [i0, i1); a window picked on
+    # another dyad's timeline doesn't apply
+    session = get_session(dyad_id)
+    i0, i1 = 0, session.n
+    if time_window and isinstance(time_window, dict) and time_window.get("dyad") == dyad_id:
         start = time_window.get("start")
         end = time_window.get("end")
         if start and end:
-            start_ts = pd.to_datetime(start)
-            end_ts = pd.to_datetime(end)
-            ts_series = pd.to_datetime(filtered_df[TS_COL])
-            mask = (ts_series >= start_ts) & (ts_series <= end_ts)
-            filtered_df = filtered_df[mask]
+            i0, i1 = window_rows(session, start, end)
 
-    filtered_df = filtered_df.reset_index(drop=True)
+    leading_fig, violin_fig, pie_fig = filtered_summary_figures(
+        session.session_id, new_filter, i0, i1
+    )
+
+    return leading_fig, violin_fig, pie_fig, new_filter
+
+def window_rows(session, start, end):
+    # [start, end] (inclusive) -> sample index range, with the edges snapped
+    # outwards to a quantum that grows with the window (5 s for the 60 s
+    # highlight) so nearby hovers share one cache entry and the snapped
+    # window still contains the requested one
+    start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+    quantum = max(WINDOW_QUANTUM_S, int((end_ts - start_ts).total_seconds() / WINDOW_QUANTUM_STEPS))
+    # (end: the next grid point strictly after it, so a fixed-length window
+    # moves both edges at the same hover)
+    start_ts = start_ts.floor(f"{quantum}s")
+    end_ts = end_ts.floor(f"{quantum}s") + pd.Timedelta(seconds=quantum)
+    return session.window_index.rows(start_ts, end_ts)
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def leader_bar_figure(session_id, leader_filter):
+    # the leader bar depends only on the filter (it always counts the whole
+    # session's events), so it is cached apart from the windowed figures.
+    # Shared dict, don't modify it.
+    session = session_by_id(session_id)
+    leading_fig = make_synch_bar(session, events=session_events(session_id))
+    leading_fig.update_layout(clickmode="event+select")
 
     # style the bar chart to show which leader is active
-    leading_fig = full_bar_fig
-    if new_filter in ["Child", "Parent"]:
-        selected = new_filter
+    if leader_filter in ["Child", "Parent"]:
+        selected = leader_filter
         for trace in leading_fig.data:
             if getattr(trace, "name", None) == selected:
                 trace.update(marker=dict(opacity=1.0))
@@ -1376,142 +1827,102 @@ def filter_by_leader(selected_data, time_window, current_filter):
         for trace in leading_fig.data:
             trace.update(marker=dict(opacity=1.0))
         leading_fig.update_layout(title="Synchronous Moments Led by Each Participant")
-
-    # violin + pie on filtered_df 
-    violin_fig = make_violin(filtered_df.copy())
-    pie_fig = make_pie(filtered_df.copy())
-
-    return leading_fig, violin_fig, pie_fig, new_filter
-
-@app.callback(
-    Output("synch-glyph-play", "figure"),
-    Input("video-player", "currentTime"),
-)
-def update_glyph_from_video(current_time):
+    return leading_fig.to_dict()
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def filtered_summary_figures(session_id, leader_filter, i0, i1):
+    # (bar, violin, pie) for one leader filter + window; repeated hovers over
+    # the same region are served from the cache. The figure dicts returned are
+    # the cached objects themselves, shared by every caller: return them as
+    # outputs but don't modify them (copy first). Keyed by session id rather
+    # than the session itself, so the cache never keeps an evicted session
+    # alive.
+    session = session_by_id(session_id)
+
+    # pie and (for large windows) violins straight from the block prefix sums
+    # of session.window_index, so the cost doesn't grow with the window
+    stats = session.window_index.stats(i0, i1, leader=leader_filter)
+    pie_fig = make_pie_from_counts(stats["engagement_counts"])
+    if stats["n"] > VIOLIN_MAX_POINTS:
+        # extremes to within one 1% bin, like the quartiles
+        hist = stats["hist"]
+        mins = [HIST_EDGES[np.flatnonzero(h)[0]] for h in hist]
+        maxs = [HIST_EDGES[np.flatnonzero(h)[-1] + 1] for h in hist]
+        violin_fig = make_violin_from_histograms(
+            hist, HIST_EDGES, [stats["lf_mean"], stats["hf_mean"]], mins, maxs
+        )
+    else:
+        # few enough samples to draw every point: take the window's slice
+        # (rows are time-sorted) and the leader's rows in it
+        filtered = session.subset(slice(i0, i1))
+        if leader_filter in ["Child", "Parent"]:
+            code = LEAD_CHILD if leader_filter == "Child" else LEAD_PARENT
+            filtered = filtered.subset(filtered.leading_num == code)
+        violin_fig = make_violin(filtered)
+
+    return leader_bar_figure(session_id, leader_filter), pack_figure(violin_fig), pie_fig.to_dict()
+
+def update_glyph_from_video(current_time, dyad_id):
+    # Server-side fallback for the Play glyph; answered from the precomputed
+    # frame table (same lookup + interpolation as assets/playback.js)
     if current_time is None:
         current_time = 0.0
 
-    # Map video time (seconds) to absolute timestamp
-    cursor_time = VIDEO_START + pd.to_timedelta(current_time, unit="s")
-
-    # Find the two nearest rows in df around that time
-    pos = TS_SERIES.searchsorted(cursor_time)
-
-    # the last point before the cursor (t0)
-    # the next point after the cursor (t1)
-    if pos <= 0: 
-        i0 = i1 = 0
-    elif pos >= len(TS_SERIES): 
-        i0 = i1 = len(TS_SERIES) - 1
-    else:   # we're in range
-        i0 = pos - 1
-        i1 = pos
-
-    # get time intervals
-    t0 = TS_SERIES.iloc[i0]
-    t1 = TS_SERIES.iloc[i1]
-
-    # get LF/HF values at the ends
-    lf0 = float(df.loc[i0, LF_COL])
-    lf1 = float(df.loc[i1, LF_COL])
-    hf0 = float(df.loc[i0, HF_COL])
-    hf1 = float(df.loc[i1, HF_COL])
-
-    # Compute how far between t0 and t1 we are (from 0 to 1) using linear interpolation
-    if t0 == t1:
-        alpha = 0.0
-    else:
-        alpha = (cursor_time - t0) / (t1 - t0)
-
-    # Sticky transitioning: hold value most of the time, move quickly in the middle
-    if alpha <= 0.3:
-        alpha = 0.0            # stick at previous second's value
-    elif alpha >= 0.7:
-        alpha = 1.0            # stick at next second's value
-    else:
-        # rescale from 0.3 to 0.7 instead of 0 to 1
-        alpha = (alpha - 0.3) / (0.7 - 0.3)
-
-    # get weighted average between:
-        # lf0, hf0 (coherence at t0)
-        # lf1, hf1 (coherence at t1)
-        # alpha
-    lf = (1.0 - alpha) * lf0 + alpha * lf1
-    hf = (1.0 - alpha) * hf0 + alpha * hf1
-
-    # get segment values/colors for this instant
-    lf_vals, lf_cols = half_donut_segments(lf)
-    hf_vals, hf_cols = half_donut_segments(hf)
-
-    # start from the original glyph
-    fig = go.Figure(FIG_SYNCH_GLYPH)
+    session = get_session(dyad_id)
+    lf_count, hf_count = glyph_counts_at(session_playback_frames(session.session_id), current_time)
 
     # traces:
     # 0 = left background
     # 1 = right background
     # 2 = LF gradient arc
     # 3 = HF gradient arc
-    fig.data[2].values = lf_vals
-    fig.data[2].marker.colors = lf_cols
-
-    fig.data[3].values = hf_vals
-    fig.data[3].marker.colors = hf_cols
-
-    fig.update_layout(
-        transition=dict(
-            duration=80,        
-            easing="cubic-in-out",
-        )
-    )
+    fig = Patch()
+    fig["data"][2]["marker"]["colors"] = segments_for_count(lf_count)[1]
+    fig["data"][3]["marker"]["colors"] = segments_for_count(hf_count)[1]
+    fig["layout"]["transition"] = dict(duration=80, easing="cubic-in-out")
 
     return fig
 
-@app.callback(
-    Output("behavior-play-img", "src"),
-    Output("behavior-play-img", "title"),
-    Output("leader-play-img", "src"),
-    Input("video-player", "currentTime"),
-)
-def update_dyad_from_video(current_time):
+def update_dyad_from_video(current_time, dyad_id):
+    # Server-side fallback for the Play behavior / leader cards
     if current_time is None:
         current_time = 0.0
 
-    idx = int(current_time)
-
-    if idx < 0:
-        idx = 0
-    elif idx >= len(df):
-        idx = len(df) - 1
-
-    row = df.iloc[idx]
-
-    # cje / sje are 1 when that engagement type is present, otherwise null
-    cje_val = row.get("cje", 0)
-    sje_val = row.get("sje", 0)
+    session = get_session(dyad_id)
+    frames = session_playback_frames(session.session_id)
+    idx = frame_index_at(frames, current_time)
+    if idx is None:
+        raise PreventUpdate
 
-    cje_val = int(cje_val) if pd.notna(cje_val) else 0
-    sje_val = int(sje_val) if pd.notna(sje_val) else 0
+    behavior = frames["behavior"][idx]
+    leader = frames["leader"][idx]
 
-    if cje_val == 1:
-        behav_src = "/assets/behav_CJE.png"
-        behav_title = "Coordinated Joint Engagement (CJE) is a more advanced stage where the child actively participates by sharing attention with the caregiver and the object often shown by altering their gaze back and forth."
-    elif sje_val == 1:
-        behav_src = "/assets/behav_SJE.png"
-        behav_title = "Supported Joint Engagement (SJE) is a state where a child and a caregiver are both actively involved with the same object or event, but the child is not yet actively acknowledging or responding to the caregiver's participation."
-    else:
-        behav_src = "/assets/behav_NoJE.png"
-        behav_title = "No Joint Engagement is the absence of shared focus, where a child is either focused solely on an object (object engagement) or solely on a person (person engagement), or is otherwise uninvolved."
+    return BEHAVIOR_IMAGES[behavior], BEHAVIOR_TITLES[behavior], LEADER_IMAGES[leader]
 
-    lead_val = row.get(LEAD_COL, "")
-    lead_str = str(lead_val).strip().upper()
-
-    # If leading == "C", child; otherwise parent
-    if lead_str.startswith("C"):
-        leader_src = "/assets/lead_child.png"
-    else:
-        leader_src = "/assets/lead_parent.png"
-
-    return behav_src, behav_title, leader_src
+if CLIENTSIDE_PLAYBACK:
+    # glyph is restyled in place; the images only change when the code does
+    app.clientside_callback(
+        ClientsideFunction(namespace="playback", function_name="update_pit"),
+        Output("behavior-play-img", "src"),
+        Output("behavior-play-img", "title"),
+        Output("leader-play-img", "src"),
+        Input("video-player", "currentTime"),
+        State("playback-frames", "data"),
+    )
+else:
+    app.callback(
+        Output("synch-glyph-play", "figure"),
+        Input("video-player", "currentTime"),
+        State("dyad-picker", "value"),
+    )(update_glyph_from_video)
+
+    app.callback(
+        Output("behavior-play-img", "src"),
+        Output("behavior-play-img", "title"),
+        Output("leader-play-img", "src"),
+        Input("video-player", "currentTime"),
+        State("dyad-picker", "value"),
+    )(update_dyad_from_video)
 
 @app.callback(
     Output("timeline-heatmap", "figure"),
@@ -1523,30 +1934,17 @@ def update_dyad_from_video(current_time):
     Input("timeline-heatmap", "clickData"),
     Input("timeline-heatmap", "hoverData"),
     State("highlight-mode-store", "data"),
-    State("timeline-heatmap", "figure"),   
+    State("pit-toggle", "value"),
+    State("dyad-picker", "value"),
 )
-def nav_from_heatmap_click_or_hover(clickData, hoverData, highlight_mode, current_fig):
-
-    # start from whatever is currently rendered in the layout
-    if current_fig is not None:
-        hm_fig = go.Figure(current_fig)
-    else:
-        hm_fig = (
-            make_stacked_heatmaps(minimal=False)
-            .update_xaxes(domain=[0.05, 1.0])
-            .update_layout(margin=dict(l=90, r=20, t=0, b=0))
-        )
-
-    # defaults
-    glyph_fig = FIG_SYNCH_GLYPH
-    leading_panel = FIG_LEADING_PANEL
-    behavior_panel = FIG_BEHAVIOR_PANEL
-    window_payload = None
-
-    # consider highlight ON if the store says so OR if the figure already
-    # has shapes is the PIT-on default band + cursor
-    has_shapes = bool(getattr(hm_fig.layout, "shapes", []))
-    mode = bool(highlight_mode) or has_shapes
+def nav_from_heatmap_click_or_hover(clickData, hoverData, highlight_mode, pit_value, dyad_id):
+    # Only the changed bits are sent back as partial (Patch) updates: the
+    # heatmap figure itself never travels in either direction. Whether the
+    # band is showing lives in highlight-mode-store, which the page layout
+    # initializes to match its default shapes (band on when PIT is on).
+    mode = bool(highlight_mode)
+    show_pit = "pit" in (pit_value or [])
+    session = get_session(dyad_id)
 
     ctx = callback_context
     if not ctx.triggered:
@@ -1557,23 +1955,22 @@ def nav_from_heatmap_click_or_hover(clickData, hoverData, highlight_mode, curren
     # click: toggles mode on/off and centers band on click
     if trigger_prop == "timeline-heatmap.clickData":
         if not clickData or "points" not in clickData or not clickData["points"]:
-            return hm_fig, glyph_fig, leading_panel, behavior_panel, window_payload, mode
+            raise PreventUpdate
 
         # toggle mode
         mode = not mode
 
         # turning off: clear highlight & reset panels
         if not mode:
-            base_fig = (
-                make_stacked_heatmaps(minimal=False)
-                .update_xaxes(domain=[0.05, 1.0])
-                .update_layout(margin=dict(l=90, r=20, t=0, b=0))
-            )
+            hm_patch = Patch()
+            hm_patch["layout"]["shapes"] = []
+            if not show_pit:
+                return hm_patch, no_update, no_update, no_update, None, mode
             return (
-                base_fig,
-                FIG_SYNCH_GLYPH,
-                FIG_LEADING_PANEL,
-                FIG_BEHAVIOR_PANEL,
+                hm_patch,
+                glyph_colors_patch(float(session.lf[0]), float(session.hf[0])),
+                session_figures(session.session_id)["leading_panel"],
+                session_figures(session.session_id)["behavior_panel"],
                 None,
                 mode,
             )
@@ -1585,7 +1982,7 @@ def nav_from_heatmap_click_or_hover(clickData, hoverData, highlight_mode, curren
     elif trigger_prop == "timeline-heatmap.hoverData":
         if not mode:
             # highlight mode is off, ignore hover
-            return hm_fig, glyph_fig, leading_panel, behavior_panel, window_payload, mode
+            raise PreventUpdate
 
         if not hoverData or "points" not in hoverData or not hoverData["points"]:
             raise PreventUpdate
@@ -1593,82 +1990,128 @@ def nav_from_heatmap_click_or_hover(clickData, hoverData, highlight_mode, curren
         x_val = hoverData["points"][0]["x"]
 
     else:
-        # any other case, just return current
-        return hm_fig, glyph_fig, leading_panel, behavior_panel, window_payload, mode
+        # any other case, nothing to do
+        raise PreventUpdate
 
     clicked_time = pd.to_datetime(x_val)
 
-    # find nearest index in TS_SERIES
-    pos = TS_SERIES.searchsorted(clicked_time)
-    if pos <= 0:
-        idx = 0
-    elif pos >= len(TS_SERIES):
-        idx = len(TS_SERIES) - 1
-    else:
-        before = TS_SERIES.iloc[pos - 1]
-        after = TS_SERIES.iloc[pos]
-        idx = pos - 1 if (clicked_time - before) <= (after - clicked_time) else pos
+    # find nearest sample to the hovered/clicked time
+    idx = session.nearest_index(clicked_time)
 
-    cursor_time = TS_SERIES.iloc[idx]
-    lf = float(df.loc[idx, LF_COL])
-    hf = float(df.loc[idx, HF_COL])
+    cursor_time = session.time_index[idx]
+    lf = float(session.lf[idx])
+    hf = float(session.hf[idx])
 
     # 30-second window
     half_window = pd.Timedelta(seconds=30)
-    window_start = max(TS_SERIES.iloc[0], cursor_time - half_window)
-    window_end = min(TS_SERIES.iloc[-1], cursor_time + half_window)
-
-    # update PIT glyph
-    lf_vals, lf_cols = half_donut_segments(lf)
-    hf_vals, hf_cols = half_donut_segments(hf)
-
-    glyph_fig = go.Figure(FIG_SYNCH_GLYPH)
-    glyph_fig.data[2].values = lf_vals
-    glyph_fig.data[2].marker.colors = lf_cols
-    glyph_fig.data[3].values = hf_vals
-    glyph_fig.data[3].marker.colors = hf_cols
-    glyph_fig.update_layout(
-        transition=dict(duration=80, easing="cubic-in-out")
-    )
+    window_start = max(session.start, cursor_time - half_window)
+    window_end = min(session.end, cursor_time + half_window)
 
     # highlight band + cursor line on heatmap
-    hm_fig.update_layout(
-        shapes=[
-            dict(
-                type="rect",
-                x0=window_start,
-                x1=window_end,
-                y0=0,
-                y1=1,
-                xref="x",
-                yref="paper",
-                fillcolor="rgba(255, 230, 128, 0.35)",
-                line=dict(color="rgba(255, 196, 0, 0.9)", width=1),
-                layer="above",
-            ),
-            dict(
-                type="line",
-                x0=cursor_time,
-                x1=cursor_time,
-                y0=0,
-                y1=1,
-                xref="x",
-                yref="paper",
-                line=dict(color="black", width=3),
-            ),
-        ]
-    )
-
-    # dyad panels at this instant
-    leading_panel = make_leading_panel(df, row_index=idx)
-    behavior_panel = make_behavior_panel(df, row_index=idx)
+    hm_patch = Patch()
+    if trigger_prop == "timeline-heatmap.clickData":
+        # band may not exist yet: send both shapes
+        hm_patch["layout"]["shapes"] = highlight_shapes(window_start, window_end, cursor_time)
+    else:
+        # band already drawn: just move it
+        hm_patch["layout"]["shapes"][0]["x0"] = window_start.isoformat()
+        hm_patch["layout"]["shapes"][0]["x1"] = window_end.isoformat()
+        hm_patch["layout"]["shapes"][1]["x0"] = cursor_time.isoformat()
+        hm_patch["layout"]["shapes"][1]["x1"] = cursor_time.isoformat()
 
     window_payload = {
+        "dyad": dyad_id,
         "start": window_start.isoformat(),
         "end": window_end.isoformat(),
     }
 
-    return hm_fig, glyph_fig, leading_panel, behavior_panel, window_payload, mode
+    # PIT cards are hidden when PIT is off, so don't bother updating them
+    if not show_pit:
+        return hm_patch, no_update, no_update, no_update, window_payload, mode
+
+    # update PIT glyph
+    glyph_patch = glyph_colors_patch(lf, hf)
+
+    # dyad panels at this instant
+    leading_panel = make_leading_panel(session, row_index=idx)
+    behavior_panel = make_behavior_panel(session, row_index=idx)
+
+    return hm_patch, glyph_patch, leading_panel, behavior_panel, window_payload, mode
+
+def update_timeline_lod(view, current, dyad_id, cursor_sec=None, cursor_origin=None):
+    # Zoom / resize on a timeline graph: redraw the three heatmaps from the
+    # pyramid level that fits the plot width for the visible range (full
+    # resolution once few enough samples are visible). Only the trace data
+    # (and the row images in raster mode) is patched; the user's zoom, the
+    # shapes and the ticks stay as they are.
+    if not view:
+        raise PreventUpdate
+
+    session = get_session(dyad_id)
+    pyramid = session.timeline_pyramid
+    start = pd.Timestamp(view["x0"]) if view.get("x0") else None
+    end = pd.Timestamp(view["x1"]) if view.get("x1") else None
+    i0, i1 = pyramid.rows(start, end)
+    # one extra sample each side so the edge cells aren't cut off
+    i0, i1 = max(0, i0 - 1), min(session.n, i1 + 1)
+    columns = max(1, int(view.get("width") or TIMELINE_COLUMNS))
+
+    if timeline_lod_key(session, i0, i1, columns) == current:
+        raise PreventUpdate
+
+    key, tile, images = timeline_view(session, i0, i1, columns)
+    patch = Patch()
+    for trace, update in enumerate(timeline_trace_updates(tile)):
+        update, _ = pack_trace(update)
+        for name, value in update.items():
+            patch["data"][trace][name] = value
+    # raster mode: swap in the PNG rows for the new range as well
+    if images is not None:
+        patch["layout"]["images"] = images
+    # Play view: assets/playback.js moves the cursor with a relayout that the
+    # figure prop never sees, and the patched figure is re-rendered from that
+    # prop, so put the cursor back where the browser last drew it
+    if cursor_sec is not None and cursor_origin is not None:
+        x = cursor_origin + cursor_sec * 1000
+        patch["layout"]["shapes"][0]["x0"] = x
+        patch["layout"]["shapes"][0]["x1"] = x
+    return patch, key
+
+for graph_id in TIMELINE_LOD_GRAPHS:
+    app.clientside_callback(
+        ClientsideFunction(namespace="timeline", function_name="view"),
+        Output(f"{graph_id}-view", "data"),
+        Input(graph_id, "relayoutData"),
+        State(graph_id, "id"),
+    )
+    cursor = [State("play-cursor-sec", "data"), State("play-cursor-origin", "data")] if graph_id == "play-heatmap-stack" else []
+    app.callback(
+        Output(graph_id, "figure", allow_duplicate=True),
+        Output(f"{graph_id}-lod", "data"),
+        Input(f"{graph_id}-view", "data"),
+        State(f"{graph_id}-lod", "data"),
+        State("dyad-picker", "value"),
+        *cursor,
+        prevent_initial_call=True,
+    )(update_timeline_lod)
+
+@app.callback(
+    Output("metrics-table", "children"),
+    Output("metrics-latency", "figure"),
+    Input("metrics-interval", "n_intervals"),
+    prevent_initial_call=True,
+)
+def refresh_metrics(n_intervals):
+    snapshot = METRICS.snapshot()
+    return make_metrics_table(snapshot), make_latency_histogram(snapshot)
+
+
+if CALLBACK_METRICS:
+    # the metrics page's own polling would only add noise
+    METRICS.instrument(app, ignore=("refresh_metrics",))
+
+if CALLBACK_RECORD:
+    record_session(app, CALLBACK_RECORD)
 
 #Tooltip callbacks
 @app.callback(
@@ -1687,4 +2130,8 @@ def toggle_info_tooltip(n_clicks, style):
 
 
 if __name__ == "__main__":
+    if HOT_RELOAD:
+        # reload messages / failures go through logging (session_registry)
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        REGISTRY.watch()
     app.run(debug=True)
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import plotly.io as pio
+
+from run_length import EventRuns
+
+# Precomputed per-dyad results (written by precompute.py, read by the app).
+#
+# Artifacts are keyed by the session id, i.e. the sha256 of the dyad's
+# workbook, so a changed workbook simply gets a new directory and unchanged
+# ones are found again without any bookkeeping:
+#
+#   data/.artifacts/<session_id>/
+#       summary.json          compute_summary_metrics
+#       events.npz            extract_events (starts / ends / durations / leaders)
+#       timeline_base.json    base stacked timeline (the variants are derived from it)
+#       sketch.json           cohort_sketch.SummarySketch (mergeable summary)
+#       meta.json             written last; a directory without it is ignored
+
+ARTIFACT_DIR = "data/.artifacts"
+ARTIFACT_VERSION = 5    # 3: timelines carry the app template, 4/5: sketch / summary durations in seconds
+META_FILE = "meta.json"
+
+
+def artifact_dir(session_id, root=ARTIFACT_DIR):
+    return os.path.join(root, str(session_id))
+
+
+def read_meta(session_id, root=ARTIFACT_DIR):
+    # meta.json of a complete artifact directory, else None
+    try:
+        with open(os.path.join(artifact_dir(session_id, root), META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == ARTIFACT_VERSION else None
+
+
+def has_artifacts(session_id, root=ARTIFACT_DIR):
+    return read_meta(session_id, root) is not None
+
+
+def write_artifacts(session_id, n, summary, events, timelines, timeline_columns, sketch, root=ARTIFACT_DIR):
+    # summary: dict, events: name -> EventRuns, timelines: variant -> figure
+    # dict drawn with timeline_columns columns, sketch: SummarySketch.to_dict()
+    final = artifact_dir(session_id, root)
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    try:
+        with open(os.path.join(tmp, "summary.json"), "w") as f:
+            json.dump(summary, f)
+
+        with open(os.path.join(tmp, "sketch.json"), "w") as f:
+            json.dump(sketch, f)
+
+        arrays = {}
+        for name, runs in events.items():
+            for field in EventRuns._fields:
+                arrays[f"{name}.{field}"] = getattr(runs, field)
+        np.savez(os.path.join(tmp, "events.npz"), **arrays)
+
+        for variant, fig in timelines.items():
+            with open(os.path.join(tmp, f"timeline_{variant}.json"), "w") as f:
+                f.write(pio.to_json(fig, validate=False))
+
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump({
+                "version": ARTIFACT_VERSION,
+                "n": n,
+                "timeline_columns": timeline_columns,
+            }, f)
+
+        # swap the finished directory in
+        if os.path.isdir(final):
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # another process finished the same session first
+        if not has_artifacts(session_id, root):
+            raise
+    return final
+
+
+def load_summary(session_id, root=ARTIFACT_DIR):
+    if not has_artifacts(session_id, root):
+        return None
+    with open(os.path.join(artifact_dir(session_id, root), "summary.json")) as f:
+        return json.load(f)
+
+
+def load_sketch(session_id, root=ARTIFACT_DIR):
+    if not has_artifacts(session_id, root):
+        return None
+    with open(os.path.join(artifact_dir(session_id, root), "sketch.json")) as f:
+        return json.load(f)
+
+
+def load_events(session_id, root=ARTIFACT_DIR):
+    if not has_artifacts(session_id, root):
+        return None
+    with np.load(os.path.join(artifact_dir(session_id, root), "events.npz")) as npz:
+        names = sorted({key.split(".")[0] for key in npz.files})
+        return {
+            name: EventRuns(*(npz[f"{name}.{field}"] for field in EventRuns._fields))
+            for name in names
+        }
+
+
+def load_timeline(session_id, variant, columns, root=ARTIFACT_DIR):
+    # only if it was drawn with the column budget the caller uses
+    meta = read_meta(session_id, root)
+    if meta is None or meta.get("timeline_columns") != columns:
+        return None
+    path = os.path.join(artifact_dir(session_id, root), f"timeline_{variant}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,137 @@
+// Clientside playback callbacks for the Play view.
+// Dash loads every .js file in assets/ automatically.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    playback: {
+        // Move the Play heatmap cursor (layout.shapes[0]) to the video time.
+        // Runs entirely in the browser: no server request and no figure
+        // re-serialization, just a relayout of one shape.
+        move_cursor: function (currentTime, originMs) {
+            var noUpdate = window.dash_clientside.no_update;
+            if (currentTime === null || currentTime === undefined || originMs === null) {
+                return noUpdate;
+            }
+
+            // only move when the whole second changes
+            var sec = Math.round(currentTime);
+            var gd = document.querySelector("#play-heatmap-stack .js-plotly-plot");
+            if (!gd || !window.Plotly || !gd.layout) {
+                return noUpdate;
+            }
+            if (gd._cursorSec === sec) {
+                return noUpdate;
+            }
+            gd._cursorSec = sec;
+
+            // date axes accept unix ms
+            var x = originMs + sec * 1000;
+            window.Plotly.relayout(gd, {"shapes[0].x0": x, "shapes[0].x1": x});
+            return sec;
+        },
+
+        // Play view PIT cards from the precomputed frame table (playback-frames
+        // store): restyles the glyph arcs in place and returns the behavior /
+        // leader images only when they change.
+        update_pit: function (currentTime, frames) {
+            var noUpdate = window.dash_clientside.no_update;
+            if (!frames || !frames.t || frames.t.length === 0) {
+                return [noUpdate, noUpdate, noUpdate];
+            }
+            if (currentTime === null || currentTime === undefined) {
+                currentTime = 0.0;
+            }
+
+            var t = frames.t;
+            var n = t.length;
+
+            // glyph: same sticky interpolation as glyph_counts_at in pit_frames.py
+            var pos = searchsorted(t, currentTime, false);
+            var i0, i1;
+            if (pos <= 0) {
+                i0 = i1 = 0;
+            } else if (pos >= n) {
+                i0 = i1 = n - 1;
+            } else {
+                i0 = pos - 1;
+                i1 = pos;
+            }
+            var alpha = (t[i1] === t[i0]) ? 0.0 : (currentTime - t[i0]) / (t[i1] - t[i0]);
+            if (alpha <= 0.3) {
+                alpha = 0.0;
+            } else if (alpha >= 0.7) {
+                alpha = 1.0;
+            } else {
+                alpha = (alpha - 0.3) / (0.7 - 0.3);
+            }
+            var lf = Math.ceil((1.0 - alpha) * frames.lf[i0] + alpha * frames.lf[i1]);
+            var hf = Math.ceil((1.0 - alpha) * frames.hf[i0] + alpha * frames.hf[i1]);
+
+            var gd = document.querySelector("#synch-glyph-play .js-plotly-plot");
+            if (gd && window.Plotly && gd.data && (gd._pitLf !== lf || gd._pitHf !== hf)) {
+                gd._pitLf = lf;
+                gd._pitHf = hf;
+                // traces 2 = LF arc, 3 = HF arc
+                window.Plotly.restyle(
+                    gd,
+                    {"marker.colors": [sliceColors(frames, lf), sliceColors(frames, hf)]},
+                    [2, 3]
+                );
+            }
+
+            // behavior / leader: last sample at or before the video time
+            var idx = Math.max(0, Math.min(searchsorted(t, currentTime, true) - 1, n - 1));
+            var behavior = frames.behavior[idx];
+            var leader = frames.leader[idx];
+            if (frames._lastBehavior === behavior && frames._lastLeader === leader) {
+                return [noUpdate, noUpdate, noUpdate];
+            }
+            frames._lastBehavior = behavior;
+            frames._lastLeader = leader;
+            return [
+                frames.behavior_src[behavior],
+                frames.behavior_title[behavior],
+                frames.leader_src[leader],
+            ];
+        },
+
+        // The Play page stays mounted (hidden) when another tab is opened;
+        // stop the video so it doesn't keep playing out of sight.
+        pause_hidden: function (activeTab) {
+            if (activeTab === "play") {
+                return window.dash_clientside.no_update;
+            }
+            return false;
+        },
+    },
+});
+
+// first index where value could be inserted to keep `arr` sorted
+// (right = true: after any equal entries, like numpy side="right")
+function searchsorted(arr, value, right) {
+    var lo = 0;
+    var hi = arr.length;
+    while (lo < hi) {
+        var mid = (lo + hi) >>> 1;
+        if (arr[mid] < value || (right && arr[mid] === value)) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+// colors for a half-donut with `count` colored slices (cached per count)
+function sliceColors(frames, count) {
+    frames._colorCache = frames._colorCache || {};
+    var cached = frames._colorCache[count];
+    if (cached) {
+        return cached;
+    }
+    var colors = frames.colors.slice(0, count);
+    for (var i = count; i < 2 * frames.n_seg; i++) {
+        colors.push(frames.transparent);
+    }
+    frames._colorCache[count] = colors;
+    return colors;
+}
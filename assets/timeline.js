@@ -0,0 +1,36 @@
+// Clientside helpers for the stacked timeline heatmaps.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    timeline: {
+        // Turn the graph's relayoutData into the visible x range + plot width
+        // (px) for the LOD callback. Only zoom / autorange / resize events
+        // count; shape moves (cursor, highlight band) are ignored.
+        view: function (relayoutData, graphId) {
+            var noUpdate = window.dash_clientside.no_update;
+            if (!relayoutData) {
+                return noUpdate;
+            }
+            var relevant = Object.keys(relayoutData).some(function (key) {
+                return key === "autosize" || /^xaxis\d*\.(range|autorange)/.test(key);
+            });
+            if (!relevant) {
+                return noUpdate;
+            }
+
+            var gd = document.querySelector("#" + graphId + " .js-plotly-plot");
+            if (!gd || !gd._fullLayout || !gd._fullLayout.xaxis) {
+                return noUpdate;
+            }
+            var xaxis = gd._fullLayout.xaxis;
+            var full = Object.keys(relayoutData).some(function (key) {
+                return /autorange/.test(key) && relayoutData[key];
+            }) || !!(gd.layout.xaxis && gd.layout.xaxis.autorange);
+
+            return {
+                x0: full ? null : xaxis.range[0],
+                x1: full ? null : xaxis.range[1],
+                width: Math.round(gd._fullLayout._size.w)
+            };
+        }
+    }
+});
@@ -0,0 +1,304 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from dash.exceptions import PreventUpdate
+from plotly.io.json import to_json_plotly
+from plotly.utils import PlotlyJSONEncoder
+
+from synthetic_session import write_synthetic_session
+
+# Reproducible benchmarks on synthetic sessions (synthetic_session.py):
+#
+#   python benchmark.py [--sizes 10m,1h,8h] [--rate 1] [--repeat 5]
+#                       [--out benchmark_results.json] [--baseline old.json]
+#
+# For each session size this times loading, every figure builder, the JSON
+# encoding of the big figures (plain vs figure_json-packed) and every
+# server-side callback body (called directly, as Dash would, with the
+# callback context filled in). Each entry records the first (cold) call, the
+# median / min of the repeats (warm, i.e. with the app's caches filled) and
+# the size of the JSON that would go to the browser. Results are written as
+# JSON; --baseline compares against an earlier run and flags slowdowns.
+
+SIZES = {"10m": 600, "1h": 3600, "8h": 8 * 3600}      # seconds of recording
+REPEAT = 5
+RESULTS_FILE = "benchmark_results.json"
+
+# first (cold) or warm median time this much slower than the baseline
+# counts as a regression
+REGRESSION_RATIO = 1.25
+# ...unless both are below this (timer noise)
+NOISE_FLOOR_S = 0.002
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def payload_bytes(value):
+    try:
+        return len(json.dumps(value, cls=PlotlyJSONEncoder))
+    except TypeError:
+        return None
+
+
+def call_callback(fn, *args, triggered=None):
+    # run a callback body outside a request; triggered = "component.prop"
+    ctx = AttributeDict(
+        triggered_inputs=[{"prop_id": triggered, "value": None}] if triggered else [],
+        outputs_list=[],
+        inputs_list=[],
+        states_list=[],
+    )
+    token = context_value.set(ctx)
+    try:
+        return fn(*args)
+    except PreventUpdate:
+        return None
+    finally:
+        context_value.reset(token)
+
+
+def measure(fn, repeat, payload=True):
+    times = []
+    for _ in range(repeat + 1):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    warm = times[1:] or times
+    return {
+        "first_s": times[0],
+        "median_s": statistics.median(warm),
+        "min_s": min(warm),
+        "bytes": payload_bytes(result) if payload else None,
+    }
+
+
+def builder_cases(session):
+    from view_point_in_time.pit_synch import make_coherence_figure
+    from view_summary.sum_behaviors_pie import make_pie
+    from view_summary.sum_synch_bar import make_synch_bar
+    from view_summary.sum_synch_violin import make_violin
+    from view_summary.sum_table import make_summary_table
+    from vid_heatmaps import make_stacked_heatmaps
+
+    return {
+        "make_stacked_heatmaps": lambda: make_stacked_heatmaps(session),
+        "make_violin": lambda: make_violin(session),
+        "make_pie": lambda: make_pie(session),
+        "make_synch_bar": lambda: make_synch_bar(session),
+        "make_summary_table": lambda: make_summary_table(session),
+        "make_coherence_figure": lambda: make_coherence_figure(session),
+    }
+
+
+def encode_cases(session):
+    # figure JSON as plotly builds it vs packed (figure_json), encoded the way
+    # Dash encodes responses; the result is the JSON text itself
+    from figure_json import pack_figure
+    from view_point_in_time.pit_synch import make_coherence_figure
+    from view_summary.sum_synch_violin import make_violin
+    from vid_heatmaps import make_stacked_heatmaps
+
+    figures = {
+        "timeline": make_stacked_heatmaps(session).to_dict(),
+        "violin": make_violin(session).to_dict(),
+        "glyph": make_coherence_figure(session).to_dict(),
+    }
+    cases = {}
+    for name, fig in figures.items():
+        packed = pack_figure(fig)
+        cases[f"{name}.plain"] = lambda fig=fig: to_json_plotly(fig)
+        cases[f"{name}.packed"] = lambda fig=packed: to_json_plotly(fig)
+    return cases
+
+
+def callback_cases(app, dyad_id, session):
+    # representative inputs for each callback: somewhere in the middle of the
+    # session, a window a tenth of its length, a zoom to its second quarter
+    span = session.end - session.start
+    middle = session.start + span / 2
+    window = {
+        "dyad": dyad_id,
+        "start": middle.isoformat(),
+        "end": (middle + span / 10).isoformat(),
+    }
+    point = {"points": [{"x": middle.isoformat()}]}
+    view = {
+        "x0": (session.start + span / 4).isoformat(),
+        "x1": (session.start + span / 2).isoformat(),
+        "width": 1200,
+    }
+    t = float(session.elapsed[-1]) / 2 if session.n else 0.0
+    origin_ms = app.session_start_ms(session)
+
+    # a browser that already holds both pages for this session
+    mounted = {"home": app.page_key("home", session, True), "play": app.page_key("play", session, True)}
+
+    return {
+        "serve_layout": lambda: app.serve_layout(),
+        "switch_tab.home": lambda: call_callback(
+            app.switch_tab, 1, 0, 0, 0, ["pit"], dyad_id, "play", {}, triggered="tab-home.n_clicks"),
+        "switch_tab.play": lambda: call_callback(
+            app.switch_tab, 0, 1, 0, 0, [], dyad_id, "home", {}, triggered="tab-play.n_clicks"),
+        "switch_tab.home_mounted": lambda: call_callback(
+            app.switch_tab, 1, 1, 0, 0, ["pit"], dyad_id, "play", mounted, triggered="tab-home.n_clicks"),
+        "switch_tab.cohort": lambda: call_callback(
+            app.switch_tab, 0, 0, 1, 0, [], dyad_id, "home", {}, triggered="tab-cohort.n_clicks"),
+        "filter_by_leader.all": lambda: call_callback(
+            app.filter_by_leader, None, None, None, dyad_id),
+        "filter_by_leader.child_window": lambda: call_callback(
+            app.filter_by_leader, {"points": [{"x": "Child"}]}, window, None, dyad_id),
+        "nav_from_heatmap.click": lambda: call_callback(
+            app.nav_from_heatmap_click_or_hover, point, None, False, ["pit"], dyad_id,
+            triggered="timeline-heatmap.clickData"),
+        "nav_from_heatmap.hover": lambda: call_callback(
+            app.nav_from_heatmap_click_or_hover, None, point, True, ["pit"], dyad_id,
+            triggered="timeline-heatmap.hoverData"),
+        "update_timeline_lod": lambda: call_callback(
+            app.update_timeline_lod, view, None, dyad_id),
+        "update_heatmaps_cursor": lambda: call_callback(
+            app.update_heatmaps_cursor, t, None, origin_ms),
+        "update_glyph_from_video": lambda: call_callback(
+            app.update_glyph_from_video, t, dyad_id),
+        "update_dyad_from_video": lambda: call_callback(
+            app.update_dyad_from_video, t, dyad_id),
+    }
+
+
+def run_size(label, seconds, rate, repeat, workdir):
+    # each size gets its own data/ folder, and the app's registry (which
+    # reads ./data) is pointed at it by changing directory
+    os.makedirs(os.path.join(workdir, label, "data"), exist_ok=True)
+    os.chdir(os.path.join(workdir, label))
+    dyad_id = f"SYN_{label}"
+    path = os.path.join("data", f"{dyad_id}.csv")
+    write_synthetic_session(path, seconds, rate_hz=rate, seed=0)
+
+    import app
+    from data_cache import load_cached_frame
+    from prepared_session import PreparedSession
+    from session_registry import SHEET
+    from stream_ingest import stream_session
+
+    rows = []
+
+    def record(group, name, stats):
+        rows.append({"size": label, "seconds": seconds, "rate_hz": rate,
+                     "group": group, "name": name, **stats})
+        print(f"  {group:9s} {name:32s} first {stats['first_s'] * 1e3:9.1f} ms   "
+              f"median {stats['median_s'] * 1e3:9.1f} ms   {stats['bytes'] or 0:>10,} B")
+
+    record("load", "stream_session", measure(lambda: stream_session(path, SHEET), 1, payload=False))
+    # first call writes the snapshot, the repeats memory-map it
+    record("load", "load_cached_frame", measure(lambda: load_cached_frame(path, SHEET), repeat, payload=False))
+    frame = load_cached_frame(path, SHEET)
+    record("load", "PreparedSession.from_frame",
+           measure(lambda: PreparedSession.from_frame(frame), repeat, payload=False))
+
+    session = app.get_session(dyad_id)
+    for name, fn in builder_cases(session).items():
+        record("builder", name, measure(fn, repeat))
+    for name, fn in encode_cases(session).items():
+        stats = measure(fn, repeat, payload=False)
+        record("encode", name, {**stats, "bytes": len(fn())})
+    for name, fn in callback_cases(app, dyad_id, session).items():
+        record("callback", name, measure(fn, repeat))
+    return rows
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "dash": dash.__version__,
+    }
+
+
+def compare(results, baseline):
+    # print entries whose cold (first) or warm (median) time moved noticeably;
+    # returns regressions. The warm repeats of memoized callbacks are cache
+    # hits, so only the first call shows a slower uncached path.
+    old = {(r["size"], r["group"], r["name"]): r for r in baseline["results"]}
+    regressions = []
+    for row in results:
+        before = old.get((row["size"], row["group"], row["name"]))
+        if before is None:
+            continue
+        regressed = False
+        for metric in ("first_s", "median_s"):
+            if max(before[metric], row[metric]) < NOISE_FLOOR_S:
+                continue
+            ratio = row[metric] / max(before[metric], 1e-9)
+            if ratio > REGRESSION_RATIO or ratio < 1 / REGRESSION_RATIO:
+                tag = "REGRESSION" if ratio > 1 else "faster"
+                print(f"  {tag:10s} {row['size']:4s} {row['group']:9s} {row['name']:32s} {metric[:-2]:6s} "
+                      f"{before[metric] * 1e3:8.1f} -> {row[metric] * 1e3:8.1f} ms ({ratio:.2f}x)")
+                regressed = regressed or ratio > 1
+        if regressed:
+            regressions.append(row)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark figure builders and callbacks.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"comma separated, from {list(SIZES)}")
+    parser.add_argument("--rate", type=float, default=1.0, help="samples per second")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--out", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="synch-bench-") as workdir:
+        try:
+            for label in args.sizes.split(","):
+                seconds = SIZES[label]
+                print(f"{label}: {int(seconds * args.rate):,} samples")
+                results += run_size(label, seconds, args.rate, args.repeat, workdir)
+        finally:
+            os.chdir(cwd)
+
+    with open(out, "w") as f:
+        json.dump({"environment": environment(), "repeat": args.repeat, "results": results}, f, indent=1)
+    print(f"wrote {len(results)} results to {out}")
+
+    if baseline is not None:
+        print(f"compared with {args.baseline} ({baseline['environment'].get('commit')}):")
+        if compare(results, baseline):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+from flask import abort, g, jsonify, request
+
+# Opt-in instrumentation of the Dash callbacks (CALLBACK_METRICS in app.py).
+#
+# Every POST to /_dash-update-component is timed from the moment Flask hands
+# it over until the response is ready, so deserializing the inputs and
+# serializing the figures are included. Per callback we keep:
+#
+#   count / prevented (204, nothing sent) / errors
+#   wall time, response bytes, request bytes and the State share of the
+#   request, as cumulative bucket counts plus the last RECENT_SAMPLES values
+#   for percentiles
+#   invocation rate over the last RATE_WINDOW_S seconds
+#
+# The numbers are served as JSON at METRICS_PATH (local requests only) and
+# drawn by the hidden Metrics tab.
+#
+# record_session() (CALLBACK_RECORD in app.py) is separate: it appends the
+# props each browser changed, one JSON line per callback request, for
+# loadtest.py --replay.
+
+METRICS_PATH = "/_metrics"
+UPDATE_PATH = "_dash-update-component"
+
+RECENT_SAMPLES = 4096
+RATE_WINDOW_S = 60.0
+PERCENTILES = (50, 90, 99)
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float("inf"))
+
+LOCAL_ADDRS = ("127.0.0.1", "::1", "localhost")
+
+RECORD_COOKIE = "callback_record_client"
+
+# (field, buckets) recorded per call
+FIELDS = (
+    ("wall_ms", LATENCY_BUCKETS_MS),
+    ("response_bytes", BYTES_BUCKETS),
+    ("request_bytes", BYTES_BUCKETS),
+    ("state_bytes", BYTES_BUCKETS),
+)
+
+
+class CallbackStats:
+    def __init__(self):
+        self.count = 0
+        self.prevented = 0
+        self.errors = 0
+        self.buckets = {field: np.zeros(len(edges), dtype=np.int64) for field, edges in FIELDS}
+        self.totals = {field: 0.0 for field, _ in FIELDS}
+        self.recent = {field: deque(maxlen=RECENT_SAMPLES) for field, _ in FIELDS}
+        self.times = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, now, status, values):
+        self.count += 1
+        if status == 204:
+            self.prevented += 1
+        elif status >= 400:
+            self.errors += 1
+        self.times.append(now)
+        for field, edges in FIELDS:
+            value = values[field]
+            self.buckets[field][np.searchsorted(edges, value)] += 1
+            self.totals[field] += value
+            self.recent[field].append(value)
+
+    def rate(self, now):
+        # calls per second over the last RATE_WINDOW_S
+        cutoff = now - RATE_WINDOW_S
+        recent = sum(1 for t in self.times if t >= cutoff)
+        return recent / RATE_WINDOW_S
+
+    def summary(self, now):
+        out = {
+            "count": self.count,
+            "prevented": self.prevented,
+            "errors": self.errors,
+            "rate_per_s": self.rate(now),
+        }
+        for field, edges in FIELDS:
+            values = np.asarray(self.recent[field], dtype=np.float64)
+            out[field] = {
+                "mean": self.totals[field] / self.count if self.count else 0.0,
+                "max": float(values.max()) if len(values) else 0.0,
+                **{
+                    f"p{p}": float(np.percentile(values, p)) if len(values) else 0.0
+                    for p in PERCENTILES
+                },
+                # [upper edge, cumulative count] pairs, like a Prometheus
+                # histogram (a list, so JSON keeps the order)
+                "buckets": [
+                    ["+Inf" if np.isinf(edge) else f"{edge:g}", int(c)]
+                    for edge, c in zip(edges, np.cumsum(self.buckets[field]))
+                ],
+            }
+        return out
+
+
+class CallbackMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self._stats = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def _name(self, app, output):
+        # callback function name for an output spec (falls back to the spec)
+        name = self._names.get(output)
+        if name is None:
+            fn = app.callback_map.get(output, {}).get("callback")
+            name = getattr(fn, "__name__", None) or output
+            self._names[output] = name
+        return name
+
+    def record(self, name, status, values):
+        now = time.time()
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CallbackStats()
+            stats.add(now, status, values)
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            callbacks = {name: stats.summary(now) for name, stats in sorted(self._stats.items())}
+        return {"since": self.started, "uptime_s": now - self.started, "callbacks": callbacks}
+
+    def instrument(self, app, ignore=()):
+        # hook the Flask server behind a Dash app; callbacks named in
+        # `ignore` (e.g. the metrics page's own refresh) aren't recorded
+        server = app.server
+
+        @server.before_request
+        def _start_timer():
+            if request.path.endswith(UPDATE_PATH):
+                g.callback_t0 = time.perf_counter()
+
+        @server.after_request
+        def _record(response):
+            t0 = g.pop("callback_t0", None)
+            if t0 is None:
+                return response
+            # already parsed (and cached) by Dash, so this costs nothing
+            body = request.get_json(silent=True, cache=True) or {}
+            name = self._name(app, body.get("output", "?"))
+            if name in ignore:
+                return response
+            state = body.get("state")
+            self.record(name, response.status_code, {
+                "wall_ms": (time.perf_counter() - t0) * 1000,
+                "response_bytes": response.calculate_content_length() or len(response.get_data()),
+                "request_bytes": request.content_length or 0,
+                # re-serialized, so roughly what the browser sent for State
+                "state_bytes": len(json.dumps(state, separators=(",", ":"))) if state else 0,
+            })
+            return response
+
+        @server.route(METRICS_PATH)
+        def _metrics():
+            if request.remote_addr not in LOCAL_ADDRS:
+                abort(403)
+            return jsonify(self.snapshot())
+
+        return self
+
+
+METRICS = CallbackMetrics()
+
+
+def record_session(app, path):
+    # {"t", "client", "changes": [{id, property, value}]} per request; each
+    # browser gets a RECORD_COOKIE so several tabs on one machine stay apart
+    lock = threading.Lock()
+    out = open(path, "a", buffering=1)
+
+    @app.server.before_request
+    def _record_changes():
+        g.record_client = request.cookies.get(RECORD_COOKIE) or uuid.uuid4().hex[:12]
+        if not request.path.endswith(UPDATE_PATH):
+            return
+        body = request.get_json(silent=True, cache=True) or {}
+        changed = set(body.get("changedPropIds") or [])
+        changes = [
+            {"id": item["id"], "property": item["property"], "value": item.get("value")}
+            for item in body.get("inputs") or []
+            if isinstance(item, dict) and "id" in item
+            and f"{item['id']}.{item['property']}" in changed
+        ]
+        if not changes:
+            return
+        line = json.dumps({"t": time.time(), "client": g.record_client, "changes": changes},
+                          separators=(",", ":"))
+        with lock:
+            out.write(line + "\n")
+
+    @app.server.after_request
+    def _set_client_cookie(response):
+        client = g.pop("record_client", None)
+        if client and request.cookies.get(RECORD_COOKIE) != client:
+            response.set_cookie(RECORD_COOKIE, client, httponly=True, samesite="Lax")
+        return response
+
+    return out
@@ -0,0 +1,253 @@
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from artifacts import load_sketch
+from data_cache import load_cached_frame, snapshot_sha256
+from prepared_session import PreparedSession
+from run_length import THRESH, extract_events
+from session_registry import SHEET
+from window_stats import HIST_BINS, HIST_EDGES
+
+# Mergeable per-dyad summary sketches for the cohort view.
+#
+# A sketch holds only counts, sums, extrema and fixed-bin histograms, so two
+# sketches combine field by field (add / min / max) and the cohort summary is
+# just every dyad's sketch merged together. Adding a dyad merges one sketch;
+# nothing is recomputed from raw samples.
+
+# coherence histograms over [0, 1]: HIST_BINS / HIST_EDGES from window_stats
+
+# event duration histogram edges, in seconds (last bin is open-ended); the
+# event tables count samples, so durations are converted with each dyad's own
+# sample rate before they are merged
+DURATION_EDGES = np.array([0, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300, 600, 1800, 3600, np.inf])
+
+EVENT_TYPES = ("lf", "hf", "joint")
+
+logger = logging.getLogger(__name__)
+
+# field -> how two sketches combine
+MERGE = {
+    "n_dyads": np.add,
+    "n": np.add,
+    "seconds": np.add,
+    "engagement_counts": np.add,        # (3,) none / SJE / CJE samples
+    "lead_counts": np.add,              # (3,) none / child / parent samples
+    "coherence_sum": np.add,            # (2,) LF / HF
+    "coherence_above": np.add,          # (2,) samples >= THRESH
+    "coherence_hist": np.add,           # (2, HIST_BINS)
+    "coherence_min": np.minimum,        # (2,)
+    "coherence_max": np.maximum,        # (2,)
+    "event_count": np.add,              # (3,) per EVENT_TYPES
+    "event_duration_sum": np.add,       # (3,) seconds
+    "event_duration_max": np.maximum,   # (3,) seconds
+    "event_duration_hist": np.add,      # (3, len(DURATION_EDGES) - 1)
+    "event_leaders": np.add,            # (3, 3) onset leader counts per type
+}
+
+
+def _empty_values():
+    n_dur = len(DURATION_EDGES) - 1
+    return {
+        "n_dyads": np.int64(0),
+        "n": np.int64(0),
+        "seconds": np.float64(0.0),
+        "engagement_counts": np.zeros(3, dtype=np.int64),
+        "lead_counts": np.zeros(3, dtype=np.int64),
+        "coherence_sum": np.zeros(2),
+        "coherence_above": np.zeros(2, dtype=np.int64),
+        "coherence_hist": np.zeros((2, HIST_BINS), dtype=np.int64),
+        "coherence_min": np.full(2, np.inf),
+        "coherence_max": np.full(2, -np.inf),
+        "event_count": np.zeros(3, dtype=np.int64),
+        "event_duration_sum": np.zeros(3),
+        "event_duration_max": np.zeros(3),
+        "event_duration_hist": np.zeros((3, n_dur), dtype=np.int64),
+        "event_leaders": np.zeros((3, 3), dtype=np.int64),
+    }
+
+
+class SummarySketch:
+    def __init__(self, values=None):
+        self.values = values if values is not None else _empty_values()
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    @classmethod
+    def from_session(cls, session, events=None):
+        if events is None:
+            events = extract_events(session)
+
+        v = _empty_values()
+        v["n_dyads"] = np.int64(1)
+        v["n"] = np.int64(session.n)
+        v["seconds"] = np.float64(session.elapsed[-1]) if session.n else np.float64(0.0)
+        v["engagement_counts"] = np.bincount(session.engagement, minlength=3).astype(np.int64)
+        v["lead_counts"] = np.bincount(session.leading_num, minlength=3).astype(np.int64)
+
+        coherence = session.coherence
+        v["coherence_sum"] = coherence.sum(axis=1, dtype=np.float64)
+        v["coherence_above"] = (coherence >= THRESH).sum(axis=1).astype(np.int64)
+        for row in range(2):
+            v["coherence_hist"][row] = np.histogram(np.clip(coherence[row], 0.0, 1.0), bins=HIST_EDGES)[0]
+        if session.n:
+            v["coherence_min"] = coherence.min(axis=1).astype(np.float64)
+            v["coherence_max"] = coherence.max(axis=1).astype(np.float64)
+
+        sample_s = session.sample_seconds
+        for k, name in enumerate(EVENT_TYPES):
+            runs = events[name]
+            seconds = runs.durations * sample_s
+            v["event_count"][k] = len(seconds)
+            v["event_duration_sum"][k] = seconds.sum()
+            v["event_duration_max"][k] = seconds.max() if len(seconds) else 0.0
+            v["event_duration_hist"][k] = np.histogram(seconds, bins=DURATION_EDGES)[0]
+            v["event_leaders"][k] = np.bincount(runs.leaders, minlength=3)[:3]
+        return cls(v)
+
+    def merge(self, other):
+        return SummarySketch({
+            name: combine(self.values[name], other.values[name])
+            for name, combine in MERGE.items()
+        })
+
+    def to_dict(self):
+        # JSON-ready (stored next to the other precompute artifacts)
+        return {name: np.asarray(value).tolist() for name, value in self.values.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        empty = _empty_values()
+        return cls({
+            name: np.asarray(data[name], dtype=np.asarray(empty[name]).dtype)
+            for name in MERGE
+        })
+
+    def metrics(self):
+        # same keys as sum_table.compute_summary_metrics (averages are per event)
+        count = self["event_count"]
+        total = self["event_duration_sum"]
+        avg = [float(total[k] / count[k]) if count[k] else 0.0 for k in range(3)]
+        return {
+            "n_lf": int(count[0]),
+            "n_hf": int(count[1]),
+            "avg_lf": avg[0],
+            "avg_hf": avg[1],
+            "n_joint": int(count[2]),
+            "avg_joint": avg[2],
+        }
+
+    def coherence_mean(self):
+        n = int(self["n"])
+        return self["coherence_sum"] / n if n else np.full(2, np.nan)
+
+
+def merge_all(sketches):
+    total = SummarySketch()
+    for sketch in sketches:
+        total = total.merge(sketch)
+    return total
+
+
+class Cohort:
+    # dyad_id -> (session_id, sketch) plus the merged total. A new dyad is
+    # one merge; a dyad whose data changed (or was removed) re-merges the
+    # members' sketches, since maxima can't be "un-merged".
+
+    def __init__(self):
+        self.members = {}
+        self.total = SummarySketch()
+        self._lock = threading.Lock()
+        self._pending = set()           # dyad ids waiting for a sketch
+        self._queue = OrderedDict()     # dyad_id -> Dyad, for the builder thread
+        self._building = None           # dyad id the builder is on
+        self._builder = None
+
+    def add(self, dyad_id, session_id, sketch):
+        with self._lock:
+            old = self.members.get(dyad_id)
+            if old is not None and old[0] == session_id:
+                return False
+            self.members[dyad_id] = (session_id, sketch)
+            if old is None:
+                self.total = self.total.merge(sketch)
+            else:
+                self.total = merge_all(s for _, s in self.members.values())
+            return True
+
+    def remove(self, dyad_id):
+        with self._lock:
+            if self.members.pop(dyad_id, None) is not None:
+                self.total = merge_all(s for _, s in self.members.values())
+
+    def session_id(self, dyad_id):
+        member = self.members.get(dyad_id)
+        return member[0] if member else None
+
+    def per_dyad(self):
+        # dyad_id -> sketch, for distributions across dyads
+        return {dyad_id: sketch for dyad_id, (_, sketch) in self.members.items()}
+
+    def pending(self):
+        # dyads whose (current) sketch is still being built, sorted
+        with self._lock:
+            return sorted(self._pending)
+
+    def refresh(self, registry):
+        # bring the cohort up to date with the registry: unchanged dyads cost
+        # a stat() call, changed / new ones use their precomputed sketch. Ones
+        # without a sketch need their whole session loaded, which can take
+        # seconds, so they are built on a background thread and show up in
+        # pending() until they are merged in
+        dyads = registry.dyads()
+        for dyad_id in list(self.members):
+            if dyad_id not in dyads:
+                self.remove(dyad_id)
+
+        missing = []
+        for dyad in dyads.values():
+            sha = snapshot_sha256(dyad.data_path, SHEET)
+            if sha is not None and sha == self.session_id(dyad.dyad_id):
+                continue
+            stored = load_sketch(sha) if sha is not None else None
+            if stored is not None:
+                self.add(dyad.dyad_id, sha, SummarySketch.from_dict(stored))
+            else:
+                missing.append(dyad)
+
+        # a running builder picks up newly queued dyads before it exits
+        with self._lock:
+            self._pending = {dyad.dyad_id for dyad in missing}
+            for dyad_id in list(self._queue):
+                if dyad_id not in self._pending:
+                    del self._queue[dyad_id]
+            for dyad in missing:
+                if dyad.dyad_id != self._building:
+                    self._queue[dyad.dyad_id] = dyad
+            if self._queue and self._builder is None:
+                self._builder = threading.Thread(target=self._build, name="cohort-sketches", daemon=True)
+                self._builder.start()
+        return self.total
+
+    def _build(self):
+        # a private session per dyad, dropped once its sketch is taken: going
+        # through the registry would evict the sessions people are viewing
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._builder = self._building = None
+                    return
+                _, dyad = self._queue.popitem(last=False)
+                self._building = dyad.dyad_id
+            try:
+                df = load_cached_frame(dyad.data_path, sheet_name=SHEET)
+                session = PreparedSession.from_frame(df, session_id=df.attrs.get("sha256", dyad.data_path))
+                self.add(dyad.dyad_id, session.session_id, SummarySketch.from_session(session))
+            except Exception:
+                logger.exception("cohort sketch for %s failed", dyad.dyad_id)
+            with self._lock:
+                self._pending.discard(dyad.dyad_id)
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Columnar on-disk snapshot of the session sheet so startup doesn't have to
+# parse the xlsx with openpyxl every time. Each column is stored as its own
+# .npy file (memory-mapped on load) next to the workbook, plus a meta.json
+# holding the xlsx fingerprint used to invalidate the snapshot.
+
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+
+TS_COL = "timestamp"
+LF_COL = "lf_coh"
+HF_COL = "hf_coh"
+SJE_COL = "sje"
+CJE_COL = "cje"
+LEAD_COL = "leading"
+
+# column -> on-disk dtype
+COLUMN_DTYPES = {
+    TS_COL: "datetime64[ns]",
+    LF_COL: "float32",
+    HF_COL: "float32",
+    SJE_COL: "int8",
+    CJE_COL: "int8",
+    LEAD_COL: "category",   # stored as int8 codes + categories in meta.json
+}
+
+HASH_CHUNK = 1 << 20
+
+
+def cache_dir_for(source_path):
+    # data/Synch_Data.xlsx -> data/.Synch_Data_cache/
+    folder, name = os.path.split(source_path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(folder, f".{stem}_cache")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp = os.path.join(cache_dir, META_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, META_FILE))
+
+
+def snapshot_is_valid(source_path, sheet_name, meta):
+    # mtime/size match -> trust it without hashing. If only the mtime moved
+    # (file touched / re-copied), fall back to the content hash.
+    if not meta or meta.get("version") != CACHE_VERSION:
+        return False
+    if meta.get("sheet") != sheet_name:
+        return False
+
+    st = os.stat(source_path)
+    if meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size:
+        return True
+    return meta.get("sha256") == file_sha256(source_path)
+
+
+def snapshot_sha256(source_path, sheet_name):
+    # content hash of source_path if its snapshot is current, else None
+    # (lets batch jobs check for changes without loading anything)
+    meta = _read_meta(cache_dir_for(source_path))
+    if not snapshot_is_valid(source_path, sheet_name, meta):
+        return None
+    return meta["sha256"]
+
+
+def to_typed_columns(df):
+    # normalize a raw session frame into the typed column arrays we store
+    ts = pd.to_datetime(df[TS_COL], errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+    cols = {TS_COL: ts}
+    for col in [LF_COL, HF_COL]:
+        cols[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float32")
+
+    # sje / cje are 1 when present, otherwise null
+    for col in [SJE_COL, CJE_COL]:
+        vals = pd.to_numeric(df[col], errors="coerce").fillna(0)
+        cols[col] = vals.to_numpy().astype("int8")
+
+    lead = df[LEAD_COL].astype("string").str.strip().str.upper()
+    lead_cat = pd.Categorical(lead.to_numpy(dtype=object, na_value=None))
+    return cols, lead_cat
+
+
+def write_snapshot(source_path, sheet_name, df):
+    cols, lead_cat = to_typed_columns(df)
+    cols[LEAD_COL] = np.asarray(lead_cat.codes, dtype="int8")
+    write_columns(source_path, sheet_name, cols, [str(c) for c in lead_cat.categories])
+
+
+def write_columns(source_path, sheet_name, cols, lead_categories, ingest=None):
+    # cols: column -> typed array, LEAD_COL as int8 codes into lead_categories
+    # ingest: optional stats from the loader, kept in meta.json for reference
+    cache_dir = cache_dir_for(source_path)
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+
+    for col, arr in cols.items():
+        np.save(os.path.join(cache_dir, f"{col}.npy"), arr)
+
+    st = os.stat(source_path)
+    # meta.json is written last so a half-written snapshot is never trusted
+    _write_meta(cache_dir, {
+        "version": CACHE_VERSION,
+        "source": os.path.basename(source_path),
+        "sheet": sheet_name,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": file_sha256(source_path),
+        "n_rows": int(len(cols[TS_COL])),
+        "dtypes": COLUMN_DTYPES,
+        "lead_categories": list(lead_categories),
+        "ingest": ingest,
+    })
+
+
+def read_snapshot(cache_dir, meta):
+    # memory-map every column; nothing is parsed or copied up front
+    data = {}
+    for col in [TS_COL, LF_COL, HF_COL, SJE_COL, CJE_COL]:
+        data[col] = np.load(os.path.join(cache_dir, f"{col}.npy"), mmap_mode="r")
+
+    codes = np.load(os.path.join(cache_dir, f"{LEAD_COL}.npy"), mmap_mode="r")
+    data[LEAD_COL] = pd.Categorical.from_codes(codes, categories=meta["lead_categories"])
+
+    frame = pd.DataFrame(data, copy=False)
+    frame.attrs["sha256"] = meta["sha256"]
+    return frame
+
+
+def load_cached_frame(source_path, sheet_name, reader=None):
+    # Return the session frame for source_path, using the snapshot when it is
+    # still valid and (re)building it otherwise. The workbook is streamed into
+    # typed arrays (stream_ingest.py); a custom reader(path, sheet) returning
+    # a raw DataFrame can be passed instead.
+    cache_dir = cache_dir_for(source_path)
+    meta = _read_meta(cache_dir)
+
+    if snapshot_is_valid(source_path, sheet_name, meta):
+        st = os.stat(source_path)
+        if meta["mtime_ns"] != st.st_mtime_ns:
+            # same content, new mtime: remember it so we skip hashing next time
+            meta["mtime_ns"] = st.st_mtime_ns
+            meta["size"] = st.st_size
+            _write_meta(cache_dir, meta)
+        return read_snapshot(cache_dir, meta)
+
+    ingest = None
+    if reader is None:
+        from stream_ingest import stream_session     # builds on this module
+        result = stream_session(source_path, sheet_name)
+        cols, categories = result.cols, result.lead_categories
+        ingest = {"seconds": round(result.seconds, 3)}
+    else:
+        cols, lead_cat = to_typed_columns(reader(source_path, sheet_name))
+        cols[LEAD_COL] = np.asarray(lead_cat.codes, dtype="int8")
+        categories = [str(c) for c in lead_cat.categories]
+
+    try:
+        write_columns(source_path, sheet_name, cols, categories, ingest=ingest)
+    except OSError:
+        # read-only data dir etc: still serve the data, just uncached
+        cols[LEAD_COL] = pd.Categorical.from_codes(cols[LEAD_COL], categories=categories)
+        frame = pd.DataFrame(cols)
+        frame.attrs["sha256"] = file_sha256(source_path)
+        return frame
+
+    return read_snapshot(cache_dir, _read_meta(cache_dir))
@@ -0,0 +1,141 @@
+import base64
+
+import numpy as np
+
+# Compact JSON for the big figures (timelines, violins, PIT glyph).
+#
+# Plotly already sends the numpy arrays it validated as plotly.js typed
+# arrays ({"dtype", "bdata"}: base64 of the raw bytes, decoded straight into
+# a Float32Array etc.), but timestamps still go out as ISO strings (~30 bytes
+# each), lists as decimal text and floats at full float64 width.
+# pack_figure() rewrites the trace arrays of a figure so that
+#
+#   timestamps  -> epoch milliseconds (f8) on an axis typed "date", so
+#                  plotly.js still draws / labels dates and hover / click
+#                  events still report date strings
+#   floats      -> f4 when every value fits float32's exact integer range
+#                  (coherence, densities, positions; not epoch numbers)
+#   integers    -> the narrowest integer type
+#
+# Hover labels stay strings, but as fixed-width numpy string arrays: plotly's
+# orjson path (used when orjson is installed, see requirements.txt) hands
+# those over in one tolist() call, where lists and object arrays are walked
+# element by element on every response.
+#
+# Set to False to send the figures exactly as plotly builds them.
+BINARY_FIGURES = True
+
+# trace keys holding data arrays / hover label arrays
+ARRAY_KEYS = ("x", "y", "z", "values")
+LABEL_KEYS = ("text", "hovertext", "customdata")
+
+# float32 holds every integer below this exactly (and ~7 significant digits)
+F4_LIMIT = 2 ** 24
+
+INT_TYPES = (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32)
+
+
+def typed_array(values):
+    # numpy array -> plotly.js typed array spec (little-endian bytes)
+    arr = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    spec = {"dtype": arr.dtype.str[1:], "bdata": base64.b64encode(arr).decode("ascii")}
+    if arr.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in arr.shape)
+    return spec
+
+
+def _as_array(value, dates=False):
+    # trace data as a numpy array (None if it isn't an array of numbers /
+    # dates); dates=True also tries strings / Timestamps as datetimes
+    if isinstance(value, dict):
+        if "bdata" not in value:
+            return None
+        arr = np.frombuffer(base64.b64decode(value["bdata"]), dtype=np.dtype(value["dtype"]).newbyteorder("<"))
+        if "shape" in value:
+            arr = arr.reshape([int(n) for n in str(value["shape"]).split(",")])
+        return arr
+    if not isinstance(value, (list, tuple, np.ndarray)) or len(value) == 0:
+        return None
+    arr = np.asarray(value)
+    if arr.dtype.kind in "OUS" and dates:
+        try:
+            return arr.astype("datetime64[ns]")
+        except (ValueError, TypeError):
+            return None
+    return arr if arr.dtype.kind in "iufM" else None
+
+
+def epoch_ms(values):
+    # datetime64 -> float64 ms since the epoch (what plotly date axes take)
+    return values.astype("datetime64[ns]").astype(np.int64) / 1e6
+
+
+def pack_array(arr):
+    # narrowest typed array that keeps the values
+    if arr.dtype.kind == "M":
+        return typed_array(epoch_ms(arr))
+    finite = arr[np.isfinite(arr)] if arr.dtype.kind == "f" else arr
+    if arr.dtype.kind == "f" and np.array_equal(finite, np.round(finite)) and len(finite) == arr.size:
+        arr = arr.astype(np.int64)
+    if arr.dtype.kind in "iu":
+        lo, hi = (int(arr.min()), int(arr.max())) if arr.size else (0, 0)
+        for np_type in INT_TYPES:
+            info = np.iinfo(np_type)
+            if info.min <= lo and hi <= info.max:
+                return typed_array(arr.astype(np_type))
+        return typed_array(arr.astype(np.float64))
+    if finite.size == 0 or np.abs(finite).max() < F4_LIMIT:
+        return typed_array(arr.astype(np.float32))
+    return typed_array(arr.astype(np.float64))
+
+
+def pack_trace(trace):
+    # copy of a trace (or trace update) dict with packed data arrays;
+    # returns (trace, True if its x holds dates)
+    out = dict(trace)
+    x_dates = False
+    for key in LABEL_KEYS:
+        value = out.get(key)
+        if isinstance(value, np.ndarray) and value.dtype.kind == "U":
+            continue
+        if isinstance(value, (list, np.ndarray)) and len(value):
+            labels = np.asarray(value, dtype=object)
+            if all(isinstance(v, str) for v in labels.flat):
+                out[key] = labels.astype(str)
+    for key in ARRAY_KEYS:
+        if key not in out:
+            continue
+        arr = _as_array(out[key], dates=key == "x")
+        if arr is None or arr.size == 0:
+            continue
+        if key == "x" and arr.dtype.kind == "M":
+            x_dates = True
+        out[key] = pack_array(arr)
+    return out, x_dates
+
+
+def pack_figure(fig):
+    # figure (go.Figure or dict) -> dict with packed trace arrays; date x
+    # axes are typed "date" and their tick values sent as epoch ms
+    fig = fig.to_dict() if hasattr(fig, "to_dict") else fig
+    if not BINARY_FIGURES:
+        return fig
+
+    layout = dict(fig.get("layout", {}))
+    data = []
+    date_axes = set()
+    for trace in fig.get("data", []):
+        trace, x_dates = pack_trace(trace)
+        if x_dates:
+            date_axes.add("xaxis" + trace.get("xaxis", "x")[1:])
+        data.append(trace)
+
+    for axis in date_axes:
+        spec = dict(layout.get(axis, {}))
+        spec["type"] = "date"
+        ticks = _as_array(spec.get("tickvals"), dates=True)
+        if ticks is not None and ticks.dtype.kind == "M":
+            spec["tickvals"] = epoch_ms(ticks).tolist()
+        layout[axis] = spec
+
+    return {**fig, "data": data, "layout": layout}
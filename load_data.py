@@ -1,10 +1,24 @@
-import pandas as pd
+from data_cache import load_cached_frame
+from session_registry import REGISTRY, SHEET
 
-EXCEL_PATH = "data/Synch_Data.xlsx"                
-SHEET = 2                                        
+# The app reads dyads through session_registry (one workbook per dyad in
+# data/, loaded on demand). For scripts that only need the default dyad,
+# `df`, `SESSION` and `VIDEO` are still importable from here; they are loaded
+# on first access rather than at import.
 
-df = pd.read_excel(EXCEL_PATH, sheet_name=SHEET)   
+EXCEL_PATH = "data/Synch_Data.xlsx"
 
 VIDEO_PATH = "/assets/data_video/Dyad_Video.mp4"
 
-VIDEO = VIDEO_PATH                  
\ No newline at end of file
+
+def __getattr__(name):
+    # the dyad is only looked up for the names served here, so probes for
+    # other attributes (hasattr, copy, pickling ...) get a plain AttributeError
+    if name == "df":
+        # typed columnar snapshot next to the xlsx (rebuilt only when the xlsx changes)
+        return load_cached_frame(REGISTRY.dyad(REGISTRY.default_dyad_id()).data_path, sheet_name=SHEET)
+    if name == "SESSION":
+        return REGISTRY.get(REGISTRY.default_dyad_id())
+    if name == "VIDEO":
+        return REGISTRY.dyad(REGISTRY.default_dyad_id()).video
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,577 @@
+import argparse
+import base64
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import requests
+
+# Headless load test: N simulated viewers driving the Dash callback endpoint
+# (/_dash-update-component) directly, no browser.
+#
+#   python loadtest.py --clients 30 --duration 60 [--scenario mixed]
+#                      [--url http://127.0.0.1:8050] [--pid <server pid> ...]
+#                      [--replay recorded.jsonl] [--out loadtest.json]
+#
+# Each client fetches the layout and callback list the way the page does,
+# keeps its own copy of the component props, and then plays a scenario: a
+# stream of prop changes (video time, hovers, clicks, zooms). A change
+# triggers the server-side callbacks that take it as an Input -- with the
+# Inputs / States a browser would send -- and their outputs trigger further
+# callbacks, as in the renderer. Changes that only feed clientside callbacks
+# (e.g. the playback cursor with CLIENTSIDE_PLAYBACK) cost the server
+# nothing and are counted separately.
+#
+# Scenarios:
+#   playback   Play tab, video time advancing PLAYBACK_HZ times a second,
+#              with an occasional seek or zoom on the timeline
+#   hover      Home tab with point-in-time views, click the timeline and
+#              sweep the hover across it
+#   filter     click leaders on the synchrony bar, pick time windows
+#   zoom       zoom / pan the Home timeline
+#   mixed      every client picks one of the above (MIX weights)
+#   --replay   changes recorded by the app (CALLBACK_RECORD=file.jsonl),
+#              one simulated client per recorded browser
+#
+# Server CPU / memory are sampled from /proc for the given --pid (and its
+# child processes, e.g. gunicorn workers); Linux only.
+
+DEFAULT_URL = "http://127.0.0.1:8050"
+UPDATE_PATH = "/_dash-update-component"
+
+PLAYBACK_HZ = 4
+HOVER_HZ = 5
+FILTER_INTERVAL_S = 2.0
+ZOOM_INTERVAL_S = 1.0
+SEEK_EVERY = 40             # playback ticks between seeks / zooms
+MAX_CHAIN = 8               # callback chain depth followed per change
+
+MIX = {"playback": 0.6, "hover": 0.2, "filter": 0.1, "zoom": 0.1}
+
+SAMPLE_INTERVAL_S = 0.5
+TIMEOUT_S = 60
+
+
+def split_output(output):
+    # "..a.x...b.y.." / "a.x" -> [(id, prop)], with any "@hash" dropped
+    spec = output[2:-2].split("...") if output.startswith("..") else [output]
+    outputs = []
+    for item in spec:
+        component, prop = item.rsplit(".", 1)
+        outputs.append((component, prop.split("@")[0]))
+    return outputs
+
+
+class ServerCallbacks:
+    # the app's server-side callbacks, indexed by input prop
+    def __init__(self, dependencies):
+        self.callbacks = []
+        self.by_input = defaultdict(list)
+        self.derived = set()        # props written by server callbacks
+        for dep in dependencies:
+            if dep.get("clientside_function"):
+                continue
+            ids = [item["id"] for item in dep["inputs"] + dep["state"]]
+            if not all(isinstance(i, str) for i in ids):
+                continue            # pattern-matching (info tooltips)
+            cb = {
+                "output": dep["output"],
+                "outputs": split_output(dep["output"]),
+                "inputs": [(i["id"], i["property"]) for i in dep["inputs"]],
+                "state": [(s["id"], s["property"]) for s in dep["state"]],
+                "initial": not dep.get("prevent_initial_call"),
+            }
+            self.callbacks.append(cb)
+            for key in cb["inputs"]:
+                self.by_input[key].append(cb)
+            self.derived.update(cb["outputs"])
+
+
+class Stats:
+    def __init__(self):
+        self.calls = []             # (t, name, ms, status, sent, received)
+        self.events = 0
+        self.browser_only = 0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.lock = threading.Lock()
+
+    def call(self, name, ms, status, sent, received):
+        with self.lock:
+            self.calls.append((time.time(), name, ms, status, sent, received))
+
+    def event(self, sent_requests):
+        with self.lock:
+            self.events += 1
+            if not sent_requests:
+                self.browser_only += 1
+
+    def tick(self, late):
+        with self.lock:
+            self.ticks += 1
+            self.late_ticks += int(late)
+
+
+class DashClient:
+    # one simulated browser tab
+    def __init__(self, url, server, stats):
+        self.url = url.rstrip("/")
+        self.server = server
+        self.stats = stats
+        self.http = requests.Session()
+        self.values = {}            # (id, prop) -> value
+        self.ids = set()
+
+    def _collect(self, tree, added):
+        # remember every component's props (and which ids are new)
+        if isinstance(tree, list):
+            for item in tree:
+                self._collect(item, added)
+            return
+        if not isinstance(tree, dict):
+            return
+        props = tree.get("props")
+        if isinstance(props, dict) and "namespace" in tree:
+            cid = props.get("id")
+            if isinstance(cid, str):
+                if cid not in self.ids:
+                    added.add(cid)
+                self.ids.add(cid)
+                for prop, value in props.items():
+                    self.values[(cid, prop)] = value
+            for value in props.values():
+                if isinstance(value, (dict, list)):
+                    self._collect(value, added)
+
+    def open(self):
+        t0 = time.perf_counter()
+        resp = self.http.get(self.url + "/_dash-layout", timeout=TIMEOUT_S)
+        self.stats.call("GET layout", (time.perf_counter() - t0) * 1000,
+                        resp.status_code, 0, len(resp.content))
+        added = set()
+        self._collect(resp.json(), added)
+        self._fire_initial(added, depth=0)
+
+    def _fire_initial(self, added, depth):
+        # renderer: callbacks whose inputs just appeared run once
+        for cb in self.server.callbacks:
+            if not cb["initial"]:
+                continue
+            ids = {cid for cid, _ in cb["inputs"]}
+            if ids & added and all(cid in self.ids for cid in ids):
+                self._post(cb, [], depth)
+
+    def set(self, changes):
+        # changes: [(id, prop, value)] from one user action
+        for cid, prop, value in changes:
+            self.values[(cid, prop)] = value
+        keys = [(cid, prop) for cid, prop, _ in changes]
+        sent = self._trigger(keys, depth=0)
+        self.stats.event(sent)
+
+    def _trigger(self, keys, depth):
+        if depth >= MAX_CHAIN:
+            return 0
+        todo = []
+        for key in keys:
+            for cb in self.server.by_input.get(key, []):
+                if cb not in todo and all(cid in self.ids for cid, _ in cb["inputs"]):
+                    todo.append(cb)
+        sent = 0
+        for cb in todo:
+            changed = [f"{cid}.{prop}" for cid, prop in keys if (cid, prop) in cb["inputs"]]
+            sent += self._post(cb, changed, depth)
+        return sent
+
+    def _post(self, cb, changed, depth):
+        def entry(cid, prop):
+            return {"id": cid, "property": prop, "value": self.values.get((cid, prop))}
+
+        body = {
+            "output": cb["output"],
+            "outputs": [{"id": cid, "property": prop} for cid, prop in cb["outputs"]],
+            "inputs": [entry(*key) for key in cb["inputs"]],
+            "state": [entry(*key) for key in cb["state"]],
+            "changedPropIds": changed,
+        }
+        data = json.dumps(body)
+        # first output and what triggered it, e.g.
+        # "timeline-heatmap.figure,... <- timeline-heatmap.hoverData"
+        cid, prop = cb["outputs"][0]
+        name = f"{cid}.{prop}" + (",..." if len(cb["outputs"]) > 1 else "")
+        name += " <- " + (",".join(changed) or "initial")
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.post(self.url + UPDATE_PATH, data=data,
+                                  headers={"Content-Type": "application/json"}, timeout=TIMEOUT_S)
+        except requests.RequestException:
+            self.stats.call(name, (time.perf_counter() - t0) * 1000, 0, len(data), 0)
+            return 1
+        self.stats.call(name, (time.perf_counter() - t0) * 1000, resp.status_code, len(data), len(resp.content))
+        if resp.status_code != 200:
+            return 1
+
+        # apply the outputs, then run whatever depends on them
+        updated = []
+        added = set()
+        for cid, props in resp.json().get("response", {}).items():
+            for prop, value in props.items():
+                if isinstance(value, dict) and "__dash_patch_update" in value:
+                    continue        # partial update; our copy is close enough
+                self.values[(cid, prop)] = value
+                updated.append((cid, prop))
+                if prop == "children":
+                    self._collect(value, added)
+        if added:
+            self._fire_initial(added, depth + 1)
+        return 1 + self._trigger(updated, depth + 1)
+
+    # helpers for the scenarios
+    def click(self, cid):
+        clicks = (self.values.get((cid, "n_clicks")) or 0) + 1
+        self.set([(cid, "n_clicks", clicks)])
+
+    def timeline_range(self, graph_id):
+        # (start, end) timestamps of a timeline figure we were sent
+        fig = self.values.get((graph_id, "figure")) or {}
+        try:
+            x = fig["data"][0]["x"]
+            if isinstance(x, dict):
+                # typed array of epoch ms (figure_json)
+                ms = np.frombuffer(base64.b64decode(x["bdata"]), dtype=x["dtype"])
+                return pd.Timestamp(ms[0], unit="ms"), pd.Timestamp(ms[-1], unit="ms")
+            return pd.Timestamp(x[0]), pd.Timestamp(x[-1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+
+def _every(client, interval, end, step):
+    # step(i) every `interval` seconds until `end`; a tick is late when the
+    # previous one ran past its slot (the user would see a stall)
+    t0 = time.time()
+    i = 0
+    while True:
+        due = t0 + i * interval
+        if due >= end:
+            return
+        now = time.time()
+        if due > now:
+            time.sleep(due - now)
+        step(i)
+        client.stats.tick(time.time() - due > interval)
+        i += 1
+
+
+def scenario_playback(client, end, rng):
+    client.click("tab-play")
+    t = rng.uniform(0, 60)
+    span = client.timeline_range("play-heatmap-stack")
+    length = (span[1] - span[0]).total_seconds() if span else 600.0
+
+    def step(i):
+        nonlocal t
+        t += 1.0 / PLAYBACK_HZ
+        if i and i % SEEK_EVERY == 0:
+            t = rng.uniform(0, length)
+            if span:
+                x0 = span[0] + pd.Timedelta(seconds=rng.uniform(0, length / 2))
+                client.set([("play-heatmap-stack-view", "data",
+                             {"x0": x0.isoformat(), "x1": (x0 + (span[1] - span[0]) / 4).isoformat(),
+                              "width": 1200})])
+        client.set([("video-player", "currentTime", t)])
+
+    _every(client, 1.0 / PLAYBACK_HZ, end, step)
+
+
+def scenario_hover(client, end, rng):
+    client.set([("pit-toggle", "value", ["pit"])])
+    span = client.timeline_range("timeline-heatmap")
+    if span is None:
+        return
+    start, stop = span
+    length = (stop - start).total_seconds()
+    pos = rng.uniform(0, length)
+    point = lambda: {"points": [{"x": (start + pd.Timedelta(seconds=pos)).isoformat()}]}
+    client.set([("timeline-heatmap", "clickData", point())])
+
+    def step(i):
+        nonlocal pos
+        pos = (pos + rng.uniform(0.5, 3.0)) % length
+        client.set([("timeline-heatmap", "hoverData", point())])
+
+    _every(client, 1.0 / HOVER_HZ, end, step)
+
+
+def scenario_filter(client, end, rng):
+    span = client.timeline_range("timeline-heatmap")
+
+    def step(i):
+        if i % 2 == 0 or span is None:
+            leader = rng.choice(["Child", "Parent", None])
+            selected = {"points": [{"x": leader}]} if leader else None
+            client.set([("leading-behaviors", "selectedData", selected)])
+        else:
+            length = (span[1] - span[0]).total_seconds()
+            start = span[0] + pd.Timedelta(seconds=rng.uniform(0, max(length - 60, 0)))
+            client.set([("time-window-store", "data", {
+                "dyad": client.values.get(("dyad-picker", "value")),
+                "start": start.isoformat(),
+                "end": (start + pd.Timedelta(seconds=60)).isoformat(),
+            })])
+
+    _every(client, FILTER_INTERVAL_S, end, step)
+
+
+def scenario_zoom(client, end, rng):
+    span = client.timeline_range("timeline-heatmap")
+    if span is None:
+        return
+    length = (span[1] - span[0]).total_seconds()
+
+    def step(i):
+        width = length * rng.choice([1.0, 0.5, 0.1, 0.01])
+        x0 = span[0] + pd.Timedelta(seconds=rng.uniform(0, length - width))
+        client.set([("timeline-heatmap-view", "data", {
+            "x0": x0.isoformat(), "x1": (x0 + pd.Timedelta(seconds=width)).isoformat(), "width": 1200,
+        })])
+
+    _every(client, ZOOM_INTERVAL_S, end, step)
+
+
+SCENARIOS = {
+    "playback": scenario_playback,
+    "hover": scenario_hover,
+    "filter": scenario_filter,
+    "zoom": scenario_zoom,
+}
+
+
+def load_replay(path, server):
+    # recorded browsers -> [(offset_s, changes)], skipping props the server
+    # itself produces (replaying the input that caused them re-creates them)
+    clients = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            rec = json.loads(line)
+            changes = [
+                (c["id"], c["property"], c.get("value")) for c in rec["changes"]
+                if isinstance(c["id"], str) and (c["id"], c["property"]) not in server.derived
+            ]
+            if changes:
+                clients[rec["client"]].append((rec["t"], changes))
+    return [
+        [(t - events[0][0], changes) for t, changes in sorted(events, key=lambda e: e[0])]
+        for events in clients.values()
+    ]
+
+
+def scenario_replay(events):
+    def run(client, end, rng):
+        t0 = time.time()
+        for offset, changes in events:
+            due = t0 + offset
+            if due >= end:
+                return
+            if due > time.time():
+                time.sleep(due - time.time())
+            client.set(changes)
+            client.stats.tick(time.time() - due > 1.0)
+    return run
+
+
+def _proc_tree(pid):
+    # pid and all its descendants
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children[ppid].append(int(entry))
+    tree, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        tree.append(p)
+        todo.extend(children.get(p, []))
+    return tree
+
+
+def _proc_usage(pid):
+    # (cpu seconds, rss bytes) of one process
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+class ServerSampler(threading.Thread):
+    def __init__(self, pids):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.samples = []           # (t, cpu seconds, rss bytes)
+        self.stopped = threading.Event()
+
+    def sample(self):
+        cpu = rss = found = 0
+        for root in self.pids:
+            for pid in _proc_tree(root):
+                try:
+                    c, r = _proc_usage(pid)
+                except (OSError, IndexError, ValueError):
+                    continue
+                cpu += c
+                rss += r
+                found += 1
+        if found:
+            self.samples.append((time.time(), cpu, rss))
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(SAMPLE_INTERVAL_S)
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return None
+        t, cpu, rss = map(np.asarray, zip(*self.samples))
+        util = np.diff(cpu) / np.diff(t) * 100          # % of one core
+        return {
+            "cpu_percent_mean": float((cpu[-1] - cpu[0]) / (t[-1] - t[0]) * 100),
+            "cpu_percent_max": float(util.max()),
+            "rss_mb_start": float(rss[0] / 2**20),
+            "rss_mb_max": float(rss.max() / 2**20),
+            "rss_mb_end": float(rss[-1] / 2**20),
+        }
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return {}
+    return {f"p{p}": float(np.percentile(values, p)) for p in (50, 90, 95, 99)} | {"max": float(values.max())}
+
+
+def report(stats, seconds, clients, server):
+    calls = stats.calls
+    by_name = defaultdict(list)
+    for _, name, ms, status, sent, received in calls:
+        by_name[name].append((ms, status, sent, received))
+
+    all_ms = [c[2] for c in calls]
+    errors = sum(1 for c in calls if c[3] not in (200, 204))
+    result = {
+        "clients": clients,
+        "seconds": seconds,
+        "requests": len(calls),
+        "requests_per_s": len(calls) / seconds if seconds else 0.0,
+        "errors": errors,
+        "events": stats.events,
+        "browser_only_events": stats.browser_only,
+        "ticks": stats.ticks,
+        "late_ticks": stats.late_ticks,
+        "latency_ms": percentiles(all_ms),
+        "callbacks": {
+            name: {
+                "requests": len(rows),
+                "errors": sum(1 for r in rows if r[1] not in (200, 204)),
+                "latency_ms": percentiles([r[0] for r in rows]),
+                "request_kb_mean": statistics.mean(r[2] for r in rows) / 1024,
+                "response_kb_mean": statistics.mean(r[3] for r in rows) / 1024,
+            }
+            for name, rows in sorted(by_name.items())
+        },
+        "server": server,
+    }
+
+    print(f"\n{clients} clients, {seconds:.0f}s: {len(calls):,} requests "
+          f"({result['requests_per_s']:.1f}/s), {errors} errors")
+    print(f"user actions: {stats.events:,}, handled in the browser only: {stats.browser_only:,}; "
+          f"ticks late: {stats.late_ticks:,} / {stats.ticks:,}")
+    lat = result["latency_ms"]
+    if lat:
+        print(f"latency ms: p50 {lat['p50']:.0f}  p95 {lat['p95']:.0f}  p99 {lat['p99']:.0f}  max {lat['max']:.0f}")
+    print(f"\n{'callback':72s} {'req':>7s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'resp KB':>8s}")
+    for name, row in result["callbacks"].items():
+        lat = row["latency_ms"]
+        print(f"{name[:72]:72s} {row['requests']:7,d} {lat['p50']:7.0f} {lat['p95']:7.0f} "
+              f"{lat['p99']:7.0f} {row['response_kb_mean']:8.1f}")
+    if server:
+        print(f"\nserver CPU {server['cpu_percent_mean']:.0f}% of a core on average "
+              f"(max {server['cpu_percent_max']:.0f}%), RSS {server['rss_mb_start']:.0f} -> "
+              f"{server['rss_mb_max']:.0f} MB peak")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard's callback endpoint.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--clients", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--scenario", default="mixed", choices=[*SCENARIOS, "mixed"])
+    parser.add_argument("--replay", default=None, help="JSONL recorded with CALLBACK_RECORD")
+    parser.add_argument("--pid", type=int, action="append", default=[],
+                        help="server process to sample (repeatable; children included)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which clients start")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    server = ServerCallbacks(requests.get(args.url + "/_dash-dependencies", timeout=TIMEOUT_S).json())
+    stats = Stats()
+
+    if args.replay:
+        plans = [scenario_replay(events) for events in load_replay(args.replay, server)]
+        n_clients = len(plans)
+    else:
+        rng = random.Random(args.seed)
+        names = list(MIX)
+        plans = [
+            SCENARIOS[args.scenario if args.scenario != "mixed"
+                      else rng.choices(names, weights=[MIX[n] for n in names])[0]]
+            for _ in range(args.clients)
+        ]
+        n_clients = args.clients
+
+    sampler = ServerSampler(args.pid) if args.pid else None
+    if sampler:
+        sampler.start()
+
+    t_start = time.time()
+    end = t_start + args.ramp + args.duration
+
+    def run_client(i, plan):
+        time.sleep(args.ramp * i / max(n_clients, 1))
+        client = DashClient(args.url, server, stats)
+        client.open()
+        plan(client, end, random.Random(args.seed * 1000 + i))
+
+    threads = [threading.Thread(target=run_client, args=(i, plan), daemon=True) for i, plan in enumerate(plans)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if sampler:
+        sampler.stopped.set()
+        sampler.join()
+    usage = sampler.summary() if sampler else None
+    if sampler and usage is None:
+        print(f"no running process found for --pid {args.pid}")
+    result = report(stats, time.time() - t_start, n_clients, usage)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=1)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
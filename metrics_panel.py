@@ -0,0 +1,96 @@
+import numpy as np
+import plotly.graph_objects as go
+from dash import html
+
+from callback_metrics import LATENCY_BUCKETS_MS
+
+# Tables / figures for the hidden Metrics tab, drawn from
+# callback_metrics.METRICS.snapshot().
+
+CELL_STYLE = {
+    "padding": "4px 8px",
+    "borderBottom": "1px solid #ccc",
+    "fontSize": "13px",
+    "fontFamily": "Lato, sans-serif",
+    "textAlign": "right",
+    "whiteSpace": "nowrap",
+}
+
+# (header, field, stat, scale, format)
+COLUMNS = [
+    ("Calls", None, "count", 1, "{:,.0f}"),
+    ("Calls/s (1 min)", None, "rate_per_s", 1, "{:.2f}"),
+    ("No update", None, "prevented", 1, "{:,.0f}"),
+    ("Errors", None, "errors", 1, "{:,.0f}"),
+    ("p50 ms", "wall_ms", "p50", 1, "{:.1f}"),
+    ("p90 ms", "wall_ms", "p90", 1, "{:.1f}"),
+    ("p99 ms", "wall_ms", "p99", 1, "{:.1f}"),
+    ("Response KB p50", "response_bytes", "p50", 1 / 1024, "{:.1f}"),
+    ("Response KB p99", "response_bytes", "p99", 1 / 1024, "{:.1f}"),
+    ("Request KB p50", "request_bytes", "p50", 1 / 1024, "{:.1f}"),
+    ("Request KB p99", "request_bytes", "p99", 1 / 1024, "{:.1f}"),
+    ("State KB p99", "state_bytes", "p99", 1 / 1024, "{:.1f}"),
+]
+
+
+def make_metrics_table(snapshot):
+    callbacks = snapshot["callbacks"]
+    if not callbacks:
+        return html.Div("No callbacks recorded yet.", style={"fontSize": "14px"})
+
+    # slowest (by p99) first
+    order = sorted(callbacks, key=lambda name: -callbacks[name]["wall_ms"]["p99"])
+    header = html.Tr(
+        [html.Th("Callback", style={**CELL_STYLE, "textAlign": "left"})]
+        + [html.Th(title, style=CELL_STYLE) for title, *_ in COLUMNS]
+    )
+    rows = []
+    for name in order:
+        stats = callbacks[name]
+        cells = [html.Td(name, style={**CELL_STYLE, "textAlign": "left"})]
+        for _, field, stat, scale, fmt in COLUMNS:
+            value = stats[stat] if field is None else stats[field][stat]
+            cells.append(html.Td(fmt.format(value * scale), style=CELL_STYLE))
+        rows.append(html.Tr(cells))
+
+    return html.Table(
+        style={"width": "100%", "borderCollapse": "collapse"},
+        children=[html.Thead(header), html.Tbody(rows)],
+    )
+
+
+def make_latency_histogram(snapshot):
+    # share of each callback's calls per wall-time bucket
+    callbacks = snapshot["callbacks"]
+    names = sorted(callbacks)
+    labels = [
+        f"≤{edge:g} ms" if np.isfinite(edge) else f">{LATENCY_BUCKETS_MS[-2]:g} ms"
+        for edge in LATENCY_BUCKETS_MS
+    ]
+
+    z = []
+    for name in names:
+        cumulative = np.array([c for _, c in callbacks[name]["wall_ms"]["buckets"]], dtype=float)
+        counts = np.diff(cumulative, prepend=0.0)
+        z.append(counts / counts.sum() * 100 if counts.sum() else counts)
+
+    fig = go.Figure(
+        go.Heatmap(
+            x=labels,
+            y=names,
+            z=z,
+            colorscale="BuPu",
+            zmin=0,
+            zmax=100,
+            colorbar=dict(title="% of calls"),
+            hovertemplate="%{y}<br>%{x}: %{z:.1f}% of calls<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        margin=dict(l=200, r=20, t=20, b=40),
+        height=max(240, 40 * len(names) + 80),
+        font=dict(family="Lato, sans-serif", color="black"),
+        plot_bgcolor="white",
+    )
+    fig.update_xaxes(title_text="Wall time per call")
+    return fig
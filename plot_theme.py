@@ -0,0 +1,13 @@
+import plotly.io as pio
+
+# Default plotly template of the dashboard: plotly_white with the app font.
+# Imported by app.py and by precompute.py, whose worker processes build the
+# stored figures, so both get the same template baked into their layouts.
+
+DEFAULT_FONT = "Lato, sans-serif"
+
+lato_template = pio.templates["plotly_white"]
+lato_template.layout.font.family = DEFAULT_FONT
+
+pio.templates["lato"] = lato_template
+pio.templates.default = "lato"
@@ -0,0 +1,95 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plot_theme  # same default template as the app, for the stored figures
+from artifacts import ARTIFACT_DIR, has_artifacts, write_artifacts
+from cohort_sketch import SummarySketch
+from data_cache import load_cached_frame, snapshot_sha256
+from prepared_session import PreparedSession
+from run_length import extract_events
+from session_registry import DATA_DIR, SHEET, SessionRegistry
+from figure_json import pack_figure
+from vid_heatmaps import TIMELINE_COLUMNS, make_stacked_heatmaps
+from view_summary.sum_table import compute_summary_metrics
+
+# Batch precompute for a whole cohort:
+#
+#   python precompute.py [--data-dir data] [--workers N] [--force]
+#
+# For every dyad in the data directory (one process per core) this builds the
+# columnar snapshot / prepared session, the summary metrics, the event tables,
+# the base timeline figure and the cohort sketch, and writes them to the
+# artifact cache that the app reads from (artifacts.ARTIFACT_DIR, always
+# data/.artifacts whatever --data-dir is). Dyads whose workbook hasn't changed
+# since the last run are skipped.
+
+
+def is_up_to_date(data_path):
+    # snapshot still matches the workbook and its artifacts are complete
+    sha = snapshot_sha256(data_path, SHEET)
+    return sha is not None and has_artifacts(sha)
+
+
+def precompute_dyad(dyad_id, data_path, force=False):
+    # runs in a worker process; returns (dyad_id, status, seconds)
+    t0 = time.perf_counter()
+    if not force and is_up_to_date(data_path):
+        return dyad_id, "skipped", time.perf_counter() - t0
+
+    df = load_cached_frame(data_path, sheet_name=SHEET)
+    session = PreparedSession.from_frame(df, session_id=df.attrs.get("sha256", data_path))
+
+    events = extract_events(session)
+    write_artifacts(
+        session.session_id,
+        session.n,
+        summary=compute_summary_metrics(session, events=events),
+        events=events,
+        # built fresh, not through get_timeline_figure (which would hand back
+        # the stored timeline on --force)
+        timelines={"base": pack_figure(make_stacked_heatmaps(session, raster=False))},
+        timeline_columns=TIMELINE_COLUMNS,
+        sketch=SummarySketch.from_session(session, events=events).to_dict(),
+    )
+    return dyad_id, "built", time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute per-dyad artifacts for the dashboard.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if unchanged")
+    args = parser.parse_args(argv)
+
+    dyads = SessionRegistry(args.data_dir).dyads()
+    print(f"{len(dyads)} dyads in {args.data_dir}, {args.workers} workers, writing to {ARTIFACT_DIR}")
+
+    t0 = time.perf_counter()
+    counts = {"built": 0, "skipped": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(precompute_dyad, d.dyad_id, d.data_path, args.force): d.dyad_id
+            for d in dyads.values()
+        }
+        for future in as_completed(futures):
+            try:
+                dyad_id, status, secs = future.result()
+            except Exception as exc:
+                counts["failed"] += 1
+                print(f"  {futures[future]}: failed ({exc})")
+                continue
+            counts[status] += 1
+            print(f"  {dyad_id}: {status} in {secs:.2f}s")
+
+    print(
+        f"done in {time.perf_counter() - t0:.1f}s: "
+        f"{counts['built']} built, {counts['skipped']} skipped, {counts['failed']} failed"
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from timeline_lod import TimelinePyramid
+from window_stats import WindowIndex
+
+# One normalized, time-sorted copy of a session that every view reads from.
+# All the coercion / sorting / label mapping the figure builders used to do on
+# their own df.copy() happens here exactly once.
+
+TS_COL = "timestamp"
+LF_COL = "lf_coh"
+HF_COL = "hf_coh"
+SJE_COL = "sje"
+CJE_COL = "cje"
+LEAD_COL = "leading"
+
+# leading_num: 0 = none, 1 = child (C), 2 = parent (P)
+LEAD_NONE, LEAD_CHILD, LEAD_PARENT = 0, 1, 2
+
+# engagement: 0 = none, 1 = SJE, 2 = CJE
+ENG_NONE, ENG_SJE, ENG_CJE = 0, 1, 2
+
+
+def _leading_codes(values):
+    # first letter of the (stripped, upper-cased) leading value -> leading_num
+    lead = pd.Series(values).astype("string").str.strip().str.upper().str[:1]
+    codes = np.zeros(len(lead), dtype="int8")
+    codes[(lead == "C").fillna(False).to_numpy()] = LEAD_CHILD
+    codes[(lead == "P").fillna(False).to_numpy()] = LEAD_PARENT
+    return codes
+
+
+class PreparedSession:
+    # Arrays (all length n, sorted by timestamp):
+    #   timestamp    datetime64[ns]
+    #   elapsed      float64 seconds since the first sample
+    #   lf, hf       float32 coherence, NaN -> 0 (rows of `coherence`)
+    #   coherence    (2, n) float32, row 0 = LF, row 1 = HF (heatmap z as-is)
+    #   sje, cje     int8 0/1
+    #   engagement   int8 0/1/2
+    #   leading_num  int8 0/1/2
+
+    def __init__(self, session_id, timestamp, coherence, sje, cje, leading_num):
+        self.session_id = session_id
+        self.timestamp = timestamp
+        self.coherence = coherence
+        self.lf = coherence[0]
+        self.hf = coherence[1]
+        self.sje = sje
+        self.cje = cje
+        self.leading_num = leading_num
+        self.n = len(timestamp)
+
+        # same precedence as the heatmap / pie: sje is checked before cje
+        self.engagement = np.select(
+            [sje == 1, cje == 1], [ENG_SJE, ENG_CJE], default=ENG_NONE
+        ).astype("int8")
+
+        if self.n:
+            self.elapsed = (timestamp - timestamp[0]) / np.timedelta64(1, "s")
+        else:
+            self.elapsed = np.zeros(0, dtype="float64")
+
+        # pandas view of the timestamps for searchsorted / Timestamp math
+        self.time_index = pd.DatetimeIndex(timestamp)
+
+        self._window_index = None
+        self._timeline_pyramid = None
+        # called with no arguments after a lazy index is built (and nbytes
+        # grew); the session registry uses it to re-check its memory budget
+        self.on_index_built = None
+
+    @classmethod
+    def from_frame(cls, df, session_id="default"):
+        ts = pd.to_datetime(df[TS_COL], errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+        # drop rows without a timestamp, then sort once (stable keeps ties in file order)
+        keep = ~np.isnat(ts)
+        order = np.argsort(ts[keep], kind="stable")
+        rows = np.flatnonzero(keep)[order]
+
+        coherence = np.empty((2, len(rows)), dtype="float32")
+        for r, col in enumerate([LF_COL, HF_COL]):
+            vals = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float32")
+            coherence[r] = np.nan_to_num(vals[rows], nan=0.0)
+
+        flags = []
+        for col in [SJE_COL, CJE_COL]:
+            vals = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy()
+            flags.append(vals[rows].astype("int8"))
+
+        leading_num = _leading_codes(np.asarray(df[LEAD_COL], dtype=object)[rows])
+
+        return cls(session_id, ts[rows], coherence, flags[0], flags[1], leading_num)
+
+    def subset(self, rows):
+        # rows: boolean mask, index array or slice -> new (smaller) session
+        return PreparedSession(
+            self.session_id,
+            self.timestamp[rows],
+            self.coherence[:, rows],
+            self.sje[rows],
+            self.cje[rows],
+            self.leading_num[rows],
+        )
+
+    def nearest_index(self, when):
+        # index of the sample closest to `when` (ties go to the earlier one)
+        if self.n == 0:
+            return 0
+        when = np.datetime64(pd.Timestamp(when), "ns")
+        pos = int(np.searchsorted(self.timestamp, when))
+        if pos <= 0:
+            return 0
+        if pos >= self.n:
+            return self.n - 1
+        before = self.timestamp[pos - 1]
+        after = self.timestamp[pos]
+        return pos - 1 if (when - before) <= (after - when) else pos
+
+    def clamp_index(self, idx):
+        return max(0, min(int(idx), self.n - 1))
+
+    @property
+    def window_index(self):
+        # prefix sums for O(1) windowed stats, built on first use
+        if self._window_index is None:
+            self._window_index = WindowIndex(self)
+            self._index_built()
+        return self._window_index
+
+    @property
+    def timeline_pyramid(self):
+        # pooled levels for the timeline heatmaps, built on first use
+        if self._timeline_pyramid is None:
+            self._timeline_pyramid = TimelinePyramid(self)
+            self._index_built()
+        return self._timeline_pyramid
+
+    def _index_built(self):
+        if self.on_index_built is not None:
+            self.on_index_built()
+
+    @property
+    def sample_seconds(self):
+        # mean sample interval, for turning sample counts (event durations)
+        # into seconds
+        return float(self.elapsed[-1]) / (self.n - 1) if self.n > 1 else 1.0
+
+    @property
+    def nbytes(self):
+        # memory held by this session, including the lazily built indexes
+        arrays = [
+            self.timestamp, self.coherence, self.sje, self.cje,
+            self.leading_num, self.engagement, self.elapsed,
+        ]
+        total = sum(a.nbytes for a in arrays)
+        if self._window_index is not None:
+            total += self._window_index.nbytes
+        if self._timeline_pyramid is not None:
+            total += self._timeline_pyramid.nbytes
+        return total
+
+    @property
+    def start(self):
+        return self.time_index[0]
+
+    @property
+    def end(self):
+        return self.time_index[-1]
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Run-length "events": an event is a contiguous sequence of True values in a
+# boolean mask (e.g. coherence >= 0.5, or sje/cje == 1). Everything is found in
+# one vectorized pass, so long or high-rate sessions stay cheap.
+
+# starts    index of the first sample of each event
+# ends      index one past the last sample of each event (exclusive)
+# durations number of samples in each event (ends - starts)
+# leaders   value of `leaders` at each event onset (None if not given)
+EventRuns = namedtuple("EventRuns", ["starts", "ends", "durations", "leaders"])
+
+# coherence at or above this counts as a synchrony event
+THRESH = 0.5
+
+
+def find_runs(mask, leaders=None):
+    mask = np.asarray(mask, dtype=bool)
+
+    # +1 where a run starts, -1 one past where it ends
+    edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    durations = ends - starts
+
+    onset_leaders = None
+    if leaders is not None:
+        onset_leaders = np.asarray(leaders)[starts]
+
+    return EventRuns(starts, ends, durations, onset_leaders)
+
+
+def extract_events(session):
+    # the session's event tables, with the leader at each onset:
+    #   lf / hf   runs of LF / HF coherence >= THRESH
+    #   joint     runs of joint engagement (sje or cje)
+    return {
+        "lf": find_runs(session.lf >= THRESH, leaders=session.leading_num),
+        "hf": find_runs(session.hf >= THRESH, leaders=session.leading_num),
+        "joint": find_runs((session.sje == 1) | (session.cje == 1), leaders=session.leading_num),
+    }
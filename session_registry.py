@@ -0,0 +1,249 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+
+from data_cache import load_cached_frame
+from prepared_session import PreparedSession
+
+# Registry of the dyads found in the data directory.
+#
+# A dyad is one workbook in DATA_DIR (data/<dyad>.xlsx), with its video at
+# assets/data_video/<dyad>.mp4. Discovery only lists file names; a dyad's
+# data is read the first time it is selected, and prepared sessions are kept
+# in an LRU that is trimmed by memory use (SESSION_CACHE_BYTES), so startup
+# cost does not depend on how many dyads there are.
+#
+# Hot reload: watch() polls the workbooks of the loaded dyads. A changed file
+# is re-read in the background, the on_reload hooks warm whatever is derived
+# from the new session, and only then is the new session swapped in. A
+# callback that already holds the old session keeps using it (and can still
+# look it up by id), so it never mixes data from two versions; dyads whose
+# files didn't change are left alone.
+
+DATA_DIR = "data"
+VIDEO_DIR = "assets/data_video"
+VIDEO_URL = "/assets/data_video/{}"
+DATA_EXTENSIONS = (".xlsx", ".csv")
+SHEET = 2
+
+# the original single-dyad install: data/Synch_Data.xlsx + Dyad_Video.mp4
+DEFAULT_VIDEO = "Dyad_Video.mp4"
+DYAD_LABELS = {"Synch_Data": "T123"}
+
+SESSION_CACHE_BYTES = 512 * 1024 ** 2
+
+RELOAD_POLL_S = 2.0
+
+logger = logging.getLogger(__name__)
+
+Dyad = namedtuple("Dyad", ["dyad_id", "label", "data_path", "video"])
+
+
+class SessionRegistry:
+    def __init__(self, data_dir=DATA_DIR, video_dir=VIDEO_DIR, max_bytes=SESSION_CACHE_BYTES):
+        self.data_dir = data_dir
+        self.video_dir = video_dir
+        self.max_bytes = max_bytes
+
+        self._dyads = None
+        self._dir_mtime = None
+        self._sessions = OrderedDict()      # dyad_id -> PreparedSession
+        self._lock = threading.Lock()
+        self._load_locks = {}               # dyad_id -> Lock (one loader per dyad)
+        self._stamps = {}                   # dyad_id -> file (mtime, size) it was loaded from
+        self._by_id = weakref.WeakValueDictionary()     # session_id -> session, while in use
+        self._reload_hooks = []
+
+    def _video_for(self, dyad_id):
+        for name in (dyad_id + ".mp4", DEFAULT_VIDEO):
+            if os.path.exists(os.path.join(self.video_dir, name)):
+                return VIDEO_URL.format(name)
+        return VIDEO_URL.format(DEFAULT_VIDEO)
+
+    def _scan(self):
+        dyads = OrderedDict()
+        with os.scandir(self.data_dir) as entries:
+            names = sorted(e.name for e in entries if e.is_file())
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            # skip hidden files and Excel lock files (~$name.xlsx)
+            if ext.lower() not in DATA_EXTENSIONS or name.startswith((".", "~$")):
+                continue
+            dyads[stem] = Dyad(
+                stem,
+                DYAD_LABELS.get(stem, stem),
+                os.path.join(self.data_dir, name),
+                self._video_for(stem),
+            )
+        return dyads
+
+    def dyads(self):
+        # dyad_id -> Dyad; rescanned only when the directory listing changes
+        mtime = os.stat(self.data_dir).st_mtime_ns
+        with self._lock:
+            if self._dyads is None or mtime != self._dir_mtime:
+                self._dyads = self._scan()
+                self._dir_mtime = mtime
+            return self._dyads
+
+    def dyad(self, dyad_id):
+        dyads = self.dyads()
+        if dyad_id not in dyads:
+            raise KeyError(f"unknown dyad: {dyad_id!r}")
+        return dyads[dyad_id]
+
+    def default_dyad_id(self):
+        dyads = self.dyads()
+        return next(iter(dyads), None)
+
+    def options(self):
+        # dcc.Dropdown options for the dyad picker
+        return [{"label": f"Dyad {d.label}", "value": d.dyad_id} for d in self.dyads().values()]
+
+    def _load(self, dyad):
+        df = load_cached_frame(dyad.data_path, sheet_name=SHEET)
+        session = PreparedSession.from_frame(df, session_id=df.attrs.get("sha256", dyad.data_path))
+        # the lazy window index / timeline pyramid grow nbytes after insert
+        session.on_index_built = self._trim
+        self._by_id[session.session_id] = session
+        return session
+
+    def get(self, dyad_id):
+        # prepared session for a dyad, loading it on first use
+        with self._lock:
+            session = self._sessions.get(dyad_id)
+            if session is not None:
+                self._sessions.move_to_end(dyad_id)
+                return session
+            load_lock = self._load_locks.setdefault(dyad_id, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                session = self._sessions.get(dyad_id)
+            if session is None:
+                dyad = self.dyad(dyad_id)
+                # stamp taken first: a write during the load is seen next poll
+                stamp = _file_stamp(dyad.data_path)
+                session = self._load(dyad)
+                with self._lock:
+                    self._sessions[dyad_id] = session
+                    self._stamps[dyad_id] = stamp
+                    self._evict()
+        return session
+
+    def session(self, session_id):
+        # a session by id: the current one of some dyad, or an older version
+        # that an in-flight callback is still holding
+        session = self._by_id.get(session_id)
+        if session is None:
+            raise KeyError(f"session {session_id!r} is no longer loaded")
+        return session
+
+    def on_reload(self, hook):
+        # hook(dyad_id, session) runs on the reload thread before the swap
+        self._reload_hooks.append(hook)
+
+    def reload_changed(self):
+        # re-read the loaded dyads whose workbook changed; returns the ids
+        # that got a new session
+        dyads = self.dyads()
+        swapped = []
+        for dyad_id in self.cached_dyads():
+            dyad = dyads.get(dyad_id)
+            if dyad is None:
+                # file removed: stop serving it
+                with self._lock:
+                    self._sessions.pop(dyad_id, None)
+                    self._stamps.pop(dyad_id, None)
+                continue
+
+            stamp = _file_stamp(dyad.data_path)
+            if stamp is None or stamp == self._stamps.get(dyad_id):
+                continue
+
+            with self._load_locks.setdefault(dyad_id, threading.Lock()):
+                try:
+                    session = self._load(dyad)
+                except Exception:
+                    # e.g. caught mid-save; keep the old session and retry on
+                    # the next change
+                    logger.exception("reload of %s failed", dyad_id)
+                    with self._lock:
+                        self._stamps[dyad_id] = stamp
+                    continue
+
+                with self._lock:
+                    old = self._sessions.get(dyad_id)
+                if old is None or old.session_id != session.session_id:
+                    for hook in self._reload_hooks:
+                        try:
+                            hook(dyad_id, session)
+                        except Exception:
+                            # only a warm-up; the callbacks build it on demand
+                            logger.exception("reload hook failed for %s", dyad_id)
+                    swapped.append(dyad_id)
+                else:
+                    # touched, same content: keep the session already in use
+                    session = old
+                    self._by_id[session.session_id] = session
+                with self._lock:
+                    if dyad_id in self._sessions:
+                        self._sessions[dyad_id] = session
+                    self._stamps[dyad_id] = stamp
+                    self._evict()
+        return swapped
+
+    def watch(self, interval=RELOAD_POLL_S):
+        # poll for changed workbooks on a daemon thread
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    for dyad_id in self.reload_changed():
+                        logger.info("reloaded dyad %s", dyad_id)
+                except Exception:
+                    logger.exception("reload check failed")
+
+        thread = threading.Thread(target=run, name="session-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def _evict(self):
+        # drop least recently used sessions until under budget (always keep
+        # the newest one, however big it is)
+        while len(self._sessions) > 1 and self.cached_bytes() > self.max_bytes:
+            dyad_id, _ = self._sessions.popitem(last=False)
+            self._stamps.pop(dyad_id, None)
+
+    def _trim(self):
+        with self._lock:
+            self._evict()
+
+    def cached_bytes(self):
+        return sum(s.nbytes for s in self._sessions.values())
+
+    def cached_dyads(self):
+        with self._lock:
+            return list(self._sessions)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+REGISTRY = SessionRegistry()
+
+
+def get_session(dyad_id):
+    return REGISTRY.get(dyad_id)
+
+
+def session_by_id(session_id):
+    return REGISTRY.session(session_id)
@@ -0,0 +1,170 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from data_cache import COLUMN_DTYPES, LEAD_COL, TS_COL, to_typed_columns
+
+# Streaming ingest of session exports.
+#
+# pd.read_excel builds the whole workbook (every sheet, every column) as an
+# openpyxl object model and then a DataFrame on top of it. Here the needed
+# sheet is read row by row (openpyxl read-only mode) or in chunks (CSV), only
+# the session columns are kept, and each block of rows is converted and
+# written straight into preallocated typed arrays. Peak memory is then the
+# final arrays plus one block, whatever the length of the recording.
+#
+#   python stream_ingest.py data/T123.xlsx [--sheet 2]
+
+BLOCK_ROWS = 16384          # rows converted at a time
+CSV_EXTENSIONS = (".csv",)
+
+COLUMNS = list(COLUMN_DTYPES)
+
+# cols: column -> typed array (LEAD_COL holds int8 codes into lead_categories)
+IngestResult = namedtuple("IngestResult", ["cols", "lead_categories", "n_rows", "seconds"])
+
+
+def peak_rss_bytes():
+    # high-water mark of this process' resident memory over its whole
+    # lifetime, so only meaningful for a fresh process (see main). None where
+    # there is no resource module (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024     # linux reports KiB
+
+
+class TypedColumns:
+    # preallocated output arrays, grown by doubling when the row count
+    # isn't known up front (or was understated)
+
+    def __init__(self, capacity):
+        self.n = 0
+        self.arrays = {}
+        self._alloc(max(int(capacity), 1))
+        self.lead_index = {}            # category -> code, in order seen
+
+    def _alloc(self, capacity):
+        old = self.arrays
+        self.arrays = {}
+        for col, dtype in COLUMN_DTYPES.items():
+            dtype = "int8" if dtype == "category" else dtype
+            self.arrays[col] = np.empty(capacity, dtype=dtype)
+            if col in old:
+                self.arrays[col][:self.n] = old[col][:self.n]
+
+    def append(self, block):
+        # block: DataFrame of raw rows; converted exactly like a full read
+        size = len(block)
+        if size == 0:
+            return
+        capacity = len(self.arrays[TS_COL])
+        if self.n + size > capacity:
+            self._alloc(max(2 * capacity, self.n + size))
+
+        cols, lead_cat = to_typed_columns(block)
+        end = self.n + size
+        for col, arr in cols.items():
+            self.arrays[col][self.n:end] = arr
+
+        # block-local category codes -> codes shared across blocks
+        remap = np.array(
+            [self.lead_index.setdefault(str(c), len(self.lead_index)) for c in lead_cat.categories],
+            dtype="int8",
+        )
+        codes = np.asarray(lead_cat.codes)
+        self.arrays[LEAD_COL][self.n:end] = np.where(codes >= 0, remap[codes] if len(remap) else -1, -1)
+        self.n = end
+
+    def finish(self):
+        # trim to the rows read and sort the categories like pd.Categorical does
+        cols = {col: arr[:self.n] for col, arr in self.arrays.items()}
+        categories = sorted(self.lead_index, key=self.lead_index.get)
+        order = np.argsort(categories, kind="stable")
+        new_code = np.empty(len(categories), dtype="int8")
+        new_code[order] = np.arange(len(categories), dtype="int8")
+        codes = cols[LEAD_COL]
+        cols[LEAD_COL] = np.where(codes >= 0, new_code[codes] if len(categories) else -1, -1).astype("int8")
+        return cols, [categories[i] for i in order]
+
+
+def _iter_xlsx_blocks(path, sheet):
+    # (expected row count or 0, iterator of raw DataFrame blocks)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    index = {name: i for i, name in enumerate(header) if name is not None}
+    missing = [col for col in COLUMNS if col not in index]
+    if missing:
+        wb.close()
+        raise KeyError(f"{path}: sheet {sheet!r} has no column(s) {missing}")
+    take = [index[col] for col in COLUMNS]
+    expected = (ws.max_row or 1) - 1
+
+    def blocks():
+        try:
+            buf = []
+            for row in rows:
+                buf.append([row[i] if i < len(row) else None for i in take])
+                if len(buf) == BLOCK_ROWS:
+                    yield pd.DataFrame(buf, columns=COLUMNS)
+                    buf = []
+            if buf:
+                yield pd.DataFrame(buf, columns=COLUMNS)
+        finally:
+            wb.close()
+
+    return expected, blocks()
+
+
+def _iter_csv_blocks(path):
+    # rough row count from the file size keeps regrowth to a copy or two
+    with open(path, "rb") as f:
+        head = f.read(1 << 16)
+    lines = max(head.count(b"\n"), 1)
+    expected = int(os.path.getsize(path) / (len(head) / lines)) if head else 0
+    return expected, pd.read_csv(path, usecols=COLUMNS, chunksize=BLOCK_ROWS)
+
+
+def stream_session(path, sheet):
+    t0 = time.perf_counter()
+    if path.lower().endswith(CSV_EXTENSIONS):
+        expected, blocks = _iter_csv_blocks(path)
+    else:
+        expected, blocks = _iter_xlsx_blocks(path, sheet)
+
+    out = TypedColumns(expected)
+    for block in blocks:
+        out.append(block)
+    cols, categories = out.finish()
+    return IngestResult(cols, categories, out.n, time.perf_counter() - t0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream one session export into typed arrays.")
+    parser.add_argument("path")
+    parser.add_argument("--sheet", type=int, default=2, help="worksheet index (xlsx only)")
+    args = parser.parse_args(argv)
+
+    before = peak_rss_bytes()
+    result = stream_session(args.path, args.sheet)
+    peak = peak_rss_bytes()
+    arrays_mb = sum(arr.nbytes for arr in result.cols.values()) / 2**20
+    line = f"{result.n_rows:,} rows in {result.seconds:.2f}s, arrays {arrays_mb:.1f} MB"
+    if peak is not None:
+        line += f", peak RSS {peak / 2**20:.1f} MB (+{(peak - before) / 2**20:.1f} MB during ingest)"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CJE_COL, HF_COL, LEAD_COL, LF_COL, SJE_COL, TS_COL
+from session_registry import SHEET
+
+# Synthetic sessions with the same schema as the study exports, for
+# development and benchmarking without access to the real data:
+#
+#   python synthetic_session.py data/SYN01.xlsx --minutes 60 [--rate 1] [--seed 0]
+#
+# Coherence is smoothed noise around THRESH, so synchrony comes in runs of a
+# few seconds; engagement (none / SJE / CJE) and the leader (C / P) are
+# piecewise constant with exponentially distributed dwell times, like the
+# coded behavior columns.
+
+START = "2024-03-01 10:00:00"
+
+# coherence smoothing, in seconds (synchrony events come out at roughly 4x
+# this on average)
+LF_TAU_S = 1.5              # LF coherence changes slowly...
+HF_TAU_S = 0.6              # ...HF coherence faster
+
+# mean dwell times, in seconds
+ENGAGEMENT_DWELL_S = {0: 25.0, 1: 15.0, 2: 10.0}
+LEAD_DWELL_S = 8.0
+
+# coherence level / spread (clipped to [0, 1])
+LF_MEAN, LF_STD = 0.47, 0.17
+HF_MEAN, HF_STD = 0.44, 0.15
+
+
+def _smooth_noise(n, tau, rng):
+    # unit-variance noise smoothed over ~tau samples (Gaussian kernel, applied
+    # in the frequency domain so hours at 100 Hz stay cheap). Smooth rather
+    # than jagged, so threshold crossings -- and so event lengths -- scale
+    # with tau whatever the sample rate.
+    if n == 0:
+        return np.zeros(0)
+    size = 1 << int(np.ceil(np.log2(n + 4 * tau + 1)))
+    freq = np.fft.rfftfreq(size)
+    gain = np.exp(-0.5 * (2 * np.pi * freq * tau) ** 2)
+    out = np.fft.irfft(np.fft.rfft(rng.standard_normal(size)) * gain, size)[:n]
+    std = out.std()
+    return out / std if std > 0 else out
+
+
+def _dwell_runs(n, states, dwell, rng):
+    # piecewise-constant sequence of length n: states visited in random
+    # order (no immediate repeats), each for an exponential dwell time
+    codes = np.empty(n, dtype="int8")
+    i = 0
+    state = rng.choice(states)
+    while i < n:
+        length = max(1, int(round(rng.exponential(dwell[state]))))
+        codes[i:i + length] = state
+        i += length
+        others = [s for s in states if s != state]
+        state = rng.choice(others)
+    return codes
+
+
+def make_synthetic_frame(seconds, rate_hz=1.0, seed=0, start=START):
+    # one session with the columns load_data / PreparedSession expect
+    rng = np.random.default_rng(seed)
+    n = int(round(seconds * rate_hz))
+    timestamp = pd.Timestamp(start) + pd.to_timedelta(np.arange(n) / rate_hz, unit="s")
+
+    lf = np.clip(LF_MEAN + LF_STD * _smooth_noise(n, LF_TAU_S * rate_hz, rng), 0.0, 1.0)
+    hf = np.clip(HF_MEAN + HF_STD * _smooth_noise(n, HF_TAU_S * rate_hz, rng), 0.0, 1.0)
+
+    engagement = _dwell_runs(n, [0, 1, 2], {k: v * rate_hz for k, v in ENGAGEMENT_DWELL_S.items()}, rng)
+    lead = _dwell_runs(n, [0, 1], {0: LEAD_DWELL_S * rate_hz, 1: LEAD_DWELL_S * rate_hz}, rng)
+
+    # sje / cje are 1 while that state is coded, otherwise empty
+    return pd.DataFrame({
+        TS_COL: timestamp,
+        LF_COL: lf.astype("float32"),
+        HF_COL: hf.astype("float32"),
+        LEAD_COL: np.where(lead == 0, "C", "P"),
+        SJE_COL: np.where(engagement == 1, 1.0, np.nan),
+        CJE_COL: np.where(engagement == 2, 1.0, np.nan),
+    })
+
+
+def write_synthetic_session(path, seconds, rate_hz=1.0, seed=0):
+    # .csv, or an .xlsx with the session on sheet SHEET like the study files
+    df = make_synthetic_frame(seconds, rate_hz=rate_hz, seed=seed)
+    if path.lower().endswith(".csv"):
+        df.to_csv(path, index=False)
+        return df
+
+    with pd.ExcelWriter(path) as writer:
+        for i in range(SHEET):
+            pd.DataFrame().to_excel(writer, sheet_name=f"Sheet{i + 1}", index=False)
+        df.to_excel(writer, sheet_name="Session", index=False)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic dyad session.")
+    parser.add_argument("path", help="output .xlsx or .csv (e.g. data/SYN01.xlsx)")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=1.0, help="samples per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    folder = os.path.dirname(args.path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    df = write_synthetic_session(args.path, args.minutes * 60, rate_hz=args.rate, seed=args.seed)
+    print(f"wrote {len(df):,} samples to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
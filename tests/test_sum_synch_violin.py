@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from view_summary.sum_synch_violin import VIOLIN_MAX_POINTS, kde_curve, make_violin
+
+
+def test_kde_curve_constant():
+    grid, density = kde_curve(np.zeros(5000))
+    assert len(grid) == len(density)
+    assert np.all(np.isfinite(density))
+    # peak at the constant value
+    assert abs(grid[np.argmax(density)]) <= grid[1] - grid[0]
+
+
+def test_kde_curve_near_constant():
+    # spread smaller than the kernel: the kernel is longer than the bins
+    values = np.full(20, 0.5)
+    values[::2] += 1e-9
+    grid, density = kde_curve(values)
+    assert len(grid) == len(density)
+    assert np.all(np.isfinite(density))
+    # integrates to ~1 over the grid
+    assert abs(density.sum() * (grid[1] - grid[0]) - 1) < 0.05
+
+
+def test_kde_curve_matches_normal():
+    values = np.random.default_rng(0).normal(size=20000)
+    grid, density = kde_curve(values)
+    expected = np.exp(-0.5 * grid ** 2) / np.sqrt(2 * np.pi)
+    assert np.abs(density - expected).max() < 0.02
+
+
+def test_make_violin_constant_column():
+    n = VIOLIN_MAX_POINTS * 3
+    session = SimpleNamespace(n=n, lf=np.full(n, 0.2, dtype="float32"), hf=np.linspace(0, 1, n))
+    fig = make_violin(session)
+    assert len(fig.data) > 0
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Level-of-detail pyramid for the stacked timeline heatmaps.
+#
+# Level 0 is the session itself; level k pools 2**k consecutive samples into
+# one heatmap column (coherence: mean + max, leading / engagement: mode, plus
+# the mode's share of the bin for the hover text). Bins are aligned to sample
+# indices, so any [i0, i1) sample range maps straight onto each level.
+#
+# The timeline renders the finest level whose column count for the visible
+# range fits the viewport; full resolution is only used once the visible
+# range has no more samples than the plot is pixels wide.
+#
+# Memory is ~64 bytes per sample summed over all levels, so it is built
+# lazily per session (PreparedSession.timeline_pyramid).
+
+LOD_FACTOR = 2
+MIN_COLUMNS = 64                    # stop adding levels below this many bins
+N_CODES = 3                         # leading_num / engagement codes are 0..2
+
+
+class LodTile:
+    # One rendered slice of one level. Has the same attribute names as
+    # PreparedSession (timestamp, coherence, leading_num, engagement), so the
+    # make_*_heat builders take a tile where they take a session.
+    #   level              0 = full resolution
+    #   timestamp          column x (bin center)
+    #   coherence          (2, m) mean LF / HF per column
+    #   coherence_max      (2, m) max LF / HF per column
+    #   leading_num        (m,) most common leader code
+    #   engagement         (m,) most common engagement code
+    #   lead_share         (m,) fraction of the bin with that leader
+    #   engagement_share   (m,) fraction of the bin with that engagement
+    #   elapsed_start/end  (m,) seconds of the bin's first / last sample
+
+    def __init__(self, level, timestamp, coherence, coherence_max, leading_num,
+                 engagement, lead_share, engagement_share, elapsed_start, elapsed_end):
+        self.level = level
+        self.timestamp = timestamp
+        self.coherence = coherence
+        self.coherence_max = coherence_max
+        self.leading_num = leading_num
+        self.engagement = engagement
+        self.lead_share = lead_share
+        self.engagement_share = engagement_share
+        self.elapsed_start = elapsed_start
+        self.elapsed_end = elapsed_end
+        self.n = len(timestamp)
+
+
+def _code_counts(codes):
+    counts = np.zeros((len(codes), N_CODES), dtype=np.int32)
+    counts[np.arange(len(codes)), codes.astype(np.intp)] = 1
+    return counts
+
+
+class TimelinePyramid:
+    def __init__(self, session, factor=LOD_FACTOR, min_columns=MIN_COLUMNS):
+        self.session = session
+        self.factor = factor
+        self.n = session.n
+
+        # levels[k] (k >= 1): dict of per-bin arrays pooled from level k - 1
+        self.levels = [None]
+        prev = None
+        m = session.n
+        while m > min_columns:
+            if prev is None:
+                prev = {
+                    "first": np.arange(m),
+                    "last": np.arange(m),
+                    "count": np.ones(m, dtype=np.int64),
+                    "sum": session.coherence.astype(np.float64),
+                    "max": session.coherence,
+                    "lead": _code_counts(session.leading_num),
+                    "eng": _code_counts(session.engagement),
+                }
+            starts = np.arange(0, m, factor)
+            level = {
+                "first": prev["first"][starts],
+                "last": prev["last"][np.minimum(starts + factor, m) - 1],
+                "count": np.add.reduceat(prev["count"], starts),
+                "sum": np.add.reduceat(prev["sum"], starts, axis=1),
+                "max": np.maximum.reduceat(prev["max"], starts, axis=1),
+                "lead": np.add.reduceat(prev["lead"], starts, axis=0),
+                "eng": np.add.reduceat(prev["eng"], starts, axis=0),
+            }
+            self.levels.append(level)
+            prev = level
+            m = len(starts)
+
+    @property
+    def n_levels(self):
+        return len(self.levels)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for level in self.levels[1:] for a in level.values())
+
+    def rows(self, start=None, end=None):
+        # inclusive [start, end] time window -> [i0, i1) sample range
+        ts = self.session.timestamp
+        i0 = 0 if start is None else int(np.searchsorted(ts, np.datetime64(start, "ns"), side="left"))
+        i1 = self.n if end is None else int(np.searchsorted(ts, np.datetime64(end, "ns"), side="right"))
+        return i0, max(i0, i1)
+
+    def level_for(self, n_rows, columns):
+        # finest level that draws n_rows samples in at most `columns` columns
+        level = 0
+        width = 1
+        while level < self.n_levels - 1 and -(-n_rows // width) > columns:
+            level += 1
+            width *= self.factor
+        return level
+
+    def bin_range(self, level, i0, i1):
+        # [b0, b1) bins of `level` covering samples [i0, i1)
+        width = self.factor ** level
+        return i0 // width, -(-i1 // width)
+
+    def tile(self, i0=0, i1=None, columns=1000):
+        if i1 is None:
+            i1 = self.n
+        level = self.level_for(i1 - i0, columns)
+        b0, b1 = self.bin_range(level, i0, i1)
+        s = self.session
+
+        if level == 0:
+            rows = slice(b0, b1)
+            ones = np.ones(b1 - b0)
+            return LodTile(
+                0,
+                s.timestamp[rows],
+                s.coherence[:, rows],
+                s.coherence[:, rows],
+                s.leading_num[rows],
+                s.engagement[rows],
+                ones,
+                ones,
+                s.elapsed[rows],
+                s.elapsed[rows],
+            )
+
+        lv = self.levels[level]
+        bins = slice(b0, b1)
+        first = lv["first"][bins]
+        last = lv["last"][bins]
+        count = lv["count"][bins]
+        lead = lv["lead"][bins]
+        eng = lv["eng"][bins]
+        lead_num = lead.argmax(axis=1)
+        eng_num = eng.argmax(axis=1)
+        cols = np.arange(len(count))
+
+        t0 = s.timestamp[first]
+        return LodTile(
+            level,
+            t0 + (s.timestamp[last] - t0) / 2,
+            (lv["sum"][:, bins] / count).astype(np.float32),
+            lv["max"][:, bins],
+            lead_num.astype(np.int8),
+            eng_num.astype(np.int8),
+            lead[cols, lead_num] / count,
+            eng[cols, eng_num] / count,
+            s.elapsed[first],
+            s.elapsed[last],
+        )
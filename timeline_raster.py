@@ -0,0 +1,112 @@
+import base64
+import struct
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from plotly.colors import get_colorscale, unlabel_rgb
+
+from view_video_overview.vid_behavior import BEHAVIOR_COLORS
+from view_video_overview.vid_lead import LEAD_COLORS
+
+# Raster rendering of the stacked timeline rows: each row is colored in NumPy
+# with the same colorscale as its heatmap and shipped as a small PNG (one
+# layout image per row), so the figure size depends on the plot width only,
+# not on the session length.
+
+ROW_PX = 16                         # image rows per heatmap row (limits vertical blur)
+RASTER_CACHE_SIZE = 64
+_RASTER_CACHE = OrderedDict()       # (session_id, level, b0, b1) -> [png bytes] per row
+
+
+def colorscale_lut(colorscale, size=256):
+    # plotly colorscale ([[pos, "rgb(...)"], ...]) -> (size, 3) uint8 lookup table
+    pos = np.array([p for p, _ in colorscale], dtype="float64")
+    rgb = np.array([unlabel_rgb(c) for _, c in colorscale], dtype="float64")
+    grid = np.linspace(0.0, 1.0, size)
+    lut = np.stack([np.interp(grid, pos, rgb[:, k]) for k in range(3)], axis=1)
+    return np.rint(lut).astype(np.uint8)
+
+
+BUPU_LUT = colorscale_lut(get_colorscale("BuPu"))
+# zmin=0, zmax=2: code c sits at c / 2 on the colorscale
+LEAD_LUT = colorscale_lut(LEAD_COLORS, size=3)
+BEHAVIOR_LUT = colorscale_lut(BEHAVIOR_COLORS, size=3)
+
+
+def encode_png(rgb):
+    # (h, w, 3) uint8 -> PNG bytes (8-bit RGB, no filtering)
+    h, w, _ = rgb.shape
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)    # leading 0 = filter type per row
+    raw[:, 1:] = rgb.reshape(h, w * 3)
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def rasterize_rows(tile):
+    # RGB images of the synch (HF on top, LF below), leading and engagement
+    # rows of one LOD tile, one pixel column per tile column
+    coh = np.clip(np.nan_to_num(tile.coherence[::-1]), 0.0, 1.0)
+    synch = BUPU_LUT[np.rint(coh * (len(BUPU_LUT) - 1)).astype(np.intp)]
+    lead = LEAD_LUT[tile.leading_num.astype(np.intp)][None, :]
+    behavior = BEHAVIOR_LUT[tile.engagement.astype(np.intp)][None, :]
+    return [np.repeat(img, ROW_PX, axis=0) for img in (synch, lead, behavior)]
+
+
+def raster_pngs(session, tile, key):
+    # PNG bytes per row, cached per session and zoom range (tile key)
+    cache_key = (session.session_id, *key)
+    pngs = _RASTER_CACHE.get(cache_key)
+    if pngs is None:
+        pngs = [encode_png(img) for img in rasterize_rows(tile)]
+        _RASTER_CACHE[cache_key] = pngs
+        while len(_RASTER_CACHE) > RASTER_CACHE_SIZE:
+            _RASTER_CACHE.popitem(last=False)
+    else:
+        _RASTER_CACHE.move_to_end(cache_key)
+    return pngs
+
+
+def tile_extent(tile):
+    # outer x edges of the tile's columns, as plotly draws heatmap cells
+    x = tile.timestamp
+    if len(x) == 0:
+        return None, None
+    if len(x) == 1:
+        half = np.timedelta64(500, "ms")
+        return x[0] - half, x[0] + half
+    return x[0] - (x[1] - x[0]) / 2, x[-1] + (x[-1] - x[-2]) / 2
+
+
+def raster_images(session, tile, key):
+    # layout.images for the three rows (row k sits on axis pair x{k}/y{k})
+    x0, x1 = tile_extent(tile)
+    if x0 is None:
+        return []
+    sizex = float((x1 - x0) / np.timedelta64(1, "ms"))    # date axes measure in ms
+    images = []
+    for row, png in enumerate(raster_pngs(session, tile, key), start=1):
+        suffix = "" if row == 1 else str(row)
+        images.append(dict(
+            source="data:image/png;base64," + base64.b64encode(png).decode("ascii"),
+            xref=f"x{suffix}",
+            yref=f"y{suffix} domain",
+            x=str(np.datetime_as_string(x0, unit="ms")),
+            y=1,
+            sizex=sizex,
+            sizey=1,
+            xanchor="left",
+            yanchor="top",
+            sizing="stretch",
+            layer="below",
+        ))
+    return images
@@ -1,127 +1,237 @@
-from plotly.subplots import make_subplots
+import copy
+import threading
+from collections import OrderedDict
+
 import plotly.graph_objects as go
 import numpy as np
-import pandas as pd
 
 # Import heat maps 
-from view_video_overview.vid_behavior import make_behavior_heat
-from view_video_overview.vid_lead import make_lead_heat
-from view_video_overview.vid_synch import make_synch_heat
-
-from load_data import df
+from view_video_overview.vid_behavior import behavior_heat_trace
+from view_video_overview.vid_lead import lead_heat_trace
+from view_video_overview.vid_synch import synch_heat_trace
+from timeline_raster import raster_images
+from artifacts import load_timeline
+from figure_json import pack_figure
 
 TS_COL = "timestamp"
 
-def make_stacked_heatmaps(minimal=False):  # Function to create stacked heatmaps with shared x-axis
-    def _fmt_secs(sec):
-        sec = int(round(sec))
-        m = sec // 60
-        s = sec % 60
-        return f"{m}:{s:02d}"
-
-    ts_series = pd.to_datetime(df[TS_COL]).sort_values().reset_index(drop=True)
-    t0 = ts_series.iloc[0]
-
-    fig = make_subplots(
-        rows=3,
-        cols=1,
-        shared_xaxes=True,           # share x-axis across heatmaps
-        vertical_spacing=0.04,       # reduce space between plots
-        row_heights=[0.6, 0.2, 0.2],
-    )
-
-    # Build the three base heatmaps
-    synch_fig = make_synch_heat(df)         # row 1
-    lead_fig = make_lead_heat(df)           # row 2
-    behavior_fig = make_behavior_heat(df)   # row 3
-
-    fig.add_trace(synch_fig.data[0], row=1, col=1)
-    fig.add_trace(lead_fig.data[0], row=2, col=1)
-    fig.add_trace(behavior_fig.data[0], row=3, col=1)
+# hover labels per code (index = z value)
+LEAD_LABELS = np.array(["None", "Child", "Parent"])
+BEHAVIOR_LABELS = np.array(["No Engagement", "Supported Joint Engagement", "Coordinated Joint Engagement"])
+
+def format_elapsed(secs):
+    # vectorized m:ss labels for an array of elapsed seconds
+    secs = np.rint(np.asarray(secs, dtype="float64")).astype(np.int64)
+    minutes = (secs // 60).astype(str)
+    seconds = np.char.zfill((secs % 60).astype(str), 2)
+    return np.char.add(np.char.add(minutes, ":"), seconds)
+
+# Timeline heatmaps render at most this many columns by default (about the
+# plot width in px); callers that know the viewport pass their own. Longer
+# ranges are drawn from a pooled level of session.timeline_pyramid.
+TIMELINE_COLUMNS = 1200
+MAX_TICKS = 120
+
+# Raster mode (opt-in): the rows are drawn as PNG layout images
+# (timeline_raster) under transparent heatmaps of at most RASTER_HOVER_COLUMNS
+# columns that only catch hover / click, so the figure stays the same size
+# however long the session is.
+TIMELINE_RASTER = False
+RASTER_HOVER_COLUMNS = 400
+TRANSPARENT_SCALE = [[0.0, "rgba(0,0,0,0)"], [1.0, "rgba(0,0,0,0)"]]
+
+# the stacked timeline's subplot axes (what make_subplots(rows=3,
+# shared_xaxes=True, vertical_spacing=0.04, row_heights=[0.6, 0.2, 0.2])
+# lays out); x zoom loads finer levels (see app.update_timeline_lod), rows stay put
+TIMELINE_AXES = dict(
+    xaxis=dict(anchor="y", domain=[0.0, 1.0], matches="x3", showticklabels=False),
+    xaxis2=dict(anchor="y2", domain=[0.0, 1.0], matches="x3", showticklabels=False),
+    xaxis3=dict(anchor="y3", domain=[0.0, 1.0]),
+    yaxis=dict(anchor="x", domain=[0.448, 1.0], fixedrange=True),
+    yaxis2=dict(anchor="x2", domain=[0.224, 0.408], fixedrange=True),
+    yaxis3=dict(anchor="x3", domain=[0.0, 0.184], fixedrange=True),
+)
+
+SYNCH_HOVER = "Time: %{customdata}<br>Signal: %{y}<br>Value: %{z:.3f}<extra></extra>"
+SYNCH_HOVER_POOLED = "Time: %{customdata}<br>Signal: %{y}<br>Mean: %{z:.3f}<br>Max: %{text}<extra></extra>"
+LEAD_HOVER = "Time: %{customdata}<br>Leading: %{text}<extra></extra>"
+BEHAVIOR_HOVER = "Time: %{customdata}<br>%{text}<extra></extra>"
+
+def _with_share(labels, share):
+    # "Child (75%)": the bin's most common value and how much of it it covers
+    pct = np.char.mod("%d%%", np.rint(share * 100).astype(int))
+    return np.char.add(np.char.add(np.char.add(labels, " ("), pct), ")")
+
+def timeline_trace_updates(tile):
+    # x / z / hover fields of the three timeline heatmaps (synch, lead,
+    # behavior) for one LOD tile; pooled columns hover with the bin's time
+    # range, mean + max coherence and the share of the majority label
+    start_labels = format_elapsed(tile.elapsed_start)
+    lead_labels = LEAD_LABELS[tile.leading_num]
+    behavior_labels = BEHAVIOR_LABELS[tile.engagement]
+
+    if tile.level == 0:
+        time_labels = start_labels[None, :]                     # shape (1, n)
+        synch = dict(
+            customdata=np.repeat(time_labels, 2, axis=0),       # shape (2, n)
+            text=None,
+            hovertemplate=SYNCH_HOVER,
+        )
+    else:
+        end_labels = format_elapsed(tile.elapsed_end)
+        time_labels = np.where(
+            start_labels == end_labels,
+            start_labels,
+            np.char.add(np.char.add(start_labels, "–"), end_labels),
+        )[None, :]
+        lead_labels = _with_share(lead_labels, tile.lead_share)
+        behavior_labels = _with_share(behavior_labels, tile.engagement_share)
+        synch = dict(
+            customdata=np.repeat(time_labels, 2, axis=0),
+            text=np.char.mod("%.3f", tile.coherence_max),
+            hovertemplate=SYNCH_HOVER_POOLED,
+        )
+
+    return [
+        dict(x=tile.timestamp, z=tile.coherence, **synch),
+        dict(
+            x=tile.timestamp,
+            z=tile.leading_num[None, :],
+            customdata=time_labels,
+            text=lead_labels[None, :],
+            hovertemplate=LEAD_HOVER,
+        ),
+        dict(
+            x=tile.timestamp,
+            z=tile.engagement[None, :],
+            customdata=time_labels,
+            text=behavior_labels[None, :],
+            hovertemplate=BEHAVIOR_HOVER,
+        ),
+    ]
+
+def timeline_view(session, i0, i1, columns=TIMELINE_COLUMNS, raster=TIMELINE_RASTER):
+    # What to draw for samples [i0, i1) in `columns` columns:
+    #   key      [level, b0, b1] of the rendered tile
+    #   tile     LOD tile for the three heatmap traces
+    #   images   layout.images in raster mode, else None
+    pyramid = session.timeline_pyramid
+    tile = pyramid.tile(i0, i1, columns)
+    key = [tile.level, *pyramid.bin_range(tile.level, i0, i1)]
+    if not raster:
+        return key, tile, None
+
+    hover_tile = pyramid.tile(i0, i1, min(columns, RASTER_HOVER_COLUMNS))
+    return key, hover_tile, raster_images(session, tile, key)
+
+def make_stacked_heatmaps(session, minimal=False, columns=TIMELINE_COLUMNS, x_range=None, raster=False):  # Function to create stacked heatmaps with shared x-axis
+    # only the columns that fit the viewport: a pooled level for long ranges,
+    # the raw samples once zoomed in far enough
+    pyramid = session.timeline_pyramid
+    i0, i1 = pyramid.rows(*(x_range or (None, None)))
+    _, tile, images = timeline_view(session, i0, i1, columns, raster)
+
+    # the three heatmaps (synch / lead / behavior) built straight onto their
+    # rows, with the tile's hover fields: no per-row figures, no make_subplots
+    # (together they were most of the build time). Hover tooltips use video
+    # time; all three share x, so column j of every row has the same label
+    synch_update, lead_update, behavior_update = timeline_trace_updates(tile)
+    traces = [
+        synch_heat_trace(tile, xaxis="x", yaxis="y", **synch_update),            # row 1
+        lead_heat_trace(tile, xaxis="x2", yaxis="y2", **lead_update),            # row 2
+        behavior_heat_trace(tile, xaxis="x3", yaxis="y3", **behavior_update),    # row 3
+    ]
 
     # set x-axis ticks as mm:ss instead of dt
-    n = len(ts_series)
-    step = 60  # one tick per 60 samples
-    idxs = list(range(0, n, step)) or [0]
-
-    tickvals = ts_series.iloc[idxs]                     # still real timestamps
-    ticktext = [_fmt_secs(i) for i in idxs]             # what we show as labels
-
-    fig.update_xaxes(
-        tickmode="array",
-        tickvals=tickvals,
-        ticktext=ticktext,
-        row=3,
-        col=1,  # bottom axis; shared_xaxes makes it apply visually to all
-    )
-
-    # hover tooltips uses video time
-
-    # compute elapsed seconds for each timestamp
-    elapsed_secs = (ts_series - t0).dt.total_seconds().round().astype(int)
-    elapsed_labels = [_fmt_secs(s) for s in elapsed_secs]
-
-    # We assume all three heatmaps use the same x (timestamps), so index j = elapsed_labels[j].
-
-    # SYNCH HEATMAP 
-    synch_z = np.array(synch_fig.data[0].z)        # shape (2, n)
-    n_rows, n_cols = synch_z.shape
-
-    synch_row_labels = ["Low Frequency", "High Frequency"]
-    synch_custom = []
-    for r in range(n_rows):
-        row_cd = []
-        for c in range(n_cols):
-            row_cd.append([elapsed_labels[c], synch_row_labels[r]])
-        synch_custom.append(row_cd)
-
-    fig.data[0].update(
-        customdata=synch_custom,
-        hovertemplate="Time: %{customdata[0]}<br>Signal: %{customdata[1]}<br>Value: %{z:.3f}<extra></extra>"
-    )
+    n = session.n
+    step = 60  # one tick per 60 samples (fewer on very long sessions)
+    step *= max(1, -(-n // (step * MAX_TICKS)))
+    idxs = np.arange(0, n, step) if n else np.array([0])
 
-    # LEAD HEATMAP (trace 1)
-    LEAD_MAP = {0: "None", 1: "Child", 2: "Parent"}
+    tickvals = session.timestamp[idxs]                  # still real timestamps
+    ticktext = format_elapsed(session.elapsed[idxs])    # what we show as labels
 
-    lead_z = np.array(lead_fig.data[0].z)          # shape (1, n)
-    _, lead_n_cols = lead_z.shape
+    # bottom axis carries the ticks; the rows above match it
+    axes = copy.deepcopy(TIMELINE_AXES)
+    axes["xaxis3"].update(tickmode="array", tickvals=tickvals, ticktext=ticktext)
 
-    lead_custom = [[
-        [elapsed_labels[c], LEAD_MAP.get(int(lead_z[0, c]), int(lead_z[0, c]))]
-        for c in range(lead_n_cols)
-    ]]
-
-    fig.data[1].update(
-        customdata=lead_custom,
-        hovertemplate="Time: %{customdata[0]}<br>Leading: %{customdata[1]}<extra></extra>"
-    )
-
-    # BEHAVIOR HEATMAP
-    BEHAVIOR_MAP = {0: "No Engagement", 1: "Supported Joint Engagement", 2: "Coordinated Joint Engagement"}
-
-    beh_z = np.array(behavior_fig.data[0].z)       # shape (1, n)
-    _, beh_n_cols = beh_z.shape
-
-    behavior_custom = [[
-        [elapsed_labels[c], BEHAVIOR_MAP.get(int(beh_z[0, c]), int(beh_z[0, c]))]
-        for c in range(beh_n_cols)
-    ]]
-
-    fig.data[2].update(
-        customdata=behavior_custom,
-        hovertemplate="Time: %{customdata[0]}<br>%{customdata[1]}<extra></extra>"
-    )
-
-    fig.update_layout(
+    layout = dict(
+        **axes,
         showlegend=False,
         coloraxis_showscale=False,
         autosize=True,
         margin=dict(l=60, r=20, t=80, b=40),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        dragmode=False,
+        dragmode="zoom",
+        uirevision="timeline",  # keep the user's zoom across LOD updates
         hovermode="closest",  # avoid unified hover
         font=dict(family="Lato, sans-serif"),
     )
 
+    # raster mode: colors come from the PNGs, the heatmaps only catch hover
+    if images is not None:
+        for trace in traces:
+            trace.colorscale = TRANSPARENT_SCALE
+        layout["images"] = images
+
+    fig = go.Figure(data=traces, layout=layout)
+
     return fig
+
+
+# Layout variants of the stacked timeline used around the app
+#   base: as built by make_stacked_heatmaps
+#   play: Play view under the video
+#   home: Home Summary timeline card
+TIMELINE_VARIANTS = {
+    "base": {},
+    "play": {"margin": dict(l=90, r=20, t=10, b=30)},
+    "home": {"margin": dict(l=90, r=20, t=0, b=0), "domain": [0.05, 1.0]},
+}
+
+TIMELINE_CACHE_SIZE = 16
+_TIMELINE_CACHE = OrderedDict()    # (session_id, raster) -> base figure dict
+_TIMELINE_LOCK = threading.Lock()
+
+def _build_timeline(session, raster):
+    # served from the precompute artifacts when present (see precompute.py)
+    if not raster:
+        stored = load_timeline(session.session_id, "base", TIMELINE_COLUMNS)
+        if stored is not None:
+            return stored
+    return make_stacked_heatmaps(session, minimal=False, raster=raster).to_dict()
+
+def _variant_layout(layout, variant):
+    # private copy of the base layout with the variant's overrides applied
+    opts = TIMELINE_VARIANTS[variant]
+    layout = copy.deepcopy(layout)
+    if "domain" in opts:
+        for key in layout:
+            if key.startswith("xaxis"):
+                layout[key]["domain"] = list(opts["domain"])
+    if "margin" in opts:
+        layout["margin"] = dict(opts["margin"])
+    return layout
+
+def get_timeline_figure(session, variant="base", raster=TIMELINE_RASTER):
+    # Memoized stacked timeline: the heatmaps are built once per session and
+    # every layout variant is derived from that base. Callers get a cheap
+    # derived copy as a figure dict: the (large) trace data is shared and must
+    # be treated as read-only, the layout is a private copy they can add
+    # shapes etc. to. Packed once here (figure_json), so every response reuses
+    # the compact arrays.
+    key = (session.session_id, raster)
+    with _TIMELINE_LOCK:
+        base = _TIMELINE_CACHE.get(key)
+        if base is not None:
+            _TIMELINE_CACHE.move_to_end(key)
+    if base is None:
+        # built outside the lock; two racing requests at worst build it twice
+        base = pack_figure(_build_timeline(session, raster))
+        with _TIMELINE_LOCK:
+            _TIMELINE_CACHE[key] = base
+            while len(_TIMELINE_CACHE) > TIMELINE_CACHE_SIZE:
+                _TIMELINE_CACHE.popitem(last=False)
+
+    return {"data": base["data"], "layout": _variant_layout(base["layout"], variant)}
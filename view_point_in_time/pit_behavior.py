@@ -1,23 +1,16 @@
-import pandas as pd
 from dash import html
 
 
 SJE_COL = "sje"
 CJE_COL = "cje"
 
-def get_behavior(df, row_index: int = 1):
-    df_main = df.copy()
-    for col in [SJE_COL, CJE_COL]:
-        if col in df_main.columns:
-            df_main[col] = pd.to_numeric(df_main[col], errors="coerce").fillna(0).astype(int)
-    if len(df_main) == 0:
+def get_behavior(session, row_index: int = 1):
+    if session.n == 0:
         return "No Joint Engagement", "/assets/behav_NoJE.png"
 
     idx = row_index # for now
-    row = df_main.iloc[idx]
-
-    cje_val = int(row.get(CJE_COL, 0) or 0)
-    sje_val = int(row.get(SJE_COL, 0) or 0)
+    cje_val = int(session.cje[idx])
+    sje_val = int(session.sje[idx])
 
     # set picture based on value
     if cje_val == 1:
@@ -28,9 +21,9 @@ def get_behavior(df, row_index: int = 1):
         return "No Joint Engagement", "/assets/behav_NoJE.png"
 
 
-def make_behavior_panel(df, row_index: int = 1):
+def make_behavior_panel(session, row_index: int = 1):
 
-    label, img_src = get_behavior(df, row_index=row_index)
+    label, img_src = get_behavior(session, row_index=row_index)
 
     # Set hover text based on engagement type
     if label == "Coordinated Joint Engagement":
@@ -1,27 +1,28 @@
 import pandas as pd
 from dash import html
 
+from prepared_session import LEAD_PARENT
+
 
 TS_COL = "timestamp"
 LEADING_COL = "leading"
 
 
-def get_leader(df, row_index: int = 1):
+def get_leader(session, row_index: int = 1):
 
-    if len(df) == 0:
+    if session.n == 0:
         return "Child", "/assets/lead_child.png"
 
-    idx = max(0, min(row_index, len(df) - 1))
-    # get 'C' or 'P' from first row in leading col
-    leader_val = str(df.iloc[idx].get(LEADING_COL, "")).strip().upper()
-    if leader_val.startswith("P"):
+    idx = session.clamp_index(row_index)
+    # leading_num: 1 = 'C', 2 = 'P' (anything else falls back to child)
+    if session.leading_num[idx] == LEAD_PARENT:
         return "Parent", "/assets/lead_parent.png"
     else:
         return "Child", "/assets/lead_child.png"
 
-def make_leading_panel(df, row_index: int = 1):
+def make_leading_panel(session, row_index: int = 1):
 
-    leader_label, leader_img = get_leader(df, row_index=row_index)
+    leader_label, leader_img = get_leader(session, row_index=row_index)
 
     return html.Div(
         style={
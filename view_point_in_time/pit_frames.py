@@ -0,0 +1,110 @@
+import numpy as np
+
+from view_point_in_time.pit_synch import N_SEG_HALF, SLICE_COLORS, TRANSPARENT
+
+# Precomputed per-sample playback frames for the Play view PIT cards.
+# The table is shipped to the browser once (dcc.Store) so that video
+# playback can update the glyph, behavior and leader cards with no server
+# work; the server-side fallback callbacks read the same table.
+
+# never ship more than this many frames per second of video; higher-rate
+# recordings are decimated (the cards can't show more than that anyway)
+PLAYBACK_MAX_HZ = 10
+
+# behavior code: 0 = none, 1 = SJE, 2 = CJE (CJE wins if both are set)
+BEHAVIOR_IMAGES = [
+    "/assets/behav_NoJE.png",
+    "/assets/behav_SJE.png",
+    "/assets/behav_CJE.png",
+]
+BEHAVIOR_TITLES = [
+    "No Joint Engagement is the absence of shared focus, where a child is either focused solely on an object (object engagement) or solely on a person (person engagement), or is otherwise uninvolved.",
+    "Supported Joint Engagement (SJE) is a state where a child and a caregiver are both actively involved with the same object or event, but the child is not yet actively acknowledging or responding to the caregiver's participation.",
+    "Coordinated Joint Engagement (CJE) is a more advanced stage where the child actively participates by sharing attention with the caregiver and the object often shown by altering their gaze back and forth.",
+]
+
+# leader code: 0 = child, 1 = parent (anything that isn't 'C' shows the parent)
+LEADER_IMAGES = [
+    "/assets/lead_child.png",
+    "/assets/lead_parent.png",
+]
+
+
+def make_playback_frames(session):
+    # column arrays, one entry per (possibly decimated) sample
+    if session.n == 0:
+        keep = np.zeros(0, dtype=int)
+    else:
+        duration = float(session.elapsed[-1])
+        step = 1
+        if duration > 0:
+            rate = (session.n - 1) / duration
+            step = max(1, int(np.ceil(rate / PLAYBACK_MAX_HZ)))
+        keep = np.arange(0, session.n, step)
+
+    behavior = np.where(session.cje[keep] == 1, 2, np.where(session.sje[keep] == 1, 1, 0))
+
+    return {
+        "t": np.round(session.elapsed[keep], 3),
+        # colored slices per half-donut, same rounding as half_donut_segments
+        "lf": np.ceil(np.clip(session.lf[keep], 0.0, 1.0) * N_SEG_HALF).astype(int),
+        "hf": np.ceil(np.clip(session.hf[keep], 0.0, 1.0) * N_SEG_HALF).astype(int),
+        "behavior": behavior.astype(int),
+        "leader": (session.leading_num[keep] != 1).astype(int),
+    }
+
+
+def playback_frames_store(frames):
+    # JSON-ready payload for the browser (frame table + lookup tables)
+    return {
+        "t": frames["t"].tolist(),
+        "lf": frames["lf"].tolist(),
+        "hf": frames["hf"].tolist(),
+        "behavior": frames["behavior"].tolist(),
+        "leader": frames["leader"].tolist(),
+        "n_seg": N_SEG_HALF,
+        "colors": list(SLICE_COLORS),
+        "transparent": TRANSPARENT,
+        "behavior_src": BEHAVIOR_IMAGES,
+        "behavior_title": BEHAVIOR_TITLES,
+        "leader_src": LEADER_IMAGES,
+    }
+
+
+def glyph_counts_at(frames, current_time):
+    # LF/HF colored-slice counts at a video time (seconds), with the same
+    # "sticky" interpolation between neighbouring samples as before:
+    # hold the value most of the time, move quickly in the middle
+    t = frames["t"]
+    n = len(t)
+    if n == 0:
+        return 0, 0
+
+    pos = int(np.searchsorted(t, current_time))
+    if pos <= 0:
+        i0 = i1 = 0
+    elif pos >= n:
+        i0 = i1 = n - 1
+    else:
+        i0, i1 = pos - 1, pos
+
+    alpha = 0.0 if t[i1] == t[i0] else (current_time - t[i0]) / (t[i1] - t[i0])
+    if alpha <= 0.3:
+        alpha = 0.0
+    elif alpha >= 0.7:
+        alpha = 1.0
+    else:
+        alpha = (alpha - 0.3) / (0.7 - 0.3)
+
+    lf = (1.0 - alpha) * frames["lf"][i0] + alpha * frames["lf"][i1]
+    hf = (1.0 - alpha) * frames["hf"][i0] + alpha * frames["hf"][i1]
+    return int(np.ceil(lf)), int(np.ceil(hf))
+
+
+def frame_index_at(frames, current_time):
+    # last sample at or before the video time (first sample before the start)
+    t = frames["t"]
+    if len(t) == 0:
+        return None
+    idx = int(np.searchsorted(t, current_time, side="right")) - 1
+    return max(0, min(idx, len(t) - 1))
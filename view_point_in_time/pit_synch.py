@@ -1,5 +1,6 @@
+from functools import lru_cache
+
 import numpy as np
-import pandas as pd
 from pathlib import Path
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -26,6 +27,15 @@ def get_color(t):
     t = float(np.clip(t, 0.0, 1.0))
     return px.colors.sample_colorscale(BU_PU, [t])[0]
 
+TRANSPARENT = "rgba(0,0,0,0)"
+
+# BuPu color of every visible slice, sampled once at import.
+# slice i sits at t = (i + 0.5) / N_SEG_HALF along the half-arc (bottom to top)
+SLICE_COLORS = tuple(
+    px.colors.sample_colorscale(BU_PU, [(i + 0.5) / N_SEG_HALF for i in range(N_SEG_HALF)])
+)
+SEGMENT_VALUES = (1,) * (2 * N_SEG_HALF)
+
 def half_donut_segments(v):
     # Build (values, colors) for a half-circle gradient donut.
     # The first N_SEG_HALF slices cover 180° (the visible arch).
@@ -35,36 +45,25 @@ def half_donut_segments(v):
 
     v = float(np.clip(v, 0.0, 1.0))
 
-    total_slices = 2 * N_SEG_HALF
-    values = [1] * total_slices
-    colors = []
-
     # number of colored slices in the visible half
     n_colored = int(np.ceil(v * N_SEG_HALF))
 
-    # for each slice in visible half (bottom to top)
-    for i in range(N_SEG_HALF):
-        t = (i + 0.5) / N_SEG_HALF         # compute its normalized position t along the half-arc
-        if i < n_colored:
-            colors.append(get_color(t))    # color it within visible gradient
-        else:
-            colors.append("rgba(0,0,0,0)") # points above the coherence val v
+    return segments_for_count(n_colored)
 
-    # hidden half: always transparent
-    for i in range(N_SEG_HALF):
-        colors.append("rgba(0,0,0,0)")
-
-    return values, colors
-
-def make_coherence_figure(df: pd.DataFrame) -> go.Figure:
-    df = df.copy()
-
-    for col in [LF_COL, HF_COL]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-    labels = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+@lru_cache(maxsize=N_SEG_HALF + 1)
+def segments_for_count(n_colored):
+    # only N_SEG_HALF + 1 distinct glyphs exist, so each one is built once and
+    # reused (tuples, so a caller can't mutate the cached copy)
+    colors = (
+        SLICE_COLORS[:n_colored]                        # gradient up to the coherence val
+        + (TRANSPARENT,) * (N_SEG_HALF - n_colored)     # points above the coherence val v
+        + (TRANSPARENT,) * N_SEG_HALF                   # hidden half: always transparent
+    )
+    return SEGMENT_VALUES, colors
 
-    lf0 = float(df.iloc[0][LF_COL])
-    hf0 = float(df.iloc[0][HF_COL])
+def make_coherence_figure(session) -> go.Figure:
+    lf0 = float(session.lf[0])
+    hf0 = float(session.hf[0])
 
     lf_vals, lf_cols = half_donut_segments(lf0)
     hf_vals, hf_cols = half_donut_segments(hf0)
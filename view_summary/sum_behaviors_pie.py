@@ -28,16 +28,15 @@ PIE_COLORS = {
     'Coordinated Joint Engagement (CJE)': 'rgb(217,89,108)'   # coral raspberry
 }
 
-def make_pie(df):
+def make_pie(session):
+    # engagement (0: none, 1: SJE, 2: CJE) is derived once in PreparedSession
+    return make_pie_from_counts(np.bincount(session.engagement, minlength=3))
 
-    CONDITION = [
-        (df["sje"] == 1),
-        (df["cje"] == 1),
-    ]
-
-    df["engagement"] = np.select(CONDITION, CHOICES, default=0)
-
-    counts = df["engagement"].value_counts().sort_index()
+def make_pie_from_counts(engagement_counts):
+    # engagement_counts = [none, SJE, CJE] sample counts (e.g. from the
+    # window prefix sums); only the codes that actually occur become slices
+    counts = pd.Series(np.asarray(engagement_counts))
+    counts = counts[counts > 0]
     percent = (counts / counts.sum()) * 100
 
     percent_df = percent.rename("percent").reset_index()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from dash import html
+
+from cohort_sketch import DURATION_EDGES, EVENT_TYPES, HIST_EDGES
+from prepared_session import LEAD_CHILD, LEAD_PARENT
+from view_summary.sum_behaviors_pie import make_pie_from_counts
+from view_summary.sum_synch_bar import make_synch_bar_from_counts
+from view_summary.sum_synch_violin import make_violin_from_histograms
+from view_summary.sum_table import make_summary_table
+
+# Cohort view: every figure here is drawn from merged SummarySketches
+# (cohort_sketch.py), never from the raw samples of the dyads.
+
+EVENT_LABELS = {
+    "lf": "Low Frequency Synchrony",
+    "hf": "High Frequency Synchrony",
+    "joint": "Joint Engagement",
+}
+
+EVENT_COLORS = {
+    "Low Frequency Synchrony": "rgb(136,65,157)",
+    "High Frequency Synchrony": "rgb(140,150,198)",
+    "Joint Engagement": "rgb(217,89,108)",
+}
+
+
+def _duration_bin_labels():
+    # DURATION_EDGES are in seconds; bins are [lo, hi)
+    labels = []
+    for lo, hi in zip(DURATION_EDGES[:-1], DURATION_EDGES[1:]):
+        if lo == 0:
+            labels.append(f"<{int(hi)} s")
+        elif np.isinf(hi):
+            labels.append(f"{int(lo)}+ s")
+        else:
+            labels.append(f"{int(lo)}-{int(hi)} s")
+    return labels
+
+
+def make_cohort_overview(total):
+    hours = float(total["seconds"]) / 3600
+    return html.Div(
+        f"{int(total['n_dyads'])} dyads, {hours:.1f} h of recordings "
+        f"({int(total['n']):,} samples)",
+        style={"fontSize": "14px", "fontFamily": "Lato, sans-serif"},
+    )
+
+
+def make_cohort_tables(total):
+    # same table / pie / bar as a single dyad's Home page, from the merged sketch
+    leaders = total["event_leaders"]
+    lf, hf = EVENT_TYPES.index("lf"), EVENT_TYPES.index("hf")
+    synch_bar = make_synch_bar_from_counts(
+        int(leaders[hf][LEAD_CHILD]), int(leaders[hf][LEAD_PARENT]),
+        int(leaders[lf][LEAD_CHILD]), int(leaders[lf][LEAD_PARENT]),
+    )
+    return {
+        "summary_table": make_summary_table(None, metrics=total.metrics()),
+        "pie": make_pie_from_counts(total["engagement_counts"]),
+        "synch_bar": synch_bar,
+        "violin": make_violin_from_histograms(
+            total["coherence_hist"],
+            HIST_EDGES,
+            total.coherence_mean(),
+            total["coherence_min"],
+            total["coherence_max"],
+        ),
+    }
+
+
+def make_duration_histogram(total):
+    # event durations per type, as a share of that type's events
+    labels = _duration_bin_labels()
+    fig = go.Figure()
+    for k, name in enumerate(EVENT_TYPES):
+        counts = total["event_duration_hist"][k]
+        n = counts.sum()
+        share = counts / n * 100 if n else np.zeros(len(counts))
+        label = EVENT_LABELS[name]
+        fig.add_trace(
+            go.Bar(
+                x=labels,
+                y=share,
+                name=label,
+                marker_color=EVENT_COLORS[label],
+                customdata=counts,
+                hovertemplate="%{x}: %{y:.1f}% (%{customdata} events)<extra>" + label + "</extra>",
+            )
+        )
+
+    fig.update_layout(
+        barmode="group",
+        margin=dict(l=60, r=20, t=30, b=40),
+        plot_bgcolor="white",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+        font=dict(family="Lato, sans-serif", color="black"),
+    )
+    fig.update_xaxes(title_text="Event duration", showline=True, linecolor="lightgray")
+    fig.update_yaxes(title_text="% of events", showgrid=True, gridcolor="lightgray")
+    return fig
+
+
+def make_dyad_distributions(per_dyad):
+    # one point per dyad: % of time in joint engagement and events per hour
+    rows = []
+    for dyad_id, sketch in per_dyad.items():
+        n = int(sketch["n"])
+        hours = float(sketch["seconds"]) / 3600
+        if n == 0:
+            continue
+        eng = sketch["engagement_counts"]
+        rows.append({"Dyad": dyad_id, "Measure": "Joint Engagement (% of time)",
+                     "Value": (eng[1] + eng[2]) / n * 100})
+        for k, name in enumerate(EVENT_TYPES):
+            rows.append({"Dyad": dyad_id, "Measure": f"{EVENT_LABELS[name]} (events / h)",
+                         "Value": sketch["event_count"][k] / hours if hours else 0.0})
+    data = pd.DataFrame(rows, columns=["Dyad", "Measure", "Value"])
+
+    fig = px.box(
+        data,
+        x="Value",
+        y="Measure",
+        points="all",
+        hover_data=["Dyad"],
+        facet_col="Measure",
+        facet_col_wrap=2,
+    )
+    fig.update_traces(
+        marker=dict(color="rgb(136,65,157)", opacity=0.6, size=5),
+        line=dict(color="black", width=1),
+        fillcolor="rgba(140,150,198,0.3)",
+        orientation="h",
+    )
+    fig.update_xaxes(matches=None, showticklabels=True, title_text="", showgrid=True, gridcolor="lightgray")
+    fig.update_yaxes(showticklabels=False, title_text="")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_layout(
+        showlegend=False,
+        margin=dict(l=20, r=20, t=40, b=30),
+        plot_bgcolor="white",
+        font=dict(family="Lato, sans-serif", color="black"),
+    )
+    return fig
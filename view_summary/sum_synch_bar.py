@@ -2,53 +2,36 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 
+from prepared_session import LEAD_CHILD, LEAD_PARENT
+from run_length import extract_events
+
 LF_COL = "lf_coh"
 HF_COL = "hf_coh"
 THRESH = 0.5
 LEAD_COL = "leading"
 
 
-def make_synch_bar(df):
-   
-    df[LEAD_COL] = df[LEAD_COL].astype(str).str.strip()
-
-    # An event is defined as a contiguous sequence of True values in the mask
-        # mask helps identify synchrony moments (coherence >= 0.5) and specifically finds when those moments start, so the code can count who was leading at those critical transition points
-    def find_event_starts(mask):
-        starts = []
-        in_run = False
-
-        for i, value in enumerate(mask):
-            if value and not in_run:
-                starts.append(i)
-                in_run = True
-            elif not value and in_run:
-                in_run = False
+def make_synch_bar(session, events=None):
 
-        return starts
+    # An event is a contiguous run of samples with coherence >= 0.5; we count who
+    # was leading at the first sample of each run (the critical transition point)
+    # events: precomputed extract_events(session), e.g. from the artifact cache
+    if events is None:
+        events = extract_events(session)
 
-    # Helper function to count leaders at event starts
-    def count_leaders(df, mask):
-        starts = find_event_starts(mask)
-        child_count = 0
-        parent_count = 0
+    def count_leaders(runs):
+        counts = np.bincount(runs.leaders, minlength=3)
+        return int(counts[LEAD_CHILD]), int(counts[LEAD_PARENT])
 
-        for i in starts:
-            leader = df.loc[i, LEAD_COL]
-            if leader.startswith("C"):
-                child_count += 1
-            elif leader.startswith("P"):
-                parent_count += 1
-
-        return child_count, parent_count
+    # count leaders at start of each moment
+    hf_child, hf_parent = count_leaders(events["hf"])
+    lf_child, lf_parent = count_leaders(events["lf"])
 
-    hf_mask = df[HF_COL] >= THRESH
-    lf_mask = df[LF_COL] >= THRESH
+    return make_synch_bar_from_counts(hf_child, hf_parent, lf_child, lf_parent)
 
-    # count leaders at start of each moment
-    hf_child, hf_parent = count_leaders(df, hf_mask)
-    lf_child, lf_parent = count_leaders(df, lf_mask)
 
+def make_synch_bar_from_counts(hf_child, hf_parent, lf_child, lf_parent):
+    # event counts by onset leader (e.g. summed over a cohort's sketches)
     data = pd.DataFrame({
         "Frequency": [
             "High Frequency Synchrony", "High Frequency Synchrony",
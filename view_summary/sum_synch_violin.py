@@ -1,6 +1,5 @@
 import plotly.graph_objects as go
 import plotly.express as px
-import pandas as pd
 import numpy as np
 import datetime as dt 
 from plotly.subplots import make_subplots
@@ -15,71 +14,236 @@ LINE_COLOR = 'rgb(85, 4, 83)'             # darkest color from 'BuPu' colorscale
 VIOLIN_COLOR = 'rgb(191, 211, 230, 0.75)' # light blue from 'BuPu' colorscale for the fill of the violin plot
 
 
-def make_violin(df): 
-    for col in [LF_COL, HF_COL]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)       
-    df = df.sort_values("timestamp").reset_index(drop=True)                
+# Above this many samples the violins switch to large-data mode: density and
+# box statistics are computed here in NumPy and only a stratified sample of
+# at most VIOLIN_MAX_POINTS points per violin is sent to the browser.
+VIOLIN_MAX_POINTS = 2000
+KDE_GRID_POINTS = 200
+KDE_BINS = 1024
+VIOLIN_HALF_WIDTH = 0.45
 
-    # Calculate mean and median for hover info
-    lf_mean = df["lf_coh"].mean()
-    lf_median = df["lf_coh"].median()
-    hf_mean = df["hf_coh"].mean()
-    hf_median = df["hf_coh"].median()
 
-    # Create subplots: 1 row, 2 columns
-    fig = make_subplots(
-        rows=1, cols=2,                                     # 1 row, 2 columns (1 row of 2 plots)  
-        shared_yaxes=True,                                  
-        subplot_titles=("High Frequency Synchrony", "Low Frequency Synchrony"),    
-        horizontal_spacing=0.05,
+def silverman_bandwidth(values):
+    # same rule of thumb plotly.js uses for violins
+    n = len(values)
+    std = np.std(values)
+    q1, q3 = np.percentile(values, [25, 75])
+    spread = min(std, (q3 - q1) / 1.349) or std
+    if spread == 0:
+        spread = 1e-3
+    return 1.059 * spread * n ** (-0.2)
+
+
+def kde_curve(values, n_grid=KDE_GRID_POINTS):
+    # Gaussian KDE on a grid over [min - 2bw, max + 2bw] (plotly's "soft" span).
+    # Samples are binned first so the cost is O(n + bins * kernel) not O(n * grid).
+    bw = silverman_bandwidth(values)
+    lo = float(values.min()) - 2 * bw
+    hi = float(values.max()) + 2 * bw
+    grid = np.linspace(lo, hi, n_grid)
+
+    if values.max() == values.min():
+        # constant column: a single narrow Gaussian (bw is silverman's floor)
+        density = np.exp(-0.5 * ((grid - float(values[0])) / bw) ** 2)
+        return grid, density / (bw * np.sqrt(2 * np.pi))
+
+    counts, edges = np.histogram(values, bins=KDE_BINS, range=(lo, hi))
+    centers = (edges[:-1] + edges[1:]) / 2
+    bin_w = edges[1] - edges[0]
+
+    half = int(np.ceil(4 * bw / bin_w))
+    offsets = np.arange(-half, half + 1) * bin_w
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+    # the kernel can be longer than the bins when the spread is small compared
+    # to bw, and "same" then returns the kernel's length; trim a full convolution
+    density = np.convolve(counts, kernel, mode="full")[half:half + len(counts)]
+    density /= density.sum() * bin_w
+
+    return grid, np.interp(grid, centers, density)
+
+
+def box_stats(values):
+    # exact box-plot numbers (linear quartiles, 1.5 IQR whiskers at data points)
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    lower = values[values >= q1 - 1.5 * iqr].min()
+    upper = values[values <= q3 + 1.5 * iqr].max()
+    return {
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lowerfence": float(lower),
+        "upperfence": float(upper),
+        "mean": float(np.mean(values, dtype="float64")),
+    }
+
+
+def stratified_sample(values, k, seed=0):
+    # one random point from each of k equal-count strata of the sorted values,
+    # so the sample keeps the shape of the full distribution
+    if len(values) <= k:
+        return np.asarray(values)
+    rng = np.random.default_rng(seed)
+    ordered = np.sort(values)
+    edges = np.linspace(0, len(ordered), k + 1).astype(int)
+    return ordered[rng.integers(edges[:-1], edges[1:])]
+
+
+def _hovertemplate(mean, median):
+    return (
+        "Value: %{y:.3f}<br>"
+        f"Mean: {mean:.3f}<br>"
+        f"Median: {median:.3f}"
+        "<extra></extra>"
     )
 
-    fig.add_trace(                                       
-        go.Violin(
-            y=df["lf_coh"],
-            name='',
-            fillcolor=VIOLIN_COLOR,                       
-            line_color=OUTLINE_COLOR,                     
-            marker=dict(color=LINE_COLOR, opacity=0.5),   
-            box_visible=True,                            
-            meanline_visible=True,                       
-            points="all",                                 
-            jitter=0.2,                                   
-            hoveron="points",                           
-            hovertemplate=(
-            "Value: %{y:.3f}<br>"
-            f"Mean: {lf_mean:.3f}<br>"
-            f"Median: {lf_median:.3f}"
-            "<extra></extra>"
-           )
+
+def _add_violin(fig, values, mean, median, col):
+    if len(values) <= VIOLIN_MAX_POINTS:
+        fig.add_trace(
+            go.Violin(
+                y=values,
+                name='',
+                fillcolor=VIOLIN_COLOR,
+                line_color=OUTLINE_COLOR,
+                marker=dict(color=LINE_COLOR, opacity=0.5),
+                box_visible=True,
+                meanline_visible=True,
+                points="all",
+                jitter=0.2,
+                hoveron="points",
+                hovertemplate=_hovertemplate(mean, median),
+            ),
+            row=1, col=col
+        )
+        return
+
+    # large-data mode: precomputed outline + box, sampled points
+    values = np.asarray(values, dtype="float64")
+    grid, density = kde_curve(values)
+    _add_violin_shape(fig, grid, density, box_stats(values), col)
+
+    sample = stratified_sample(values, VIOLIN_MAX_POINTS)
+    jitter = np.random.default_rng(1).uniform(-0.1, 0.1, len(sample))
+    fig.add_trace(
+        go.Scatter(
+            x=jitter,
+            y=sample,
+            mode="markers",
+            marker=dict(color=LINE_COLOR, opacity=0.5, size=4),
+            hovertemplate=_hovertemplate(mean, median),
+            showlegend=False,
         ),
-        row=1, col=2                                  
+        row=1, col=col
     )
 
-    # HF coherence violin
+
+def _add_violin_shape(fig, grid, density, stats, col, box_hover=False):
+    # violin drawn from a precomputed density curve + box statistics
+    half = density / density.max() * VIOLIN_HALF_WIDTH if density.max() > 0 else density
+
     fig.add_trace(
-        go.Violin(
-            y=df["hf_coh"],
-            name='',
-            fillcolor=VIOLIN_COLOR,                      
-            line_color=OUTLINE_COLOR,                     
-            marker=dict(color=LINE_COLOR, opacity=0.5),  
-            box_visible=True,                           
-            meanline_visible=True,                   
-            points="all",                           
-            jitter=0.2,                            
-            hoveron="points",                         
-            hovertemplate=(                           
-            "Value: %{y:.3f}<br>"
-            f"Mean: {hf_mean:.3f}<br>"
-            f"Median: {hf_median:.3f}"
-            "<extra></extra>"                              
-            ),
-        
+        go.Scatter(
+            x=np.concatenate([half, -half[::-1]]),
+            y=np.concatenate([grid, grid[::-1]]),
+            mode="lines",
+            fill="toself",
+            fillcolor=VIOLIN_COLOR,
+            line=dict(color=OUTLINE_COLOR, width=1),
+            hoverinfo="skip",
+            showlegend=False,
         ),
-        row=1, col=1
+        row=1, col=col
     )
-    
+    fig.add_trace(
+        go.Box(
+            x=[0],
+            q1=[stats["q1"]],
+            median=[stats["median"]],
+            q3=[stats["q3"]],
+            lowerfence=[stats["lowerfence"]],
+            upperfence=[stats["upperfence"]],
+            mean=[stats["mean"]],
+            boxmean=True,
+            width=0.1,
+            fillcolor="white",
+            line=dict(color=OUTLINE_COLOR, width=1),
+            hoverinfo="y" if box_hover else "skip",
+            showlegend=False,
+        ),
+        row=1, col=col
+    )
+
+
+def histogram_density(hist, edges):
+    # density curve from a fixed-bin histogram, lightly smoothed
+    hist = np.asarray(hist, dtype="float64")
+    centers = (edges[:-1] + edges[1:]) / 2
+    total = hist.sum()
+    if total == 0:
+        return centers, np.zeros_like(centers)
+    smooth = np.convolve(hist, [0.25, 0.5, 0.25], mode="same")
+    return centers, smooth / (total * np.diff(edges))
+
+
+def histogram_box_stats(hist, edges, mean, vmin, vmax):
+    # box-plot numbers from a histogram: quartiles interpolated within bins
+    # (to within one bin width), exact mean / extremes from the sketch
+    hist = np.asarray(hist, dtype="float64")
+    cdf = np.concatenate([[0.0], np.cumsum(hist)]) / max(hist.sum(), 1.0)
+    q1, median, q3 = np.interp([0.25, 0.5, 0.75], cdf, edges)
+    iqr = q3 - q1
+    return {
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lowerfence": float(max(vmin, q1 - 1.5 * iqr)),
+        "upperfence": float(min(vmax, q3 + 1.5 * iqr)),
+        "mean": float(mean),
+    }
+
+
+def make_violin(session): 
+    lf = session.lf
+    hf = session.hf
+
+    # Calculate mean and median for hover info (always over every sample)
+    lf_mean = np.mean(lf, dtype="float64") if session.n else np.nan
+    lf_median = np.median(lf) if session.n else np.nan
+    hf_mean = np.mean(hf, dtype="float64") if session.n else np.nan
+    hf_median = np.median(hf) if session.n else np.nan
+
+    fig = _violin_subplots()
+
+    # LF coherence violin (right), HF coherence violin (left)
+    _add_violin(fig, lf, lf_mean, lf_median, col=2)
+    _add_violin(fig, hf, hf_mean, hf_median, col=1)
+
+    return _style_violin(fig)
+
+
+def make_violin_from_histograms(hist, edges, means, mins, maxs):
+    # Violins for pooled data (e.g. a cohort sketch): hist is (2, bins) LF / HF
+    # counts over `edges`; means / mins / maxs are (2,) exact values
+    fig = _violin_subplots()
+    for row, col in [(0, 2), (1, 1)]:       # LF right, HF left
+        grid, density = histogram_density(hist[row], edges)
+        stats = histogram_box_stats(hist[row], edges, means[row], mins[row], maxs[row])
+        _add_violin_shape(fig, grid, density, stats, col, box_hover=True)
+    return _style_violin(fig)
+
+
+def _violin_subplots():
+    # Create subplots: 1 row, 2 columns
+    return make_subplots(
+        rows=1, cols=2,                                     # 1 row, 2 columns (1 row of 2 plots)  
+        shared_yaxes=True,                                  
+        subplot_titles=("High Frequency Synchrony", "Low Frequency Synchrony"),    
+        horizontal_spacing=0.05,
+    )
+
+
+def _style_violin(fig):
     fig.update_xaxes(
         showgrid=False,             
         gridcolor="lightgray",     
@@ -135,12 +299,13 @@ def make_violin(df):
     fig.add_trace(
         go.Scatter(
             x=x_line,
-            y=[0.5] * len(x_line),
+            y=np.full(len(x_line), 0.5),
             mode="markers", 
             marker=dict(size=20, color="rgba(0,0,0,0)"), 
             showlegend=False,
             hoverinfo="text",
-            text=["<b>Threshold for Meaningful Synchrony</b><br>Value: 0.5"] * len(x_line),
+            # one label for every point
+            text="<b>Threshold for Meaningful Synchrony</b><br>Value: 0.5",
             hoverlabel=dict(bgcolor=OUTLINE_COLOR, font=dict(color="white")),
         ),
         row=1, col=1
@@ -149,12 +314,12 @@ def make_violin(df):
     fig.add_trace(
         go.Scatter(
             x=x_line,
-            y=[0.5] * len(x_line),
+            y=np.full(len(x_line), 0.5),
             mode="markers",
             marker=dict(size=20, color="rgba(0,0,0,0)"),
             showlegend=False,
             hoverinfo="text",
-            text=["<b>Threshold for Meaningful Synchrony</b><br>Value: 0.5"] * len(x_line),
+            text="<b>Threshold for Meaningful Synchrony</b><br>Value: 0.5",
             hoverlabel=dict(bgcolor=OUTLINE_COLOR, font=dict(color="white")),
         ),
         row=1, col=2
@@ -1,7 +1,8 @@
 import numpy as np
-import pandas as pd
 from dash import Dash, html, dcc
 
+from run_length import extract_events
+
 # Identify data columns in the dataframe
 LF_COL = "lf_coh"
 HF_COL = "hf_coh"
@@ -11,47 +12,30 @@ CJE_COL = "cje"
 
 
 
-def event_durations(mask):
-
-    durations = []
-    current_run = 0
-
-    for value in mask:
-        if value:
-            current_run += 1
-        else:
-            if current_run > 0:
-                durations.append(current_run)
-                current_run = 0
-
-    if current_run > 0:
-        durations.append(current_run)
-
-    return durations
-
-
-def compute_summary_metrics(df):
+def compute_summary_metrics(session, events=None):
     # compute counts and average durations for:
     # - low frequency synchrony
     # - high frequency synchrony
     # - joint engagement
+    # events: precomputed extract_events(session), e.g. from the artifact cache
+    # durations are in seconds (the event tables count samples), the same
+    # units as the cohort sketches
 
-    lf_bool = df[LF_COL] >= THRESH
-    hf_bool = df[HF_COL] >= THRESH
-
-    je_bool = (df[SJE_COL] == 1) | (df[CJE_COL] == 1)
+    if events is None:
+        events = extract_events(session)
 
-    lf_durs = event_durations(lf_bool)
-    hf_durs = event_durations(hf_bool)
-    je_durs = event_durations(je_bool)
+    sample_s = session.sample_seconds
+    lf_durs = events["lf"].durations * sample_s
+    hf_durs = events["hf"].durations * sample_s
+    je_durs = events["joint"].durations * sample_s
 
     n_lf = len(lf_durs)
     n_hf = len(hf_durs)
     n_joint = len(je_durs)
 
-    avg_lf = sum(lf_durs) / n_lf if n_lf > 0 else 0.0
-    avg_hf = sum(hf_durs) / n_hf if n_hf > 0 else 0.0
-    avg_joint = sum(je_durs) / n_joint if n_joint > 0 else 0.0
+    avg_lf = float(lf_durs.mean()) if n_lf > 0 else 0.0
+    avg_hf = float(hf_durs.mean()) if n_hf > 0 else 0.0
+    avg_joint = float(je_durs.mean()) if n_joint > 0 else 0.0
 
     return {
         "n_lf": n_lf,
@@ -63,10 +47,8 @@ def compute_summary_metrics(df):
     }
 
 
-def make_summary_table(df):
-    for col in [SJE_COL, CJE_COL]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
-    m = compute_summary_metrics(df)
+def make_summary_table(session, metrics=None):
+    m = metrics if metrics is not None else compute_summary_metrics(session)
 
     cell_left = {
         "padding": "4px 8px",
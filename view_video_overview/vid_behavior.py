@@ -1,8 +1,6 @@
 import plotly.graph_objects as go
 import plotly as plt
 import datetime as dt
-import numpy as np
-import pandas as pd
 
 # Identify the columns to be used
 TS_COL = "timestamp"                # identifies the timestamp column
@@ -23,36 +21,27 @@ BEHAVIOR_COLORS = [
     [1.0,  "rgb(217,89,108)"],          # for z = 2; CJE
 ]
 
-def make_behavior_heat(df, minimal=False):
-    df = df.copy()
-
-    # Define conditions for engagement calculation
-    CONDITION = [
-        (df["sje"] == 1) & (df["timestamp"].notna()),                  # condition 1: if sje = 1 and timestamp exists
-        (df["cje"] == 1) & (df["timestamp"].notna())                   # condition 2: if cje = 1 and timestamp exists
-    ]
+def behavior_heat_trace(session, **kwargs):
+    # the bare heatmap trace (also used by vid_heatmaps' stacked timeline)
+    # engagement (0: No Engagement, 1: SJE, 2: CJE) is derived once in PreparedSession
+    engagement = ["Engagement"]                 # y = identifies Engagment as the title for the row(s) in the heat map (y order must match z order of z)
+    times = session.timestamp                   # x = identifies timestamp as the x axis measure
+    values = session.engagement[None, :]        # z = engagement as a single row (view, no copy)
 
-    # Create engagement column based on conditions (0: No Engagement, 1: SJE, 2: CJE)
-    df["engagement"] = np.select(       
-        CONDITION,                                              # sets the conditions to check
-        CHOICES,                                                # defines output values for each condition
-        default=np.where(df["timestamp"].notna(), 0, np.nan)    # sets 0 only if timestamp exists, otherwise leave blank
+    trace = dict(
+        z=values,
+        x=times,
+        y=engagement,
+        zmin=0,                        
+        zmax=2,                         
+        colorscale=BEHAVIOR_COLORS,    
+        showscale=False,
     )
+    trace.update(kwargs)   # e.g. LOD tile hover fields / subplot axes
+    return go.Heatmap(**trace)
 
-    df = df.sort_values("timestamp").reset_index(drop=True)    
-
-    engagement = ["Engagement"]                 # y = identifies Engagment as the title for the row(s) in the heat map (y order must match z order of z)
-    times = df['timestamp']                     # x = identifies timestamp as the x axis measure
-    values = df[["engagement"]].T.to_numpy()    # z = idenitifies values for each row of the heatmap from the df .T.to_numpy() to transpose column to row
-
-    fig = go.Figure(data=go.Heatmap(
-            z=values,
-            x=times,
-            y=engagement,
-            zmin=0,                        
-            zmax=2,                         
-            colorscale=BEHAVIOR_COLORS,    
-            showscale=False))               
+def make_behavior_heat(session, minimal=False):
+    fig = go.Figure(data=behavior_heat_trace(session))
 
     fig.update_layout(
             margin=dict(l=40, r=8, t=4, b=16),  
@@ -1,8 +1,6 @@
 import plotly.graph_objects as go
 import plotly as plt
 import datetime as dt
-import numpy as np
-import pandas as pd
 
 # Identify the columns to be used
 TS_COL = "timestamp"                # identifies the timestamp column
@@ -19,27 +17,26 @@ LEAD_COLORS = [
     [1.0,  "rgb(35,119,180)"],      # for z = 2
 ]
 
-def make_lead_heat(df, minimal=False):
-    df = df.copy()
-
-    for col in [LF_COL, HF_COL]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)                          
-    df = df.sort_values("timestamp").reset_index(drop=True)                                    
-
-    df["leading_num"] = df["leading"].str.upper().map({"C": 1, "P": 2}).fillna(0).astype(int)  
-
+def lead_heat_trace(session, **kwargs):
+    # the bare heatmap trace (also used by vid_heatmaps' stacked timeline)
     lead = ["Leading"]                          # y = identifies leading_num as the rows in the heat map (y order must match z order of z)
-    times = df['timestamp']                     # x = identifies timestamp as the x axis measure
-    values = df[["leading_num"]].T.to_numpy()   # z = idenitifies values for each row of the heatmap from the df .T.to_numpy() to transpose column to row
+    times = session.timestamp                   # x = identifies timestamp as the x axis measure
+    values = session.leading_num[None, :]       # z = leading_num as a single row (view, no copy)
+
+    trace = dict(
+        z=values,
+        x=times,
+        y=lead,
+        zmin=0,                        
+        zmax=2,                         
+        colorscale=LEAD_COLORS,         
+        showscale=False,
+    )
+    trace.update(kwargs)   # e.g. LOD tile hover fields / subplot axes
+    return go.Heatmap(**trace)
 
-    fig = go.Figure(data=go.Heatmap(
-            z=values,
-            x=times,
-            y=lead,
-            zmin=0,                        
-            zmax=2,                         
-            colorscale=LEAD_COLORS,         
-            showscale=False))              
+def make_lead_heat(session, minimal=False):
+    fig = go.Figure(data=lead_heat_trace(session))
 
     fig.update_layout(
         margin=dict(l=40, r=8, t=4, b=16),
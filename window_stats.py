@@ -0,0 +1,138 @@
+import numpy as np
+
+# Block prefix-sum index over a prepared session: any [i0, i1) window (or
+# [start, end] time window) gets engagement counts, LF/HF sums / means and
+# LF/HF histograms per leader or overall, from two lookups into cumulative
+# per-block tables plus the at most 2 * WINDOW_BLOCK samples at the window
+# edges. Cost is independent of session length.
+#
+# The tables are kept per block rather than per sample, so the index costs
+# ~10 bytes per sample (mostly the histograms) instead of a copy of the data.
+# Built lazily per session (PreparedSession.window_index).
+
+THRESH = 0.5
+
+WINDOW_BLOCK = 256
+
+# coherence histograms over [0, 1] in 1% bins (the cohort sketches use them too)
+HIST_BINS = 100
+HIST_EDGES = np.linspace(0.0, 1.0, HIST_BINS + 1)
+
+# leader axis follows leading_num (0 = none, 1 = child, 2 = parent),
+# engagement axis follows engagement (0 = none, 1 = SJE, 2 = CJE),
+# signal axis is 0 = LF, 1 = HF
+N_LEADERS = 3
+N_ENGAGEMENT = 3
+
+LEADER_CODES = {None: None, "Child": 1, "Parent": 2}
+
+
+def _hist_bins(values):
+    return np.clip((values * HIST_BINS).astype(np.intp), 0, HIST_BINS - 1)
+
+
+def _counts(leader, engagement, lf, hf, groups, n_groups):
+    # per-group tables for samples labelled with groups (0 .. n_groups - 1):
+    # engagement (g, leader, eng), sums (g, leader, signal) and histograms
+    # (g, leader, signal, bin)
+    cell = groups * N_LEADERS + leader
+    eng = np.bincount(cell * N_ENGAGEMENT + engagement, minlength=n_groups * N_LEADERS * N_ENGAGEMENT)
+    sums = np.stack([
+        np.bincount(cell, weights=lf, minlength=n_groups * N_LEADERS),
+        np.bincount(cell, weights=hf, minlength=n_groups * N_LEADERS),
+    ], axis=-1)
+    hist = np.stack([
+        np.bincount(cell * HIST_BINS + _hist_bins(lf), minlength=n_groups * N_LEADERS * HIST_BINS),
+        np.bincount(cell * HIST_BINS + _hist_bins(hf), minlength=n_groups * N_LEADERS * HIST_BINS),
+    ], axis=1).reshape(n_groups * N_LEADERS, HIST_BINS, 2).swapaxes(1, 2)
+    return (
+        eng.reshape(n_groups, N_LEADERS, N_ENGAGEMENT),
+        sums.reshape(n_groups, N_LEADERS, 2),
+        hist.reshape(n_groups, N_LEADERS, 2, HIST_BINS),
+    )
+
+
+def _cumulative(table, dtype):
+    # row 0 is all zeros so blocks [b0, b1) = cum[b1] - cum[b0]
+    out = np.zeros((len(table) + 1,) + table.shape[1:], dtype=dtype)
+    np.cumsum(table, axis=0, out=out[1:])
+    return out
+
+
+class WindowIndex:
+    def __init__(self, session, block=WINDOW_BLOCK):
+        self.block = block
+        # the session's own arrays (no copies), for the window edges
+        self.timestamp = session.timestamp
+        self.leader = session.leading_num
+        self.engagement = session.engagement
+        self.lf = session.lf
+        self.hf = session.hf
+
+        n_blocks = session.n // block
+        end = n_blocks * block
+        groups = np.repeat(np.arange(n_blocks), block)
+        eng, sums, hist = _counts(
+            self.leader[:end].astype(np.intp), self.engagement[:end].astype(np.intp),
+            self.lf[:end], self.hf[:end], groups, n_blocks,
+        )
+        self.engagement_cum = _cumulative(eng, np.int64)
+        self.value_cum = _cumulative(sums, np.float64)
+        self.hist_cum = _cumulative(hist, np.int32)
+
+    @property
+    def nbytes(self):
+        return self.engagement_cum.nbytes + self.value_cum.nbytes + self.hist_cum.nbytes
+
+    def rows(self, start, end):
+        # inclusive [start, end] time window -> [i0, i1) sample range
+        i0 = int(np.searchsorted(self.timestamp, np.datetime64(start, "ns"), side="left"))
+        i1 = int(np.searchsorted(self.timestamp, np.datetime64(end, "ns"), side="right"))
+        return i0, max(i0, i1)
+
+    def _edge_counts(self, i0, i1):
+        # tables for the raw samples [i0, i1) (a window edge)
+        rows = slice(i0, i1)
+        groups = np.zeros(i1 - i0, dtype=np.intp)
+        eng, sums, hist = _counts(
+            self.leader[rows].astype(np.intp), self.engagement[rows].astype(np.intp),
+            self.lf[rows], self.hf[rows], groups, 1,
+        )
+        return eng[0], sums[0], hist[0]
+
+    def stats(self, i0, i1, leader=None):
+        # leader: None (everyone), "Child" or "Parent"
+        b0 = -(-i0 // self.block)
+        b1 = max(b0, i1 // self.block)
+        if b0 == b1:
+            # window inside (at most two) blocks: count it directly
+            eng, sums, hist = self._edge_counts(i0, i1)
+        else:
+            eng = self.engagement_cum[b1] - self.engagement_cum[b0]
+            sums = self.value_cum[b1] - self.value_cum[b0]
+            hist = (self.hist_cum[b1] - self.hist_cum[b0]).astype(np.int64)
+            for lo, hi in ((i0, b0 * self.block), (b1 * self.block, i1)):
+                if hi > lo:
+                    e, s, h = self._edge_counts(lo, hi)
+                    eng, sums, hist = eng + e, sums + s, hist + h
+
+        code = LEADER_CODES[leader]
+        if code is None:
+            eng, sums, hist = eng.sum(axis=0), sums.sum(axis=0), hist.sum(axis=0)
+        else:
+            eng, sums, hist = eng[code], sums[code], hist[code]
+
+        # THRESH is a bin edge, so above-threshold counts come from the bins
+        above = hist[:, int(round(THRESH * HIST_BINS)):].sum(axis=1)
+        n = int(eng.sum())
+        return {
+            "n": n,
+            "engagement_counts": eng,           # [none, SJE, CJE]
+            "lf_sum": float(sums[0]),
+            "hf_sum": float(sums[1]),
+            "lf_mean": float(sums[0]) / n if n else float("nan"),
+            "hf_mean": float(sums[1]) / n if n else float("nan"),
+            "lf_above": int(above[0]),
+            "hf_above": int(above[1]),
+            "hist": hist,                       # (2, HIST_BINS) LF / HF over HIST_EDGES
+        }